@@ -0,0 +1,151 @@
+import json
+import time
+import uuid
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Set, Tuple
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Services are deployed separately, so this module is duplicated in src/tools_executor/core/session.py; keep both identical.
+
+
+class Session:
+    """A long-lived websocket carrying many tasks.
+
+    Clients tag each submission with their own request_id and receive results
+    out of order, as the tasks complete. `submit(task_uuid, message)` queues the
+    task and returns `(success, message)`; results reach the session through
+    `deliver`, which is safe to call from any thread. Frames are handled
+    concurrently, so a slow submission does not hold up later frames; each
+    request's `accepted` still precedes its `result`.
+    """
+
+    def __init__(self, websocket, submit: Callable[[str, Dict[str, Any]], Tuple[bool, str]],
+                 routes: Dict[str, "Session"], max_inflight: int = 64):
+        self.websocket = websocket
+        self.submit = submit
+        self.routes = routes
+        self.max_inflight = max(1, max_inflight)
+        self.loop = asyncio.get_event_loop()
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        self.inflight: Dict[str, Dict[str, Any]] = {}  # task uuid -> request state
+        self.request_ids: Dict[str, str] = {}  # client request_id -> task uuid
+        self.handlers: Set[asyncio.Future] = set()
+        self.closed = False
+
+    def deliver(self, result: Dict[str, Any]):
+        self.loop.call_soon_threadsafe(self._on_result, result)
+
+    def _on_result(self, result: Dict[str, Any]):
+        state = self.inflight.get(result["uuid"])
+        if state is None or self.closed:
+            return
+        if not state["acked"]:
+            # Finished before its acceptance was sent; emit once acknowledged
+            state["result"] = result
+            return
+        self._emit_result(result["uuid"], result)
+
+    def _emit_result(self, task_uuid: str, result: Dict[str, Any]):
+        state = self.inflight.pop(task_uuid)
+        self.request_ids.pop(state["request_id"], None)
+        message = {"type": "result", "request_id": state["request_id"], "uuid": task_uuid}
+        if result.get("error"):
+            message.update({"success": False, "error": result["error"]})
+        else:
+            message.update({"success": True, "output": result.get("output")})
+        self.outbox.put_nowait(message)
+
+    def _reply(self, message: Dict[str, Any]):
+        self.outbox.put_nowait(message)
+
+    async def _write_loop(self):
+        while True:
+            message = await self.outbox.get()
+            if message is None:
+                return
+            try:
+                await self.websocket.send(json.dumps(message))
+            except Exception as e:
+                logger.warning(f"Session send failed, closing: {e}")
+                return
+
+    async def _handle(self, raw: str):
+        try:
+            message = json.loads(raw)
+        except json.JSONDecodeError as e:
+            self._reply({"type": "error", "request_id": None, "error": f"Invalid JSON: {e}"})
+            return
+        if not isinstance(message, dict):
+            self._reply({"type": "error", "request_id": None, "error": "Message must be a JSON object"})
+            return
+
+        message_type = message.get("type", "submit")
+        request_id = message.get("request_id")
+
+        if message_type == "ping":
+            self._reply({"type": "pong", "time": time.time(), "inflight": len(self.inflight)})
+            return
+        if message_type != "submit":
+            self._reply({"type": "error", "request_id": request_id, "error": f"Unknown message type {message_type}"})
+            return
+        if not request_id:
+            self._reply({"type": "error", "request_id": None, "error": "Missing request_id"})
+            return
+        if request_id in self.request_ids:
+            self._reply({"type": "error", "request_id": request_id, "error": "Duplicate request_id"})
+            return
+        if len(self.inflight) >= self.max_inflight:
+            self._reply({"type": "error", "request_id": request_id, "error": "Session concurrency limit reached"})
+            return
+
+        task_uuid = str(uuid.uuid4())
+        self.inflight[task_uuid] = {"request_id": request_id, "acked": False, "result": None}
+        self.request_ids[request_id] = task_uuid
+        self.routes[task_uuid] = self
+
+        try:
+            # Submission validates against the database; keep it off the event loop
+            success, msg = await self.loop.run_in_executor(None, self.submit, task_uuid, message)
+        except Exception as e:
+            success, msg = False, str(e)
+
+        if not success:
+            self.routes.pop(task_uuid, None)
+            self.inflight.pop(task_uuid, None)
+            self.request_ids.pop(request_id, None)
+            self._reply({"type": "error", "request_id": request_id, "error": msg})
+            return
+
+        state = self.inflight.get(task_uuid)
+        if state is None:
+            return
+        state["acked"] = True
+        self._reply({"type": "accepted", "request_id": request_id, "uuid": task_uuid})
+        if state["result"] is not None:
+            self._emit_result(task_uuid, state["result"])
+
+    async def serve(self):
+        writer = asyncio.ensure_future(self._write_loop())
+        logger.info("Session opened")
+        try:
+            async for raw in self.websocket:
+                # request_id checks and inflight limits run before _handle's first await,
+                # so they still apply in frame order
+                handler = asyncio.ensure_future(self._handle(raw))
+                self.handlers.add(handler)
+                handler.add_done_callback(self.handlers.discard)
+        except Exception as e:
+            logger.info(f"Session connection ended: {e}")
+        finally:
+            self.closed = True
+            for task_uuid in list(self.inflight):
+                self.routes.pop(task_uuid, None)
+            if self.inflight:
+                logger.info(f"Session closed with {len(self.inflight)} unfinished task(s); their results will be dropped")
+            self.inflight.clear()
+            self.request_ids.clear()
+            self.outbox.put_nowait(None)
+            await writer
@@ -96,6 +96,7 @@ class DSLTaskExecutor:
 
             except Exception as e:
                 logger.error(f"Error processing task: {e}")
+                self.producer_queue.put({"uuid": task["uuid"], "output": None, "error": str(e)})
                 continue
             finally:
                 time.sleep(0.1) 
@@ -8,6 +8,7 @@ from queue import Queue
 from typing import Dict, Any
 
 from .task_processor import DSLTaskExecutor 
+from .session import Session
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -23,38 +24,81 @@ dsl_executor = DSLTaskExecutor(
     is_remote=False
 )
 
-# Maps UUID -> websocket connection
-uuid_connection_map: Dict[str, websockets.WebSocketServerProtocol] = {}
+# Maps UUID -> future resolved with the task's result on the server loop
+uuid_connection_map: Dict[str, asyncio.Future] = {}
+
+# Maps UUID -> session that submitted the task
+uuid_session_map: Dict[str, Session] = {}
 
 # Start task executor in background
 def start_task_executor():
     threading.Thread(target=dsl_executor.run, daemon=True).start()
 
-# Watch for results and send over websocket
+# Watch for results and hand them to the event loop that owns the connection;
+# sends happen there, concurrently per connection
+def resolve_result(waiter: asyncio.Future, result: Dict[str, Any]):
+    if not waiter.done():
+        waiter.set_result(result)
+
 def start_result_dispatcher():
     def dispatch_loop():
         while True:
             result = producer_queue.get()
             task_uuid = result["uuid"]
-            output = result["output"]
 
-            if task_uuid in uuid_connection_map:
-                ws = uuid_connection_map.pop(task_uuid)
-                asyncio.run(send_result_and_close(ws, output))
+            session = uuid_session_map.pop(task_uuid, None)
+            if session is not None:
+                session.deliver(result)
+                continue
+
+            waiter = uuid_connection_map.pop(task_uuid, None)
+            if waiter is None:
+                logger.info(f"Dropping result of task {task_uuid}; its connection is gone")
+                continue
+            waiter.get_loop().call_soon_threadsafe(resolve_result, waiter, result)
 
     threading.Thread(target=dispatch_loop, daemon=True).start()
 
-async def send_result_and_close(ws, output):
+async def wait_for_result(websocket, waiter: asyncio.Future):
+    # Returns None if the client disconnects before the result arrives
+    closed = asyncio.ensure_future(websocket.wait_closed())
     try:
-        await ws.send(json.dumps({"success": True, "output": output}))
-    except Exception as e:
-        logger.error(f"Error sending result: {e}")
+        done, _ = await asyncio.wait({waiter, closed}, return_when=asyncio.FIRST_COMPLETED)
     finally:
-        await ws.close()
-        logger.info("WebSocket connection closed after sending result")
+        closed.cancel()
+    return waiter.result() if waiter in done else None
+
+def result_message(result: Dict[str, Any]) -> Dict[str, Any]:
+    if result.get("error"):
+        return {"success": False, "error": result["error"]}
+    return {"success": True, "output": result["output"]}
+
+def submit_session_task(task_uuid: str, task: Dict[str, Any]):
+    workflow_id = task.get("workflow_id")
+    input_data = task.get("input_data")
+    output_name = task.get("output_name")
+    if not all([workflow_id, input_data, output_name]):
+        return False, "Missing required fields"
+    return dsl_executor.push_task_to_queue(
+        uuid=task_uuid,
+        workflow_id=workflow_id,
+        input_data=input_data,
+        output_name=output_name
+    )
 
 # WebSocket handler
 async def handler(websocket, path):
+    if path == "/session":
+        session = Session(
+            websocket,
+            submit=submit_session_task,
+            routes=uuid_session_map,
+            max_inflight=int(os.getenv("WS_SESSION_MAX_INFLIGHT", "64"))
+        )
+        await session.serve()
+        return
+
+    task_uuid = None
     try:
         message = await websocket.recv()
         task = json.loads(message)
@@ -65,11 +109,11 @@ async def handler(websocket, path):
 
         if not all([workflow_id, input_data, output_name]):
             await websocket.send(json.dumps({"success": False, "error": "Missing required fields"}))
-            await websocket.close()
             return
 
         task_uuid = str(uuid.uuid4())
-        uuid_connection_map[task_uuid] = websocket
+        waiter = asyncio.get_event_loop().create_future()
+        uuid_connection_map[task_uuid] = waiter
 
         success, msg = dsl_executor.push_task_to_queue(
             uuid=task_uuid,
@@ -80,16 +124,31 @@ async def handler(websocket, path):
 
         if not success:
             await websocket.send(json.dumps({"success": False, "error": msg}))
-            await websocket.close()
-            uuid_connection_map.pop(task_uuid, None)
             return
 
         await websocket.send(json.dumps({"success": True, "uuid": task_uuid}))
         logger.info(f"Task {task_uuid} accepted for workflow {workflow_id}")
 
+        # The acknowledgement is sent before the result on the same coroutine,
+        # so a fast task cannot overtake it
+        result = await wait_for_result(websocket, waiter)
+        if result is None:
+            logger.info(f"Client disconnected before task {task_uuid} finished")
+            return
+        await websocket.send(json.dumps(result_message(result)))
+        logger.info("WebSocket connection closed after sending result")
+
+    except websockets.ConnectionClosed:
+        logger.info(f"WebSocket closed by client for task {task_uuid}")
     except Exception as e:
         logger.error(f"WebSocket handler error: {e}")
-        await websocket.send(json.dumps({"success": False, "error": str(e)}))
+        try:
+            await websocket.send(json.dumps({"success": False, "error": str(e)}))
+        except websockets.ConnectionClosed:
+            pass
+    finally:
+        if task_uuid:
+            uuid_connection_map.pop(task_uuid, None)
         await websocket.close()
 
 # Start WebSocket server
@@ -99,7 +158,11 @@ def start_websocket_server(host="0.0.0.0", port=8765):
 
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
-    ws_server = websockets.serve(handler, host, port)
+    ws_server = websockets.serve(
+        handler, host, port,
+        ping_interval=float(os.getenv("WS_PING_INTERVAL", "20")),
+        ping_timeout=float(os.getenv("WS_PING_TIMEOUT", "20"))
+    )
     loop.run_until_complete(ws_server)
     logger.info(f"WebSocket server started on ws://{host}:{port}")
     loop.run_forever()
@@ -1,15 +1,20 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
+import json
 import uuid
 import logging
+from pymongo import errors
 
 from .executor import RolesExecutor
+from .rbac_index import RBACGraphIndex
 from .db.crud import *
+from .db.schema import as_int
 
 app = Flask(__name__)
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 executor = RolesExecutor()
+rbac_index = RBACGraphIndex()
 
 
 subject_roles_db = SubjectRolesMappingDatabase()
@@ -34,13 +39,46 @@ def submit_role_task():
         logger.error(f"Error in /submit-role-task: {e}", exc_info=True)
         return jsonify({"success": False, "message": str(e)}), 500
 
+@app.route('/executor/stats', methods=['GET'])
+def executor_stats():
+    return jsonify({"success": True, "data": executor.stats()})
+
+# ---------------- Paged and streamed queries ----------------
+
+def paged_query(db):
+    # ?limit=&cursor=&fields=a,b pages the results; ?format=ndjson streams every match;
+    # without limit or cursor every match is returned in one response
+    query_filter = request.json or {}
+    fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()] or None
+
+    if request.args.get("format") == "ndjson":
+        lines = (json.dumps(doc, default=str) + "\n" for doc in db.stream(query_filter, fields))
+        return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+
+    if "limit" not in request.args and "cursor" not in request.args:
+        # Unpaged callers get every match, as before paging existed
+        try:
+            docs = list(db.stream(query_filter, fields))
+        except errors.PyMongoError as e:
+            return jsonify({"success": False, "data": None, "next_cursor": None, "error": str(e)})
+        return jsonify({"success": True, "data": docs, "next_cursor": None, "error": None})
+
+    success, result = db.query_page(
+        query_filter,
+        cursor=request.args.get("cursor"),
+        limit=request.args.get("limit", type=int),
+        fields=fields
+    )
+    if not success:
+        return jsonify({"success": False, "data": None, "next_cursor": None, "error": result})
+    docs, next_cursor = result
+    return jsonify({"success": True, "data": docs, "next_cursor": next_cursor, "error": None})
+
 # ---------------- SubjectRolesMapping ----------------
 
 @app.route('/subject-roles', methods=['POST'])
 def query_subject_roles():
-    query_filter = request.json or {}
-    success, result = subject_roles_db.query(query_filter)
-    return jsonify({"success": success, "data": result if success else None, "error": None if success else result})
+    return paged_query(subject_roles_db)
 
 
 @app.route('/subject-roles/<string:subject_id>', methods=['GET'])
@@ -53,9 +91,7 @@ def get_subject_roles(subject_id):
 
 @app.route('/role-group', methods=['POST'])
 def query_role_group():
-    query_filter = request.json or {}
-    success, result = role_group_db.query(query_filter)
-    return jsonify({"success": success, "data": result if success else None, "error": None if success else result})
+    return paged_query(role_group_db)
 
 
 @app.route('/role-group/<string:role_id>', methods=['GET'])
@@ -77,6 +113,13 @@ def insert_role_type():
 @app.route('/role-type/<string:role_type>', methods=['PUT'])
 def update_role_type(role_type):
     update_fields = request.json or {}
+    # Capacity counters are compared numerically by the position claims
+    for key in ("max_positions", "filled_positions"):
+        if key in update_fields:
+            value = as_int(update_fields[key], None)
+            if value is None:
+                return jsonify({"success": False, "data": None, "error": f"{key} must be an integer"}), 400
+            update_fields[key] = value
     success, result = role_type_db.update(role_type, update_fields)
     return jsonify({"success": success, "data": result if success else None, "error": None if success else result})
 
@@ -100,6 +143,12 @@ def get_role_type(role_type):
     return jsonify({"success": success, "data": result.to_dict() if success else None, "error": None if success else result})
 
 
+@app.route('/role-type/<string:role_type>/occupancy', methods=['GET'])
+def get_role_type_occupancy(role_type):
+    success, result = role_type_db.get_occupancy(role_type)
+    return jsonify({"success": success, "data": result if success else None, "error": None if success else result})
+
+
 # ---------------- GroupConstraintsMapping ----------------
 
 @app.route('/group-constraints', methods=['POST'])
@@ -140,9 +189,7 @@ def get_group_constraints(group_id):
 
 @app.route('/role-applications', methods=['POST'])
 def query_role_applications():
-    query_filter = request.json or {}
-    success, result = role_app_db.query(query_filter)
-    return jsonify({"success": success, "data": result if success else None, "error": None if success else result})
+    return paged_query(role_app_db)
 
 
 @app.route('/role-applications/<string:role_application_id>', methods=['GET'])
@@ -151,6 +198,60 @@ def get_role_application(role_application_id):
     return jsonify({"success": success, "data": result.to_dict() if success else None, "error": None if success else result})
 
 
+# ---------------- RBAC Index ----------------
+
+@app.route('/rbac/subjects/<string:subject_id>', methods=['GET'])
+def rbac_describe_subject(subject_id):
+    result = rbac_index.describe_subject(subject_id)
+    if result is None:
+        return jsonify({"success": False, "data": None, "error": "Subject not found"}), 404
+    return jsonify({"success": True, "data": result, "error": None})
+
+
+@app.route('/rbac/roles/<string:role_id>/subjects', methods=['GET'])
+def rbac_role_subjects(role_id):
+    return jsonify({"success": True, "data": rbac_index.role_subjects(role_id), "error": None})
+
+
+@app.route('/rbac/groups/<string:group_id>/subjects', methods=['GET'])
+def rbac_group_subjects(group_id):
+    return jsonify({"success": True, "data": rbac_index.group_subjects(group_id), "error": None})
+
+
+@app.route('/rbac/role-type-subjects', methods=['GET'])
+def rbac_role_type_subjects():
+    role_type = request.args.get("role_type")
+    if not role_type:
+        return jsonify({"success": False, "data": None, "error": "role_type is required"}), 400
+    subjects = rbac_index.role_type_subjects(role_type, request.args.get("job_space_id", ""))
+    return jsonify({"success": True, "data": subjects, "error": None})
+
+
+@app.route('/rbac/membership', methods=['POST'])
+def rbac_membership():
+    payload = request.json or {}
+    subject_id = payload.get("subject_id")
+    if not subject_id:
+        return jsonify({"success": False, "data": None, "error": "subject_id is required"}), 400
+
+    result = {}
+    if payload.get("role_id"):
+        result["role_id"] = rbac_index.has_role(subject_id, payload["role_id"])
+    if payload.get("role_type"):
+        result["role_type"] = rbac_index.has_role_type(
+            subject_id, payload["role_type"], payload.get("job_space_id", ""))
+    if payload.get("group_id"):
+        result["group_id"] = rbac_index.in_group(subject_id, payload["group_id"])
+    if not result:
+        return jsonify({"success": False, "data": None, "error": "One of role_id, role_type or group_id is required"}), 400
+
+    return jsonify({"success": True, "data": {"member": all(result.values()), "checks": result}, "error": None})
+
+
+@app.route('/rbac/stats', methods=['GET'])
+def rbac_stats():
+    return jsonify({"success": True, "data": rbac_index.stats()})
+
 
 def run_server():
     app.run(port=5000)
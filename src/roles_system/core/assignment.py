@@ -0,0 +1,89 @@
+import uuid
+import logging
+from typing import Dict, Any, Optional
+
+from .db.crud import RoleTypeAssignmentMappingDatabase
+from .db.crud import RoleAssignmentWriter
+from .db.schema import RoleGroupMapping, RoleTypeAssignmentMapping
+from .clients.role_assoc import SubjectAssociationClient
+from .clients.dsl import DSLExecutor
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def check_eligibility(role_type_data: RoleTypeAssignmentMapping, application_data: Dict[str, Any]) -> Optional[str]:
+    """Runs the PQT and application evaluation DSLs; returns a failure message or None."""
+    dsl_input = {"role_type_data": role_type_data.to_dict(), "application_data": application_data}
+
+    pqt_dsl_id = role_type_data.role_post_addition_dsl_workflow_id
+    if not pqt_dsl_id:
+        raise ValueError("Missing role_initial_pqt_checker_dsl_id")
+
+    pqt_executor = DSLExecutor(workflow_id=pqt_dsl_id)
+    if not pqt_executor.get_final_output(pqt_executor.run(dsl_input)):
+        logger.warning("PQT check failed")
+        return "PQT check failed"
+
+    eval_dsl_id = role_type_data.role_post_removal_dsl_workflow_id
+    if not eval_dsl_id:
+        raise ValueError("Missing role_application_eval_dsl_id")
+
+    eval_executor = DSLExecutor(workflow_id=eval_dsl_id)
+    if not eval_executor.get_final_output(eval_executor.run(dsl_input)):
+        logger.warning("Application evaluation failed")
+        return "Application evaluation failed"
+
+    return None
+
+
+# error_code values returned by finalize_assignment
+POSITION_FILLED = "position_filled"
+ASSOCIATION_FAILED = "association_failed"
+RECORD_FAILED = "record_failed"
+
+
+def finalize_assignment(
+    role_type_db: RoleTypeAssignmentMappingDatabase,
+    writer: RoleAssignmentWriter,
+    role_type_data: RoleTypeAssignmentMapping,
+    role_application_id: str,
+    application_data: Dict[str, Any],
+    subject_id: str,
+    subject_data: Dict[str, Any]
+) -> Dict[str, Any]:
+    role_type = role_type_data.role_type
+    limited = role_type_data.capacity() > 0
+
+    # Claim a position before associating so concurrent applications cannot overfill the role
+    if limited and not role_type_db.claim_position(role_type):
+        logger.warning(f"Position already filled for role_type: {role_type}")
+        return {"success": False, "message": "Position already filled", "error_code": POSITION_FILLED}
+
+    role_id = str(uuid.uuid4())
+    role_data = {
+        "role_id": role_id,
+        "role_type": role_type,
+        "role_application_id": role_application_id
+    }
+
+    assoc_client = SubjectAssociationClient(subject_id, subject_data, role_data)
+    assoc_result = assoc_client.create_association()
+    if not assoc_result:
+        if limited:
+            role_type_db.release_position(role_type)
+        return {"success": False, "message": "Subject association failed", "error_code": ASSOCIATION_FAILED}
+
+    role_group = RoleGroupMapping(
+        role_id=role_id,
+        role_type=role_type,
+        group_ids=application_data.get("group_ids", []),
+        job_space_id=application_data.get("job_space_id", "")
+    )
+    success, error = writer.assign(subject_id, role_group, application_data.get("subject_type", ""))
+    if not success:
+        if limited:
+            role_type_db.release_position(role_type)
+        return {"success": False, "message": f"Failed to record role assignment: {error}", "error_code": RECORD_FAILED}
+
+    return {"success": True, "role_id": role_id, "association": assoc_result}
@@ -1,15 +1,12 @@
-import uuid
 import logging
 import os
 from typing import Dict, Any, Optional, List
 
 from .db.crud import RoleTypeAssignmentMappingDatabase
-from .db.crud import SubjectRolesMappingDatabase
-from .db.crud import RoleGroupMappingDatabase
+from .db.crud import RoleAssignmentWriter
 from .clients.dsl import DSLExecutor
 from .clients.auction import AuctionClient
-from .clients.role_assoc import SubjectAssociationClient
-from .db.schema import SubjectRolesMapping, RoleGroupMapping
+from .assignment import finalize_assignment
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -18,8 +15,7 @@ logging.basicConfig(level=logging.INFO)
 class AuctionBasedSubjectAssignmentHandler:
     def __init__(self):
         self.role_type_db = RoleTypeAssignmentMappingDatabase()
-        self.subject_roles_db = SubjectRolesMappingDatabase()
-        self.role_group_db = RoleGroupMappingDatabase()
+        self.assignment_writer = RoleAssignmentWriter()
         self.auction_client = AuctionClient(api_url=os.getenv(
             "AUCTION_API_URL", "http://localhost:7000"))
 
@@ -45,7 +41,7 @@ class AuctionBasedSubjectAssignmentHandler:
             if role_assignment_type not in ["dynamic_single_subject", "dynamic_multi_subject"]:
                 return {"success": False, "message": "Unsupported role assignment type"}
 
-            if role_assignment_type == "dynamic_single_subject" and role_type_data.position_filled:
+            if not role_type_data.has_open_position():
                 return {"success": False, "message": "Role already filled"}
 
             # Step 2: Run role auction creation DSL
@@ -98,53 +94,16 @@ class AuctionBasedSubjectAssignmentHandler:
             if not eval_executor.get_final_output(eval_output):
                 return {"success": False, "message": "Evaluation failed for selected subject"}
 
-            # Step 6: Associate subject and update DBs
-            role_id = str(uuid.uuid4())
-            role_data = {
-                "role_id": role_id,
-                "role_type": role_type,
-                "role_application_id": role_application_id
-            }
-
-            assoc_client = SubjectAssociationClient(
-                winner_subject_id, subject_data, role_data)
-            assoc_result = assoc_client.create_association()
-            if not assoc_result:
-                return {"success": False, "message": "Subject association failed"}
-
-            # SubjectRolesMapping
-            success, subject_entry = self.subject_roles_db.get_by_subject_id(
-                winner_subject_id)
-            if success:
-                updated_roles = list(set(subject_entry.role_ids + [role_id]))
-                self.subject_roles_db.update(
-                    winner_subject_id, {"role_ids": updated_roles})
-            else:
-                new_subject_entry = SubjectRolesMapping(
-                    subject_id=winner_subject_id,
-                    role_ids=[role_id],
-                    subject_type=application_data.get("subject_type", ""),
-                    job_space_id=""
-                )
-                self.subject_roles_db.insert(new_subject_entry)
-
-            # RoleGroupMapping
-            success, role_group = self.role_group_db.get_by_role_id(role_id)
-            if not success:
-                new_group_entry = RoleGroupMapping(
-                    role_id=role_id,
-                    role_type=role_type,
-                    group_ids=application_data.get("group_ids", []),
-                    job_space_id=""
-                )
-                self.role_group_db.insert(new_group_entry)
-
-            if role_assignment_type == "dynamic_single_subject":
-                self.role_type_db.update(role_type, {"position_filled": True})
+            # Step 6: Claim the position, associate the subject and record the mappings
+            result = finalize_assignment(
+                self.role_type_db, self.assignment_writer, role_type_data,
+                role_application_id, application_data, winner_subject_id, subject_data)
+            if not result.get("success"):
+                return result
 
             logger.info(
-                f"Subject {winner_subject_id} assigned to role {role_id} via auction")
-            return {"success": True, "role_id": role_id, "subject_id": winner_subject_id, "association": assoc_result}
+                f"Subject {winner_subject_id} assigned to role {result['role_id']} via auction")
+            return {**result, "subject_id": winner_subject_id}
 
         except Exception as e:
             logger.error(
@@ -0,0 +1,281 @@
+import os
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .db.crud import RoleGroupMappingDatabase
+from .db.crud import RoleTypeAssignmentMappingDatabase
+from .db.crud import SubjectRolesMappingDatabase
+from .db.crud import RoleAssignmentWriter
+from .db.schema import RoleGroupMapping, RoleTypeAssignmentMapping
+from .clients.role_assoc import SubjectAssociationClient
+from .assignment import check_eligibility
+from .removal import check_removal
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+DYNAMIC_ASSIGNMENT_TYPES = ("dynamic_single_subject", "dynamic_multi_subject")
+
+
+def _failed(index: int, message: str, **fields) -> Dict[str, Any]:
+    return {"index": index, **fields, "success": False, "message": message}
+
+
+def _summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    succeeded = sum(1 for r in results if r.get("success"))
+    return {
+        "success": succeeded == len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }
+
+
+class BulkRoleHandler:
+    """Runs many assignments or removals with concurrent DSL checks and one bulk write per collection."""
+
+    def __init__(self):
+        self.role_type_db = RoleTypeAssignmentMappingDatabase()
+        self.role_group_db = RoleGroupMappingDatabase()
+        self.subject_roles_db = SubjectRolesMappingDatabase()
+        self.writer = RoleAssignmentWriter()
+        self.pool = ThreadPoolExecutor(max_workers=int(os.getenv("ROLES_BULK_CONCURRENCY", "16")))
+
+    def _map(self, fn: Callable[[int], Any], indices: Iterable[int]) -> Dict[int, Tuple[Any, Optional[str]]]:
+        futures = {i: self.pool.submit(fn, i) for i in indices}
+        outcomes = {}
+        for i, future in futures.items():
+            try:
+                outcomes[i] = (future.result(), None)
+            except Exception as e:
+                logger.error(f"Bulk item {i} failed: {e}")
+                outcomes[i] = (None, str(e))
+        return outcomes
+
+    def _load_role_types(self, role_types: Iterable[str]) -> Dict[str, RoleTypeAssignmentMapping]:
+        wanted = list({rt for rt in role_types if rt})
+        if not wanted:
+            return {}
+        success, docs = self.role_type_db.query({"role_type": {"$in": wanted}})
+        if not success:
+            raise RuntimeError(f"Failed to load role types: {docs}")
+        return {doc["role_type"]: RoleTypeAssignmentMapping.from_dict(doc) for doc in docs}
+
+    # ---------------- Assignment ----------------
+
+    def assign_direct_bulk(self, items: List[Dict[str, Any]], role_application_id: str = "") -> Dict[str, Any]:
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        role_types = self._load_role_types(
+            (item.get("application_data") or {}).get("role_type") for item in items)
+
+        # Step 1: Validate every item against its role type
+        candidates = []
+        for i, item in enumerate(items):
+            subject_id = item.get("subject_id")
+            role_type = (item.get("application_data") or {}).get("role_type")
+            role_type_data = role_types.get(role_type)
+            if not subject_id or "subject_data" not in item:
+                results[i] = _failed(i, "Missing subject_id or subject_data", subject_id=subject_id)
+            elif role_type_data is None:
+                results[i] = _failed(i, f"Role type {role_type} not found", subject_id=subject_id)
+            elif role_type_data.role_assignment_type not in DYNAMIC_ASSIGNMENT_TYPES:
+                results[i] = _failed(i, "Assignment type not permitted", subject_id=subject_id)
+            elif not role_type_data.has_open_position():
+                results[i] = _failed(i, "Position already filled", subject_id=subject_id)
+            else:
+                candidates.append(i)
+
+        def role_type_of(i: int) -> RoleTypeAssignmentMapping:
+            return role_types[items[i]["application_data"]["role_type"]]
+
+        # Step 2: Run the eligibility DSLs concurrently
+        eligible = []
+        for i, (failure, error) in self._map(
+                lambda i: check_eligibility(role_type_of(i), items[i]["application_data"]), candidates).items():
+            if error or failure:
+                results[i] = _failed(i, error or failure, subject_id=items[i]["subject_id"])
+            else:
+                eligible.append(i)
+
+        # Step 3: Claim positions for capacity-limited role types, one update per role type;
+        # items beyond the granted count fail in submission order
+        by_role_type: Dict[str, List[int]] = {}
+        for i in sorted(eligible):
+            by_role_type.setdefault(role_type_of(i).role_type, []).append(i)
+
+        claimed: List[int] = []
+        to_associate = []
+        for role_type, indices in by_role_type.items():
+            if role_types[role_type].capacity() == 0:
+                to_associate.extend(indices)
+                continue
+            granted = self.role_type_db.claim_positions(role_type, len(indices))
+            claimed.extend(indices[:granted])
+            to_associate.extend(indices[:granted])
+            for i in indices[granted:]:
+                results[i] = _failed(i, "Position already filled", subject_id=items[i]["subject_id"])
+
+        # Step 4: Create the subject associations concurrently
+        def associate(i: int) -> Tuple[str, Optional[Dict[str, Any]]]:
+            item = items[i]
+            role_id = str(uuid.uuid4())
+            role_data = {
+                "role_id": role_id,
+                "role_type": item["application_data"]["role_type"],
+                "role_application_id": item.get("role_application_id") or role_application_id
+            }
+            client = SubjectAssociationClient(item["subject_id"], item["subject_data"], role_data)
+            return role_id, client.create_association()
+
+        associated = []
+        for i, (outcome, error) in self._map(associate, to_associate).items():
+            if error or not outcome[1]:
+                results[i] = _failed(i, error or "Subject association failed", subject_id=items[i]["subject_id"])
+            else:
+                associated.append((i, outcome[0], outcome[1]))
+
+        # Step 5: Record every mapping change in one bulk write per collection
+        assignments = []
+        for i, role_id, _ in associated:
+            application_data = items[i]["application_data"]
+            role_group = RoleGroupMapping(
+                role_id=role_id,
+                role_type=application_data["role_type"],
+                group_ids=application_data.get("group_ids", []),
+                job_space_id=application_data.get("job_space_id", "")
+            )
+            assignments.append((items[i]["subject_id"], role_group, application_data.get("subject_type", "")))
+
+        success, error = self.writer.assign_many(assignments)
+        for i, role_id, association in associated:
+            if success:
+                results[i] = {"index": i, "subject_id": items[i]["subject_id"], "success": True,
+                              "role_id": role_id, "association": association}
+            else:
+                results[i] = _failed(i, f"Failed to record role assignment: {error}", subject_id=items[i]["subject_id"])
+
+        # Release positions whose claimant did not end up assigned
+        self.role_type_db.release_positions(
+            [role_type_of(i).role_type for i in claimed if not results[i].get("success")])
+
+        logger.info(f"Bulk assignment finished: {sum(1 for r in results if r['success'])}/{len(items)} assigned")
+        return _summarize(results)
+
+    # ---------------- Removal ----------------
+
+    def remove_bulk(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return self._remove(items)
+
+    def _remove(self, items: List[Dict[str, Any]], allow_unheld: bool = False) -> Dict[str, Any]:
+        # allow_unheld admits items with an empty subject_id: roles no subject holds
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+        success, docs = self.role_group_db.query(
+            {"role_id": {"$in": list({item.get("role_id") for item in items if item.get("role_id")})}})
+        if not success:
+            raise RuntimeError(f"Failed to load roles: {docs}")
+        roles = {doc["role_id"]: RoleGroupMapping.from_dict(doc) for doc in docs}
+        role_types = self._load_role_types(role.role_type for role in roles.values())
+
+        success, subject_docs = self.subject_roles_db.query(
+            {"subject_id": {"$in": list({item.get("subject_id") for item in items if item.get("subject_id")})}})
+        if not success:
+            raise RuntimeError(f"Failed to load subjects: {subject_docs}")
+        held = {(role_id, doc["subject_id"]) for doc in subject_docs for role_id in doc.get("role_ids", [])}
+
+        # Step 1: Validate every item; fixed roles are never removed, and a role is removed at most
+        # once per request so its position is released only once
+        candidates = []
+        seen = set()
+        for i, item in enumerate(items):
+            role_id, subject_id = item.get("role_id"), item.get("subject_id")
+            role = roles.get(role_id)
+            if not role_id or (not subject_id and not allow_unheld):
+                results[i] = _failed(i, "Missing role_id or subject_id", role_id=role_id, subject_id=subject_id)
+            elif role_id in seen:
+                results[i] = _failed(i, f"Duplicate role_id {role_id}", role_id=role_id, subject_id=subject_id)
+            elif role is None:
+                results[i] = _failed(i, f"Role {role_id} not found", role_id=role_id, subject_id=subject_id)
+            elif subject_id and (role_id, subject_id) not in held:
+                results[i] = _failed(i, f"Subject {subject_id} does not hold role {role_id}",
+                                     role_id=role_id, subject_id=subject_id)
+            elif role.role_type not in role_types:
+                results[i] = _failed(i, f"Role type {role.role_type} not found", role_id=role_id, subject_id=subject_id)
+            elif role_types[role.role_type].role_assignment_type == "fixed":
+                results[i] = _failed(i, "Role is fixed and cannot be removed", role_id=role_id, subject_id=subject_id)
+            else:
+                seen.add(role_id)
+                candidates.append(i)
+
+        # Step 2: Run the removal DSLs concurrently
+        approved = []
+        for i, (failure, error) in self._map(
+                lambda i: check_removal(
+                    role_types[roles[items[i]["role_id"]].role_type],
+                    roles[items[i]["role_id"]].to_dict(),
+                    items[i]["subject_id"]),
+                candidates).items():
+            if error or failure:
+                results[i] = _failed(i, error or failure, role_id=items[i]["role_id"], subject_id=items[i]["subject_id"])
+            else:
+                approved.append(i)
+
+        # Step 3: Remove all approved pairs with bulk writes and free their positions
+        success, error = self.writer.remove_many([(items[i]["role_id"], items[i]["subject_id"]) for i in approved])
+        for i in approved:
+            if success:
+                results[i] = {"index": i, "role_id": items[i]["role_id"], "subject_id": items[i]["subject_id"],
+                              "success": True, "message": "Role removed successfully"}
+            else:
+                results[i] = _failed(i, f"Failed to remove role: {error}",
+                                     role_id=items[i]["role_id"], subject_id=items[i]["subject_id"])
+        if success:
+            self.role_type_db.release_positions([
+                roles[items[i]["role_id"]].role_type for i in approved
+                if items[i]["subject_id"] and role_types[roles[items[i]["role_id"]].role_type].capacity() > 0
+            ])
+
+        logger.info(f"Bulk removal finished: {sum(1 for r in results if r['success'])}/{len(items)} removed")
+        return _summarize(results)
+
+    def remove_all_for_job_space(self, job_space_id: str) -> Dict[str, Any]:
+        success, role_docs = self.role_group_db.query({"job_space_id": job_space_id})
+        if not success:
+            raise RuntimeError(f"Failed to load roles for job space {job_space_id}: {role_docs}")
+        role_ids = {doc["role_id"] for doc in role_docs}
+        if not role_ids:
+            return _summarize([])
+
+        success, subject_docs = self.subject_roles_db.query({"role_ids": {"$in": list(role_ids)}})
+        if not success:
+            raise RuntimeError(f"Failed to load subjects for job space {job_space_id}: {subject_docs}")
+
+        items = [
+            {"role_id": role_id, "subject_id": doc["subject_id"]}
+            for doc in subject_docs for role_id in doc.get("role_ids", []) if role_id in role_ids
+        ]
+        # Roles nobody holds go through the same checks, with an empty subject_id
+        held = {item["role_id"] for item in items}
+        orphaned = sorted(role_ids - held)
+        items.extend({"role_id": role_id, "subject_id": ""} for role_id in orphaned)
+
+        result = self._remove(items, allow_unheld=True)
+        result["orphaned_roles_removed"] = sum(
+            1 for r in result["results"] if r.get("success") and not r.get("subject_id"))
+        return result
+
+
+_bulk_handler: Optional[BulkRoleHandler] = None
+_bulk_handler_lock = threading.Lock()
+
+
+def get_bulk_handler() -> BulkRoleHandler:
+    global _bulk_handler
+    if _bulk_handler is None:
+        with _bulk_handler_lock:
+            if _bulk_handler is None:
+                _bulk_handler = BulkRoleHandler()
+    return _bulk_handler
@@ -1,9 +1,12 @@
 import os
 import json
+import uuid
 import logging
 import requests
 import asyncio
-from threading import Thread, Event
+import threading
+import time
+from concurrent.futures import Future, CancelledError, TimeoutError as FutureTimeoutError
 from typing import Dict, Optional
 
 from nats.aio.client import Client as NATS
@@ -11,22 +14,145 @@ from nats.aio.client import Client as NATS
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+CORRELATION_KEYS = ("correlation_id", "auction_id", "bid_task_id")
+SUBSCRIBE_MAX_BACKOFF_SECONDS = 30.0
 
-class AuctionClient:
-    def __init__(self, api_url: str):
-        self.api_url = api_url.rstrip("/")
+# Cancellations that arrive before their waiter registers are remembered this long
+CANCEL_RETENTION_SECONDS = 600
+
+
+class AuctionResultListener:
+    """Holds one NATS subscription per process and routes bid results to waiters by correlation id."""
+
+    def __init__(self):
         self.nats_url = os.getenv("ORG_NATS_CLIENT", "nats://localhost:4222")
         self.subject_id = os.getenv("ORG_ID", "default_org")
         self.topic = f"{self.subject_id}_bid_events"
-        self.loop = asyncio.new_event_loop()
         self.nc = NATS()
-        self.result = None
-        self._event = Event()
+        self.waiters: Dict[str, Future] = {}
+        self.cancelled: Dict[str, float] = {}  # correlation id -> cancellation time
+        self.lock = threading.Lock()
+
+        self.loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self.thread = threading.Thread(target=self._run_event_loop, daemon=True)
+        self.thread.start()
+
+    def _run_event_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.create_task(self._subscribe())
+        self.loop.run_forever()
+
+    async def _subscribe(self):
+        # max_reconnect_attempts only applies once connected, so the first connect is retried here
+        delay = 1.0
+        while True:
+            try:
+                if not self.nc.is_connected:
+                    self.nc = NATS()
+                    await self.nc.connect(servers=[self.nats_url], max_reconnect_attempts=-1)
+                await self.nc.subscribe(self.topic, cb=self._message_handler)
+                logger.info(f"Subscribed to NATS topic: {self.topic}")
+                self._ready.set()
+                return
+            except Exception as e:
+                logger.error(f"Error subscribing to bid events, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, SUBSCRIBE_MAX_BACKOFF_SECONDS)
+
+    async def _message_handler(self, msg):
+        try:
+            data = msg.data.decode()
+            try:
+                result = json.loads(data)
+            except json.JSONDecodeError:
+                result = json.loads(data.replace("'", '"'))  # if JSON sent as str(dict)
+        except Exception as e:
+            logger.error(f"Failed to parse bid event message: {e}")
+            return
+
+        correlation_id = next(
+            (str(result[key]) for key in CORRELATION_KEYS if isinstance(result, dict) and result.get(key)), None)
+        if not correlation_id:
+            logger.warning("Received bid event without a correlation id, dropping it")
+            return
+
+        with self.lock:
+            waiter = self.waiters.pop(correlation_id, None)
+
+        if waiter is None:
+            logger.debug(f"No waiter registered for bid event {correlation_id}")
+            return
+
+        if not waiter.done():
+            waiter.set_result(result)
+        logger.info(f"Delivered bid event {correlation_id}")
+
+    def register(self, correlation_id: str) -> Future:
+        self._ready.wait(timeout=10)
+        waiter = Future()
+        with self.lock:
+            if self.cancelled.pop(correlation_id, None) is not None:
+                waiter.cancel()
+                return waiter
+            self.waiters[correlation_id] = waiter
+        return waiter
+
+    def discard(self, correlation_id: str) -> bool:
+        """Drops the waiter for correlation_id; a caller blocked on it sees it cancelled."""
+        with self.lock:
+            waiter = self.waiters.pop(correlation_id, None)
+        return waiter is not None and waiter.cancel()
 
-    def submit_bid_and_wait(self, bid_payload: Dict, timeout: int = 30) -> Optional[Dict]:
+    def cancel(self, correlation_id: str):
+        """Cancels the wait for correlation_id, including one that has not registered yet."""
+        now = time.monotonic()
+        with self.lock:
+            waiter = self.waiters.pop(correlation_id, None)
+            if waiter is None:
+                for expired in [cid for cid, at in self.cancelled.items() if now - at > CANCEL_RETENTION_SECONDS]:
+                    del self.cancelled[expired]
+                self.cancelled[correlation_id] = now
+        if waiter is not None:
+            waiter.cancel()
+
+    def pending(self) -> int:
+        with self.lock:
+            return len(self.waiters)
+
+
+_listener: Optional[AuctionResultListener] = None
+_listener_lock = threading.Lock()
+
+
+def get_auction_result_listener() -> AuctionResultListener:
+    global _listener
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                _listener = AuctionResultListener()
+    return _listener
+
+
+class AuctionClient:
+    def __init__(self, api_url: str):
+        self.api_url = api_url.rstrip("/")
+        self.session = requests.Session()
+        self.listener = get_auction_result_listener()
+
+    def submit_bid_and_wait(self, bid_payload: Dict, timeout: float = 30, correlation_id: Optional[str] = None) -> Optional[Dict]:
+        correlation_id = str(correlation_id or bid_payload.get("correlation_id") or uuid.uuid4())
+        bid_payload = {**bid_payload, "correlation_id": correlation_id}
+
+        # Register before submitting so a fast result cannot arrive ahead of its waiter
+        waiter = self.listener.register(correlation_id)
         try:
-            logger.info("Submitting bid task to API...")
-            response = requests.post(
+            if waiter.cancelled():
+                logger.info(f"Bid task {correlation_id} was cancelled before submission")
+                return {"success": False, "message": "Auction cancelled"}
+
+            logger.info(f"Submitting bid task {correlation_id} to API...")
+            response = self.session.post(
                 f"{self.api_url}/bid-task/submit-task",
                 json=bid_payload,
                 timeout=10
@@ -35,44 +161,24 @@ class AuctionClient:
                 logger.error(f"API error: {response.text}")
                 return {"success": False, "message": "Bid task submission failed"}
 
-            logger.info("Bid task submitted. Waiting for evaluation result on NATS...")
-            thread = Thread(target=self._run_event_loop)
-            thread.start()
+            logger.info(f"Bid task {correlation_id} submitted. Waiting for evaluation result on NATS...")
+            result = waiter.result(timeout=timeout)
+            return {"success": True, "data": result}
 
-            if self._event.wait(timeout=timeout):
-                return {"success": True, "data": self.result}
-            else:
-                logger.warning("Timeout reached waiting for bid evaluation result")
-                return {"success": False, "message": "Timeout waiting for bid result"}
+        except FutureTimeoutError:
+            logger.warning(f"Timeout reached waiting for bid evaluation result {correlation_id}")
+            return {"success": False, "message": "Timeout waiting for bid result"}
 
-        finally:
-            if self.loop.is_running():
-                self.loop.call_soon_threadsafe(self.loop.stop)
+        except CancelledError:
+            logger.info(f"Wait for bid evaluation result {correlation_id} was cancelled")
+            return {"success": False, "message": "Auction cancelled"}
 
-    def _run_event_loop(self):
-        asyncio.set_event_loop(self.loop)
-        self.loop.run_until_complete(self._listen_for_result())
+        except requests.RequestException as e:
+            logger.error(f"Error submitting bid task: {e}")
+            return {"success": False, "message": "Bid task submission failed"}
 
-    async def _listen_for_result(self):
-        try:
-            await self.nc.connect(self.nats_url, loop=self.loop)
-
-            async def message_handler(msg):
-                try:
-                    data = msg.data.decode()
-                    logger.info(f"Received bid event: {data}")
-                    self.result = json.loads(data.replace("'", '"'))  # if JSON sent as str(dict)
-                    self._event.set()
-                    await self.nc.close()
-                except Exception as e:
-                    logger.error(f"Failed to parse bid event message: {e}")
-
-            await self.nc.subscribe(self.topic, cb=message_handler)
-            logger.info(f"Subscribed to NATS topic: {self.topic}")
-
-            while not self._event.is_set():
-                await asyncio.sleep(0.1)
+        finally:
+            self.listener.discard(correlation_id)
 
-        except Exception as e:
-            logger.error(f"Error during NATS listening: {e}")
-            self._event.set()
+    def cancel(self, correlation_id: str):
+        self.listener.cancel(correlation_id)
@@ -0,0 +1,63 @@
+import os
+import queue
+import logging
+import threading
+import requests
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class CandidatePoolInvalidationNotifier:
+    """Tells task assigners that cached candidate pools are stale after a role mapping change."""
+
+    def __init__(self, urls: Optional[List[str]] = None):
+        if urls is None:
+            raw_urls = os.getenv("CANDIDATE_POOL_INVALIDATION_URLS", "")
+            urls = [u.strip() for u in raw_urls.split(",") if u.strip()]
+        self.urls = urls
+        self.session = requests.Session()
+        self.pending: queue.Queue = queue.Queue()
+
+        if self.urls:
+            self.worker_thread = threading.Thread(target=self._run, daemon=True)
+            self.worker_thread.start()
+            logger.info(f"Candidate pool invalidation notifier started for {self.urls}")
+
+    def notify(self, job_space_id: Optional[str] = None):
+        if self.urls:
+            self.pending.put(job_space_id or None)
+
+    def _run(self):
+        while True:
+            job_space_ids = {self.pending.get()}
+            # Coalesce bursts of mapping changes into one call per job space
+            while True:
+                try:
+                    job_space_ids.add(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            if None in job_space_ids:
+                job_space_ids = {None}
+
+            for job_space_id in job_space_ids:
+                for url in self.urls:
+                    try:
+                        self.session.post(url, json={"job_space_id": job_space_id}, timeout=5)
+                    except requests.RequestException as e:
+                        logger.error(f"Failed to send candidate pool invalidation to {url}: {e}")
+
+
+_notifier: Optional[CandidatePoolInvalidationNotifier] = None
+_notifier_lock = threading.Lock()
+
+
+def notify_role_mapping_change(job_space_id: Optional[str] = None):
+    global _notifier
+    if _notifier is None:
+        with _notifier_lock:
+            if _notifier is None:
+                _notifier = CandidatePoolInvalidationNotifier()
+    _notifier.notify(job_space_id)
@@ -0,0 +1,58 @@
+import os
+import time
+import logging
+import threading
+import requests
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class SubjectMetricsClient:
+    """The metrics service only returns every subject at once, so the full map is cached
+    for SUBJECT_METRICS_CACHE_TTL seconds and lookups for a few subjects are served from it."""
+
+    def __init__(self):
+        self.base_url = os.getenv("SUBJECT_METRICS_DB_URL", "http://localhost:8891").rstrip('/')
+        self.session = requests.Session()
+        self.ttl = float(os.getenv("SUBJECT_METRICS_CACHE_TTL", "15"))
+        self.lock = threading.Lock()
+        self.cached: Optional[Dict[str, Dict[str, Any]]] = None
+        self.expires_at = 0.0
+
+    def get_subjects_metrics(self, subject_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            # Held across the fetch so concurrent callers share one request
+            if self.cached is None or time.monotonic() >= self.expires_at:
+                metrics = self.get_all_subjects_metrics()
+                if metrics:
+                    self.cached, self.expires_at = metrics, time.monotonic() + self.ttl
+            metrics = self.cached or {}
+        return {subject_id: metrics[subject_id] for subject_id in subject_ids if subject_id in metrics}
+
+    def get_all_subjects_metrics(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            response = self.session.get(f"{self.base_url}/subjects", timeout=10)
+            response.raise_for_status()
+            json_data = response.json()
+            if not json_data.get("success", False):
+                logger.warning(f"Subject metrics request failed: {json_data.get('error')}")
+                return {}
+            return {m["subject_id"]: m for m in json_data.get("data") or [] if "subject_id" in m}
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"Error while fetching subject metrics: {e}")
+            return {}
+
+
+_metrics_client: Optional[SubjectMetricsClient] = None
+_metrics_client_lock = threading.Lock()
+
+
+def get_subject_metrics_client() -> SubjectMetricsClient:
+    global _metrics_client
+    if _metrics_client is None:
+        with _metrics_client_lock:
+            if _metrics_client is None:
+                _metrics_client = SubjectMetricsClient()
+    return _metrics_client
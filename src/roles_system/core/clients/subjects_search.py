@@ -1,55 +1,177 @@
 import os
 import json
+import uuid
 import logging
 import asyncio
+import threading
 import websockets
-from threading import Thread, Event
-from typing import Dict, List, Optional
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
-class SubjectsSearch:
-    def __init__(self, search_filter: Dict, dsl_workflow_id: Dict):
-        self.search_filter = search_filter
-        self.dsl_workflow_id = dsl_workflow_id
-        self.ws_url = os.getenv("SUBJECTS_SEARCH_SERVER_WS_URL", "ws://localhost:9000")
-        self.loop = asyncio.new_event_loop()
-        self.result: Optional[List[str]] = None
-        self._event = Event()
+class SubjectsSearchClient:
+    """One persistent websocket per process, shared by concurrent searches.
 
-    def search(self, timeout: int = 30) -> List[str]:
-        thread = Thread(target=self._run_loop)
-        thread.start()
+    Requests carry a request_id; responses that echo it are routed to their caller,
+    responses without one are matched to the oldest outstanding request.
+    """
 
-        completed = self._event.wait(timeout=timeout)
-        if not completed:
-            logger.warning("Search timed out.")
-            return []
+    def __init__(self):
+        self.ws_url = os.getenv("SUBJECTS_SEARCH_SERVER_WS_URL", "ws://localhost:9000")
+        self.connect_timeout = float(os.getenv("SUBJECTS_SEARCH_CONNECT_TIMEOUT", "10"))
+        self.min_backoff = float(os.getenv("SUBJECTS_SEARCH_RECONNECT_MIN", "0.5"))
+        self.max_backoff = float(os.getenv("SUBJECTS_SEARCH_RECONNECT_MAX", "30"))
 
-        return self.result or []
+        self.pending: Dict[str, Future] = {}
+        self.sent_order: Deque[str] = deque()
+        self.lock = threading.Lock()
+        self.websocket = None
+
+        self.loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+        self._started.wait()
 
     def _run_loop(self):
         asyncio.set_event_loop(self.loop)
-        self.loop.run_until_complete(self._execute_ws_query())
+        self.connected = asyncio.Event()
+        self.loop.create_task(self._connection_loop())
+        self._started.set()
+        self.loop.run_forever()
+
+    async def _connection_loop(self):
+        backoff = self.min_backoff
+        while True:
+            was_connected = False
+            try:
+                async with websockets.connect(self.ws_url) as websocket:
+                    self.websocket = websocket
+                    self.connected.set()
+                    was_connected = True
+                    backoff = self.min_backoff
+                    logger.info(f"Connected to subjects search server at {self.ws_url}")
+                    async for message in websocket:
+                        self._deliver(message)
+            except Exception as e:
+                logger.error(f"Subjects search connection error: {e}")
+            finally:
+                self.websocket = None
+                self.connected.clear()
+                self._fail_in_flight("Subjects search connection lost")
+
+            # Back off only while connection attempts keep failing
+            if was_connected:
+                continue
+            logger.info(f"Reconnecting to subjects search server in {backoff:.1f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _deliver(self, message):
+        try:
+            data = json.loads(message)
+        except json.JSONDecodeError as e:
+            logger.error(f"Invalid subjects search response: {e}")
+            return
+
+        request_id = data.get("request_id") if isinstance(data, dict) else None
+        with self.lock:
+            if not request_id:
+                # Server does not echo ids; it answers in the order requests were sent.
+                # Timed-out requests stay queued so their late replies are dropped, not misrouted.
+                request_id = self.sent_order.popleft() if self.sent_order else None
+            else:
+                try:
+                    self.sent_order.remove(request_id)
+                except ValueError:
+                    pass
+            waiter = self.pending.pop(request_id, None) if request_id else None
+
+        if waiter is None:
+            logger.debug(f"No waiter for subjects search response {request_id}")
+            return
+        if not waiter.done():
+            waiter.set_result(data)
+
+    def _fail_in_flight(self, reason: str):
+        with self.lock:
+            in_flight = [self.pending.pop(rid) for rid in self.sent_order if rid in self.pending]
+            self.sent_order.clear()
+        for waiter in in_flight:
+            if not waiter.done():
+                waiter.set_exception(ConnectionError(reason))
+
+    async def _send(self, request_id: str, payload: Dict[str, Any]):
+        try:
+            await asyncio.wait_for(self.connected.wait(), timeout=self.connect_timeout)
+            with self.lock:
+                if request_id not in self.pending:
+                    return
+                self.sent_order.append(request_id)
+            await self.websocket.send(json.dumps(payload))
+        except Exception as e:
+            with self.lock:
+                waiter = self.pending.pop(request_id, None)
+            if waiter is not None and not waiter.done():
+                waiter.set_exception(e)
+
+    def submit(self, search_filter: Dict, dsl_workflow_id: Any) -> Tuple[str, Future]:
+        request_id = str(uuid.uuid4())
+        waiter = Future()
+        with self.lock:
+            self.pending[request_id] = waiter
 
-    async def _execute_ws_query(self):
+        payload = {
+            "request_id": request_id,
+            "search_filter": search_filter,
+            "dsl_workflow_id": dsl_workflow_id,
+        }
+        asyncio.run_coroutine_threadsafe(self._send(request_id, payload), self.loop)
+        logger.info(f"Sent search request {request_id}")
+        return request_id, waiter
+
+    def search(self, search_filter: Dict, dsl_workflow_id: Any, timeout: float = 30) -> List[str]:
+        request_id, waiter = self.submit(search_filter, dsl_workflow_id)
         try:
-            async with websockets.connect(self.ws_url) as websocket:
-                request_payload = {
-                    "search_filter": self.search_filter,
-                    "dsl_workflow_id": self.dsl_workflow_id,
-                }
-                await websocket.send(json.dumps(request_payload))
-                logger.info(f"Sent search request: {request_payload}")
-
-                response = await websocket.recv()
-                logger.info(f"Received response: {response}")
-
-                data = json.loads(response)
-                self.result = data.get("subjects", [])
-                self._event.set()
+            data = waiter.result(timeout=timeout)
+            return data.get("subjects", []) if isinstance(data, dict) else []
+        except FutureTimeoutError:
+            logger.warning(f"Search {request_id} timed out.")
+            return []
         except Exception as e:
-            logger.error(f"WebSocket error: {e}")
-            self._event.set()
+            logger.error(f"Search {request_id} failed: {e}")
+            return []
+        finally:
+            with self.lock:
+                self.pending.pop(request_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"connected": self.websocket is not None, "pending": len(self.pending)}
+
+
+_client: Optional[SubjectsSearchClient] = None
+_client_lock = threading.Lock()
+
+
+def get_subjects_search_client() -> SubjectsSearchClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = SubjectsSearchClient()
+    return _client
+
+
+class SubjectsSearch:
+    def __init__(self, search_filter: Dict, dsl_workflow_id: Dict):
+        self.search_filter = search_filter
+        self.dsl_workflow_id = dsl_workflow_id
+        self.client = get_subjects_search_client()
+
+    def search(self, timeout: int = 30) -> List[str]:
+        return self.client.search(self.search_filter, self.dsl_workflow_id, timeout=timeout)
@@ -1,6 +1,9 @@
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import uuid
+import time
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from dataclasses import asdict, dataclass, field
 import logging
 
@@ -22,7 +25,7 @@ class TaskResult:
     def from_dict(cls, data: dict):
         return cls(
             social_task_id=data["social_task_id"],
-            social_task_data=data["social_task_dat"],
+            social_task_data=data.get("social_task_data", data.get("social_task_dat", {})),
             voting_result=data["voting_result"]
         )
 
@@ -213,44 +216,146 @@ class RestClient:
             return f"An unexpected error occurred: {str(e)}"
 
 
-class TaskResultWaiter:
-    def __init__(self, nats_host: str, subject_id: str, task_id: str = ""):
-        self.nats_host = nats_host or os.getenv(
-            "NATS_HOST", "nats://localhost:4222")
-        self.nc = NATS()
-        self.result = None
-        self.topic = subject_id + "__" + task_id
+class TaskResultListener:
+    """Shares one NATS connection across all pending social task waits.
 
-    def get(self) -> TaskResult:
+    Each awaited topic gets its own subscription and Future; both are removed once
+    the result arrives or the task's deadline passes.
+    """
 
+    def __init__(self, nats_host: str):
+        self.nats_host = nats_host
+        self.nc = NATS()
+        self.waiters: Dict[str, Future] = {}
+        self.deadlines: Dict[str, float] = {}
+        self.subscriptions: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+
+        self.loop = asyncio.new_event_loop()
+        self._connected = threading.Event()
+        self.thread = threading.Thread(target=self._run_event_loop, daemon=True)
+        self.thread.start()
+
+    def _run_event_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.create_task(self._connect())
+        self.loop.run_forever()
+
+    async def _connect(self):
         try:
-            asyncio.run(self._async_get(self.topic))
-            if self.result:
-                return TaskResult.from_dict(self.result)
-            else:
-                raise TimeoutError(
-                    "No result received within the timeout period.")
+            await self.nc.connect(servers=[self.nats_host], max_reconnect_attempts=-1)
+            logging.info(f"TaskResultListener connected to {self.nats_host}")
         except Exception as e:
-            logging.error(f"Error in TaskResultWaiter get method: {e}")
-            raise
+            logging.error(f"TaskResultListener failed to connect: {e}")
+        finally:
+            self._connected.set()
+
+    async def _message_handler(self, msg):
+        topic = msg.subject
+        with self.lock:
+            waiter = self.waiters.pop(topic, None)
+            self.deadlines.pop(topic, None)
+        await self._unsubscribe(topic)
+        if waiter is None or waiter.done():
+            return
+        try:
+            waiter.set_result(json.loads(msg.data.decode('utf-8')))
+        except Exception as e:
+            waiter.set_exception(e)
 
-    async def _async_get(self, topic: str):
+    async def _subscribe(self, topic: str, timeout: float):
+        if topic not in self.subscriptions:
+            self.subscriptions[topic] = await self.nc.subscribe(topic, cb=self._message_handler)
+            await self.nc.flush()
+        self.loop.call_later(timeout, self._expire, topic)
+
+    async def _unsubscribe(self, topic: str):
+        subscription = self.subscriptions.pop(topic, None)
+        if subscription is not None:
+            try:
+                await subscription.unsubscribe()
+            except Exception as e:
+                logging.error(f"Failed to unsubscribe from {topic}: {e}")
+
+    def _expire(self, topic: str):
+        with self.lock:
+            waiter = self.waiters.get(topic)
+            if waiter is None or waiter.done() or time.monotonic() < self.deadlines.get(topic, 0):
+                return
+            del self.waiters[topic]
+            self.deadlines.pop(topic, None)
+        waiter.set_exception(TimeoutError(f"No result received for {topic} before the deadline."))
+        self.loop.create_task(self._unsubscribe(topic))
+
+    def wait_for(self, topic: str, timeout: float) -> Future:
+        """Subscribes to topic and returns a Future for its first message; waits on a topic are shared."""
+        self._connected.wait(timeout=10)
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            waiter = self.waiters.get(topic)
+            if waiter is None:
+                waiter = Future()
+                self.waiters[topic] = waiter
+            # A later caller with a longer deadline extends the shared wait
+            self.deadlines[topic] = max(self.deadlines.get(topic, 0), deadline)
+
+        # Block until the subscription is live so a result published right after cannot be missed
         try:
-            if not self.nc.is_connected:
-                await self.nc.connect(servers=[self.nats_host])
+            asyncio.run_coroutine_threadsafe(self._subscribe(topic, timeout), self.loop).result(timeout=10)
+        except Exception as e:
+            with self.lock:
+                self.waiters.pop(topic, None)
+                self.deadlines.pop(topic, None)
+            if not waiter.done():
+                waiter.set_exception(e)
+            raise
+        return waiter
 
-            async def message_handler(msg):
-                self.result = json.loads(msg.data.decode('utf-8'))
-                await self.nc.drain()  # Close the connection after receiving the message
+    def pending(self) -> int:
+        with self.lock:
+            return len(self.waiters)
 
-            await self.nc.subscribe(topic, cb=message_handler)
-            await self.nc.flush()
 
-            while self.result is None:
-                await asyncio.sleep(0.1)
+_listeners: Dict[str, TaskResultListener] = {}
+_listeners_lock = threading.Lock()
 
+
+def get_task_result_listener(nats_host: str) -> TaskResultListener:
+    with _listeners_lock:
+        if nats_host not in _listeners:
+            _listeners[nats_host] = TaskResultListener(nats_host)
+        return _listeners[nats_host]
+
+
+def deadline_timeout(deadline_time: Optional[int]) -> float:
+    """Seconds left until a SocialTask deadline (epoch seconds or milliseconds) plus a grace period."""
+    if not deadline_time:
+        return float(os.getenv("VOTING_RESULT_DEFAULT_TIMEOUT", "3600"))
+    deadline = deadline_time / 1000 if deadline_time > 1e12 else deadline_time
+    grace = float(os.getenv("VOTING_RESULT_GRACE_SECONDS", "30"))
+    return max(0.0, deadline - time.time()) + grace
+
+
+class TaskResultWaiter:
+    def __init__(self, nats_host: str, subject_id: str, task_id: str = "", deadline_time: Optional[int] = None):
+        self.nats_host = nats_host or os.getenv(
+            "NATS_HOST", "nats://localhost:4222")
+        self.listener = get_task_result_listener(self.nats_host)
+        self.topic = subject_id + "__" + task_id
+        self.timeout = deadline_timeout(deadline_time)
+        # Subscribe up front so the result cannot arrive before anyone is listening
+        self.waiter = self.listener.wait_for(self.topic, self.timeout)
+
+    def get(self) -> TaskResult:
+
+        try:
+            result = self.waiter.result(timeout=self.timeout + 1)
+            return TaskResult.from_dict(result)
+        except FutureTimeoutError:
+            raise TimeoutError(
+                "No result received within the timeout period.")
         except Exception as e:
-            logging.error(f"Error in TaskResultWaiter _async_get method: {e}")
+            logging.error(f"Error in TaskResultWaiter get method: {e}")
             raise
 
 
@@ -283,8 +388,8 @@ class SocialTaskService:
             raise ValueError(
                 "Failed to create social task. API response was invalid or empty.")
 
-    def create_waiter_for_task(self, task_id):
+    def create_waiter_for_task(self, task_id, deadline_time: Optional[int] = None):
         return TaskResultWaiter(
             nats_host=os.getenv("NATS_URL"), subject_id=os.getenv("SUBJECT_ID"),
-            task_id=task_id
+            task_id=task_id, deadline_time=deadline_time
         )
@@ -1,7 +1,9 @@
 import os
+import json
+import base64
 import logging
-from typing import Tuple, Union, List, Dict
-from pymongo import MongoClient, errors
+from typing import Any, Iterator, Tuple, Union, List, Dict, Optional
+from pymongo import MongoClient, ReturnDocument, UpdateOne, errors
 import logging
 
 from .schema import (
@@ -11,10 +13,84 @@ from .schema import (
     GroupConstraintsMapping,
     RoleApplication
 )
+from ..clients.pool_invalidation import notify_role_mapping_change
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Capacity expressions over role type documents: single-subject roles hold one subject,
+# multi-subject roles hold max_positions (0 = unlimited). Documents written before the
+# counters existed count as full when position_filled is set.
+POSITION_CAPACITY = {"$cond": [
+    {"$eq": ["$role_assignment_type", "dynamic_single_subject"]}, 1, {"$ifNull": ["$max_positions", 0]}]}
+FILLED_POSITIONS = {"$ifNull": ["$filled_positions", {"$cond": [{"$eq": ["$position_filled", True]}, 1, 0]}]}
+
+QUERY_PAGE_LIMIT_DEFAULT = int(os.getenv("QUERY_PAGE_LIMIT_DEFAULT", "500"))
+QUERY_PAGE_LIMIT_MAX = int(os.getenv("QUERY_PAGE_LIMIT_MAX", "5000"))
+QUERY_STREAM_BATCH_SIZE = int(os.getenv("QUERY_STREAM_BATCH_SIZE", "1000"))
+
+
+_indexed = set()
+
+
+def ensure_index(collection, key: str):
+    # Paging and exports walk the sort key; create its index once per process
+    if (collection.name, key) in _indexed:
+        return
+    try:
+        collection.create_index(key)
+        _indexed.add((collection.name, key))
+    except errors.PyMongoError as e:
+        logger.warning(f"Could not create index on {collection.name}.{key}: {e}")
+
+
+def encode_cursor(value: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+def decode_cursor(token: str) -> Any:
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+
+
+def _projection(sort_key: str, fields: Optional[List[str]]) -> Dict[str, int]:
+    projection = {"_id": 0}
+    if fields:
+        projection.update({f: 1 for f in fields})
+        # The sort key is needed to build the next cursor
+        projection[sort_key] = 1
+    return projection
+
+
+def query_page(collection, query_filter: Dict, sort_key: str, cursor: Optional[str] = None,
+               limit: Optional[int] = None, fields: Optional[List[str]] = None) -> Tuple[List[Dict], Optional[str]]:
+    """Returns one page ordered by the unique sort_key and the cursor of the next page, if any."""
+    limit = min(max(1, limit or QUERY_PAGE_LIMIT_DEFAULT), QUERY_PAGE_LIMIT_MAX)
+    if cursor:
+        query_filter = {"$and": [query_filter, {sort_key: {"$gt": decode_cursor(cursor)}}]}
+
+    docs = list(
+        collection.find(query_filter, _projection(sort_key, fields)).sort(sort_key, 1).limit(limit + 1))
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1][sort_key])
+    return docs, next_cursor
+
+
+def stream_query(collection, query_filter: Dict, sort_key: str,
+                 fields: Optional[List[str]] = None) -> Iterator[Dict]:
+    """Yields every matching document in sort_key order, holding one batch in memory at a time."""
+    cursor = collection.find(query_filter, _projection(sort_key, fields)) \
+        .sort(sort_key, 1).batch_size(QUERY_STREAM_BATCH_SIZE)
+    try:
+        for doc in cursor:
+            yield doc
+    finally:
+        cursor.close()
+
 
 class SubjectRolesMappingDatabase:
     def __init__(self):
@@ -23,6 +99,7 @@ class SubjectRolesMappingDatabase:
             self.client = MongoClient(uri)
             self.db = self.client["orgs"]
             self.collection = self.db["subject_roles_mapping"]
+            ensure_index(self.collection, "subject_id")
             logger.info("MongoDB connection established for SubjectRolesMappingDatabase")
         except errors.ConnectionFailure as e:
             logger.error(f"Mongo connection failed: {e}")
@@ -31,6 +108,7 @@ class SubjectRolesMappingDatabase:
     def insert(self, obj: SubjectRolesMapping) -> Tuple[bool, Union[str, None]]:
         try:
             result = self.collection.insert_one(obj.to_dict())
+            notify_role_mapping_change(obj.job_space_id)
             return True, str(result.inserted_id)
         except errors.PyMongoError as e:
             logger.error(f"Insertion error: {e}")
@@ -43,6 +121,7 @@ class SubjectRolesMappingDatabase:
                 {"$set": update_fields},
                 upsert=True
             )
+            notify_role_mapping_change(update_fields.get("job_space_id"))
             return (True, result.modified_count) if result.modified_count else (False, "No document found to update")
         except errors.PyMongoError as e:
             return False, str(e)
@@ -50,6 +129,8 @@ class SubjectRolesMappingDatabase:
     def delete(self, subject_id: str) -> Tuple[bool, Union[int, str]]:
         try:
             result = self.collection.delete_one({"subject_id": subject_id})
+            if result.deleted_count:
+                notify_role_mapping_change()
             return (True, result.deleted_count) if result.deleted_count else (False, "No document found to delete")
         except errors.PyMongoError as e:
             return False, str(e)
@@ -63,6 +144,17 @@ class SubjectRolesMappingDatabase:
         except errors.PyMongoError as e:
             return False, str(e)
 
+    def query_page(self, query_filter: Dict, cursor: Optional[str] = None, limit: Optional[int] = None,
+                   fields: Optional[List[str]] = None) -> Tuple[bool, Union[Tuple[List[Dict], Optional[str]], str]]:
+        try:
+            return True, query_page(self.collection, query_filter, "subject_id", cursor, limit, fields)
+        except (errors.PyMongoError, ValueError) as e:
+            logger.error(f"Error paging SubjectRolesMapping: {e}")
+            return False, str(e)
+
+    def stream(self, query_filter: Dict, fields: Optional[List[str]] = None) -> Iterator[Dict]:
+        return stream_query(self.collection, query_filter, "subject_id", fields)
+
     def get_by_subject_id(self, subject_id: str) -> Tuple[bool, Union[SubjectRolesMapping, str]]:
         try:
             doc = self.collection.find_one({"subject_id": subject_id})
@@ -80,11 +172,13 @@ class RoleGroupMappingDatabase:
         self.client = MongoClient(uri)
         self.db = self.client["orgs"]
         self.collection = self.db["role_group_mapping"]
+        ensure_index(self.collection, "role_id")
         logger.info("MongoDB connected for RoleGroupMappingDatabase")
 
     def insert(self, obj: RoleGroupMapping) -> Tuple[bool, Union[str, None]]:
         try:
             result = self.collection.insert_one(obj.to_dict())
+            notify_role_mapping_change(obj.job_space_id)
             return True, str(result.inserted_id)
         except errors.PyMongoError as e:
             return False, str(e)
@@ -92,6 +186,7 @@ class RoleGroupMappingDatabase:
     def update(self, role_id: str, update_fields: Dict) -> Tuple[bool, Union[int, str]]:
         try:
             result = self.collection.update_one({"role_id": role_id}, {"$set": update_fields}, upsert=True)
+            notify_role_mapping_change(update_fields.get("job_space_id"))
             return (True, result.modified_count) if result.modified_count else (False, "No document found to update")
         except errors.PyMongoError as e:
             return False, str(e)
@@ -99,6 +194,8 @@ class RoleGroupMappingDatabase:
     def delete(self, role_id: str) -> Tuple[bool, Union[int, str]]:
         try:
             result = self.collection.delete_one({"role_id": role_id})
+            if result.deleted_count:
+                notify_role_mapping_change()
             return (True, result.deleted_count) if result.deleted_count else (False, "No document found to delete")
         except errors.PyMongoError as e:
             return False, str(e)
@@ -112,6 +209,17 @@ class RoleGroupMappingDatabase:
         except errors.PyMongoError as e:
             return False, str(e)
 
+    def query_page(self, query_filter: Dict, cursor: Optional[str] = None, limit: Optional[int] = None,
+                   fields: Optional[List[str]] = None) -> Tuple[bool, Union[Tuple[List[Dict], Optional[str]], str]]:
+        try:
+            return True, query_page(self.collection, query_filter, "role_id", cursor, limit, fields)
+        except (errors.PyMongoError, ValueError) as e:
+            logger.error(f"Error paging RoleGroupMapping: {e}")
+            return False, str(e)
+
+    def stream(self, query_filter: Dict, fields: Optional[List[str]] = None) -> Iterator[Dict]:
+        return stream_query(self.collection, query_filter, "role_id", fields)
+
     def get_by_role_id(self, role_id: str) -> Tuple[bool, Union[RoleGroupMapping, str]]:
         try:
             doc = self.collection.find_one({"role_id": role_id})
@@ -161,6 +269,88 @@ class RoleTypeAssignmentMappingDatabase:
         except errors.PyMongoError as e:
             return False, str(e)
 
+    def claim_position(self, role_type: str) -> bool:
+        return self.claim_positions(role_type, 1) == 1
+
+    def claim_positions(self, role_type: str, count: int) -> int:
+        """Claims up to count positions in one update; returns how many were granted."""
+        if count <= 0:
+            return 0
+        try:
+            # Only matches while a position is open, and never lowers the counter, even when
+            # it is above a capacity that has since been reduced
+            before = self.collection.find_one_and_update(
+                {"role_type": role_type, "$expr": {"$or": [
+                    {"$lte": [POSITION_CAPACITY, 0]},
+                    {"$lt": [FILLED_POSITIONS, POSITION_CAPACITY]}
+                ]}},
+                [
+                    {"$set": {"filled_positions": {"$cond": [
+                        {"$gt": [POSITION_CAPACITY, 0]},
+                        {"$max": [FILLED_POSITIONS,
+                                  {"$min": [POSITION_CAPACITY, {"$add": [FILLED_POSITIONS, count]}]}]},
+                        {"$add": [FILLED_POSITIONS, count]}
+                    ]}}},
+                    {"$set": {"position_filled": {"$and": [
+                        {"$gt": [POSITION_CAPACITY, 0]},
+                        {"$gte": ["$filled_positions", POSITION_CAPACITY]}
+                    ]}}}
+                ],
+                return_document=ReturnDocument.BEFORE
+            )
+            if before is None:
+                return 0
+            role_type_data = RoleTypeAssignmentMapping.from_dict(before)
+            capacity = role_type_data.capacity()
+            if capacity == 0:
+                return count
+            return max(0, min(count, capacity - role_type_data.filled_positions))
+        except errors.PyMongoError as e:
+            logger.error(f"Failed to claim {count} positions for role type {role_type}: {e}")
+            return 0
+
+    def release_position(self, role_type: str) -> bool:
+        return self.release_positions([role_type])
+
+    def release_positions(self, role_types: List[str]) -> bool:
+        """Releases one position per entry; a role type listed n times releases n positions."""
+        if not role_types:
+            return True
+        counts: Dict[str, int] = {}
+        for role_type in role_types:
+            counts[role_type] = counts.get(role_type, 0) + 1
+        try:
+            self.collection.bulk_write([
+                UpdateOne({"role_type": role_type}, [
+                    {"$set": {"filled_positions": {"$max": [0, {"$subtract": [FILLED_POSITIONS, count]}]}}},
+                    {"$set": {"position_filled": False}}
+                ])
+                for role_type, count in counts.items()
+            ], ordered=False)
+            return True
+        except errors.PyMongoError as e:
+            logger.error(f"Failed to release positions for role types {role_types}: {e}")
+            return False
+
+    def get_occupancy(self, role_type: str) -> Tuple[bool, Union[Dict, str]]:
+        try:
+            doc = self.collection.find_one(
+                {"role_type": role_type},
+                {"_id": 0, "role_type": 1, "role_assignment_type": 1, "max_positions": 1,
+                 "filled_positions": 1, "position_filled": 1})
+            if not doc:
+                return False, "No document found"
+            role_type_data = RoleTypeAssignmentMapping.from_dict(doc)
+            capacity = role_type_data.capacity()
+            return True, {
+                "role_type": role_type,
+                "capacity": capacity,
+                "filled_positions": role_type_data.filled_positions,
+                "available_positions": None if capacity == 0 else max(0, capacity - role_type_data.filled_positions)
+            }
+        except errors.PyMongoError as e:
+            return False, str(e)
+
     def get_by_role_type(self, role_type: str) -> Tuple[bool, Union[RoleTypeAssignmentMapping, str]]:
         try:
             doc = self.collection.find_one({"role_type": role_type})
@@ -220,6 +410,128 @@ class GroupConstraintsMappingDatabase:
             return False, str(e)
 
 
+class RoleAssignmentWriter:
+    """Writes the subject-role and role-group mappings of a new assignment together."""
+
+    def __init__(self):
+        uri = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+        self.client = MongoClient(uri)
+        self.db = self.client["orgs"]
+        self.subject_roles = self.db["subject_roles_mapping"]
+        self.role_groups = self.db["role_group_mapping"]
+        # Multi-document transactions need a replica set or sharded cluster
+        self.use_transactions = os.getenv("MONGO_TRANSACTIONS", "false").lower() == "true"
+        logger.info("MongoDB connected for RoleAssignmentWriter")
+
+    def _write(self, subject_id: str, role_group: RoleGroupMapping, subject_type: str, session=None):
+        self.subject_roles.update_one(
+            {"subject_id": subject_id},
+            {
+                "$addToSet": {"role_ids": role_group.role_id},
+                "$setOnInsert": {"subject_type": subject_type, "job_space_id": role_group.job_space_id}
+            },
+            upsert=True,
+            session=session
+        )
+        self.role_groups.update_one(
+            {"role_id": role_group.role_id},
+            {"$setOnInsert": role_group.to_dict()},
+            upsert=True,
+            session=session
+        )
+
+    def assign(self, subject_id: str, role_group: RoleGroupMapping, subject_type: str = "") -> Tuple[bool, Optional[str]]:
+        try:
+            if self.use_transactions:
+                with self.client.start_session() as session:
+                    session.with_transaction(
+                        lambda s: self._write(subject_id, role_group, subject_type, session=s))
+            else:
+                self._write(subject_id, role_group, subject_type)
+            notify_role_mapping_change(role_group.job_space_id)
+            return True, None
+        except errors.PyMongoError as e:
+            logger.error(f"Failed to write role assignment for subject {subject_id}: {e}")
+            return False, str(e)
+
+    def _write_many(self, assignments: List[Tuple[str, RoleGroupMapping, str]], session=None):
+        subject_role_ids: Dict[str, List[str]] = {}
+        subject_defaults: Dict[str, Dict] = {}
+        role_ops = []
+        for subject_id, role_group, subject_type in assignments:
+            subject_role_ids.setdefault(subject_id, []).append(role_group.role_id)
+            subject_defaults.setdefault(
+                subject_id, {"subject_type": subject_type, "job_space_id": role_group.job_space_id})
+            role_ops.append(UpdateOne(
+                {"role_id": role_group.role_id}, {"$setOnInsert": role_group.to_dict()}, upsert=True))
+
+        subject_ops = [
+            UpdateOne(
+                {"subject_id": subject_id},
+                {
+                    "$addToSet": {"role_ids": {"$each": role_ids}},
+                    "$setOnInsert": subject_defaults[subject_id]
+                },
+                upsert=True
+            )
+            for subject_id, role_ids in subject_role_ids.items()
+        ]
+        self.subject_roles.bulk_write(subject_ops, ordered=False, session=session)
+        self.role_groups.bulk_write(role_ops, ordered=False, session=session)
+
+    def assign_many(self, assignments: List[Tuple[str, RoleGroupMapping, str]]) -> Tuple[bool, Optional[str]]:
+        """Records (subject_id, role_group, subject_type) assignments with one bulk write per collection."""
+        if not assignments:
+            return True, None
+        try:
+            if self.use_transactions:
+                with self.client.start_session() as session:
+                    session.with_transaction(lambda s: self._write_many(assignments, session=s))
+            else:
+                self._write_many(assignments)
+            for job_space_id in {role_group.job_space_id for _, role_group, _ in assignments}:
+                notify_role_mapping_change(job_space_id)
+            return True, None
+        except errors.PyMongoError as e:
+            logger.error(f"Failed to write {len(assignments)} role assignments: {e}")
+            return False, str(e)
+
+    def _remove_many(self, removals: List[Tuple[str, str]], session=None):
+        subject_role_ids: Dict[str, List[str]] = {}
+        for role_id, subject_id in removals:
+            # An empty subject_id removes a role entry that no subject holds
+            if subject_id:
+                subject_role_ids.setdefault(subject_id, []).append(role_id)
+
+        self.role_groups.delete_many(
+            {"role_id": {"$in": [role_id for role_id, _ in removals]}}, session=session)
+        if not subject_role_ids:
+            return
+        self.subject_roles.bulk_write([
+            UpdateOne({"subject_id": subject_id}, {"$pull": {"role_ids": {"$in": role_ids}}})
+            for subject_id, role_ids in subject_role_ids.items()
+        ], ordered=False, session=session)
+        # Subjects left without any role are dropped, as single removals do
+        self.subject_roles.delete_many(
+            {"subject_id": {"$in": list(subject_role_ids)}, "role_ids": {"$size": 0}}, session=session)
+
+    def remove_many(self, removals: List[Tuple[str, str]]) -> Tuple[bool, Optional[str]]:
+        """Removes (role_id, subject_id) pairs from both mappings with bulk writes."""
+        if not removals:
+            return True, None
+        try:
+            if self.use_transactions:
+                with self.client.start_session() as session:
+                    session.with_transaction(lambda s: self._remove_many(removals, session=s))
+            else:
+                self._remove_many(removals)
+            notify_role_mapping_change()
+            return True, None
+        except errors.PyMongoError as e:
+            logger.error(f"Failed to remove {len(removals)} role assignments: {e}")
+            return False, str(e)
+
+
 class RoleApplicationDatabase:
     def __init__(self):
         try:
@@ -227,6 +539,7 @@ class RoleApplicationDatabase:
             self.client = MongoClient(uri)
             self.db = self.client["orgs"]
             self.collection = self.db["role_applications"]
+            ensure_index(self.collection, "role_application_id")
             logger.info("MongoDB connection established for RoleApplicationDatabase")
         except errors.ConnectionFailure as e:
             logger.error(f"Could not connect to MongoDB: {e}")
@@ -283,6 +596,17 @@ class RoleApplicationDatabase:
             logger.error(f"Error querying RoleApplication: {e}")
             return False, str(e)
 
+    def query_page(self, query_filter: Dict, cursor: Optional[str] = None, limit: Optional[int] = None,
+                   fields: Optional[List[str]] = None) -> Tuple[bool, Union[Tuple[List[Dict], Optional[str]], str]]:
+        try:
+            return True, query_page(self.collection, query_filter, "role_application_id", cursor, limit, fields)
+        except (errors.PyMongoError, ValueError) as e:
+            logger.error(f"Error paging RoleApplications: {e}")
+            return False, str(e)
+
+    def stream(self, query_filter: Dict, fields: Optional[List[str]] = None) -> Iterator[Dict]:
+        return stream_query(self.collection, query_filter, "role_application_id", fields)
+
     def get_by_id(self, role_application_id: str) -> Tuple[bool, Union[RoleApplication, str]]:
         try:
             doc = self.collection.find_one({"role_application_id": role_application_id})
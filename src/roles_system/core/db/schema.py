@@ -1,6 +1,13 @@
 from dataclasses import dataclass, field
 from typing import List, Dict, Any
 
+def as_int(value: Any, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
 @dataclass
 class SubjectRolesMapping:
     subject_id: str = ''
@@ -59,6 +66,9 @@ class RoleTypeAssignmentMapping:
     role_post_addition_dsl_workflow_id: str = ''
     position_filled: bool = False
     job_space_id: str = ''
+    selection_policy: Dict[str, Any] = field(default_factory=dict)
+    max_positions: int = 0  # Multi-subject capacity; 0 means unlimited
+    filled_positions: int = 0
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "RoleTypeAssignmentMapping":
@@ -68,7 +78,10 @@ class RoleTypeAssignmentMapping:
             role_post_removal_dsl_workflow_id=data.get("role_post_removal_dsl_workflow_id", ""),
             role_post_addition_dsl_workflow_id=data.get("role_post_addition_dsl_workflow_id", ""),
             position_filled=data.get("position_filled", False),
-            job_space_id=data.get("job_space_id", "")
+            job_space_id=data.get("job_space_id", ""),
+            selection_policy=data.get("selection_policy", {}),
+            max_positions=as_int(data.get("max_positions", 0)),
+            filled_positions=as_int(data.get("filled_positions", 1 if data.get("position_filled") else 0))
         )
 
     def to_dict(self) -> Dict[str, Any]:
@@ -78,9 +91,22 @@ class RoleTypeAssignmentMapping:
             "role_post_removal_dsl_workflow_id": self.role_post_removal_dsl_workflow_id,
             "role_post_addition_dsl_workflow_id": self.role_post_addition_dsl_workflow_id,
             "position_filled": self.position_filled,
-            "job_space_id": self.job_space_id
+            "job_space_id": self.job_space_id,
+            "selection_policy": self.selection_policy,
+            "max_positions": self.max_positions,
+            "filled_positions": self.filled_positions
         }
 
+    def capacity(self) -> int:
+        """Number of subjects the role type can hold; 0 means unlimited."""
+        if self.role_assignment_type == "dynamic_single_subject":
+            return 1
+        return max(0, self.max_positions or 0)
+
+    def has_open_position(self) -> bool:
+        capacity = self.capacity()
+        return capacity == 0 or self.filled_positions < capacity
+
 @dataclass
 class GroupConstraintsMapping:
     group_id: str = ''
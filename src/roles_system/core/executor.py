@@ -1,5 +1,8 @@
+import os
+import time
+import zlib
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 import queue
 import threading
@@ -9,6 +12,7 @@ from .direct import DirectSubjectAssignmentHandler
 from .search import CriteriaBasedSubjectAssignmentHandler
 from .auction import AuctionBasedSubjectAssignmentHandler
 from .removal import RoleRemovalHandler
+from .bulk import get_bulk_handler
 from .db.crud import RoleApplicationDatabase
 from .db.schema import RoleApplication
 
@@ -74,6 +78,29 @@ def execute_roles_action(payload: Dict[str, Any]) -> Dict[str, Any]:
                 subject_id=payload["subject_id"]
             )
 
+        elif action == "assign_direct_bulk":
+            items = payload.get("items")
+            if not isinstance(items, list) or not items:
+                return {"success": False, "message": f"Missing required fields for {action}"}
+
+            return get_bulk_handler().assign_direct_bulk(
+                items=items,
+                role_application_id=payload.get("role_application_id", "")
+            )
+
+        elif action == "remove_bulk":
+            items = payload.get("items")
+            if not isinstance(items, list) or not items:
+                return {"success": False, "message": f"Missing required fields for {action}"}
+
+            return get_bulk_handler().remove_bulk(items=items)
+
+        elif action == "remove_all_for_job_space":
+            if not payload.get("job_space_id"):
+                return {"success": False, "message": f"Missing required fields for {action}"}
+
+            return get_bulk_handler().remove_all_for_job_space(job_space_id=payload["job_space_id"])
+
         else:
             return {"success": False, "message": f"Unknown action: {action}"}
 
@@ -83,24 +110,48 @@ def execute_roles_action(payload: Dict[str, Any]) -> Dict[str, Any]:
 
 
 
-class RolesExecutor:
-    def __init__(self):
+BULK_ACTIONS = ("assign_direct_bulk", "remove_bulk", "remove_all_for_job_space")
+
+
+def partition_key(payload: Dict[str, Any]) -> str:
+    # Operations on the same role type must stay ordered so position_filled checks hold
+    if payload.get("action") == "remove":
+        return str(payload.get("role_id", ""))
+    if payload.get("action") == "remove_all_for_job_space":
+        return "bulk:" + str(payload.get("job_space_id", ""))
+    if payload.get("action") in BULK_ACTIONS:
+        # A bulk request over one role type (or one role) shares the partition of the matching
+        # single operations. Mixed batches get their own key; their capacity is still
+        # enforced by the atomic position claims.
+        items = [item for item in payload.get("items") or [] if isinstance(item, dict)]
+        if payload.get("action") == "remove_bulk":
+            keys = {str(item.get("role_id", "")) for item in items}
+        else:
+            keys = {str((item.get("application_data") or {}).get("role_type", "")) for item in items}
+        return keys.pop() if len(keys) == 1 else "bulk:" + ",".join(sorted(keys))
+    application_data = payload.get("application_data") or {}
+    return str(application_data.get("role_type", ""))
+
+
+class RolesExecutorPartition:
+    def __init__(self, index: int, db: RoleApplicationDatabase):
+        self.index = index
+        self.db = db
         self.task_queue = queue.Queue()
-        self.db = RoleApplicationDatabase()
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
 
         self.worker_thread = threading.Thread(target=self.run, daemon=True)
         self.worker_thread.start()
-        logger.info("RolesExecutor started")
-
-    def submit_task(self, role_application_id: str, input_payload: Dict[str, Any]):
-        self.task_queue.put((role_application_id, input_payload))
-        logger.info(f"Task submitted to executor with ID: {role_application_id}")
 
     def run(self):
         while True:
             try:
                 role_application_id, input_payload = self.task_queue.get()
-                logger.info(f"Processing task: {role_application_id}")
+                logger.info(f"Processing task: {role_application_id} on partition {self.index}")
+                started = time.perf_counter()
 
                 # Step 1: Insert new role application with pending status
                 role_application = RoleApplication(
@@ -123,5 +174,40 @@ class RolesExecutor:
                 })
                 logger.info(f"Task {role_application_id} processed with status: {status}")
 
+                self._record(time.perf_counter() - started)
+
             except Exception as e:
-                logger.error(f"Error processing task: {e}", exc_info=True)
\ No newline at end of file
+                logger.error(f"Error processing task: {e}", exc_info=True)
+
+    def _record(self, latency: float):
+        with self.lock:
+            self.processed += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "partition": self.index,
+                "queue_depth": self.task_queue.qsize(),
+                "processed": self.processed,
+                "avg_latency_ms": (self.total_latency / self.processed * 1000) if self.processed else 0.0,
+                "max_latency_ms": self.max_latency * 1000,
+            }
+
+
+class RolesExecutor:
+    def __init__(self):
+        self.db = RoleApplicationDatabase()
+        num_partitions = max(1, int(os.getenv("ROLES_EXECUTOR_PARTITIONS", "8")))
+        self.partitions = [RolesExecutorPartition(i, self.db) for i in range(num_partitions)]
+        logger.info(f"RolesExecutor started with {num_partitions} partitions")
+
+    def submit_task(self, role_application_id: str, input_payload: Dict[str, Any]):
+        key = partition_key(input_payload)
+        partition = self.partitions[zlib.crc32(key.encode()) % len(self.partitions)]
+        partition.task_queue.put((role_application_id, input_payload))
+        logger.info(f"Task submitted to executor partition {partition.index} with ID: {role_application_id}")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [partition.stats() for partition in self.partitions]
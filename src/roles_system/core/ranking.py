@@ -0,0 +1,123 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .clients.subject_metrics import SubjectMetricsClient, get_subject_metrics_client
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+@dataclass
+class SubjectScoringPolicy:
+    weights: Dict[str, float] = field(default_factory=dict)
+    top_k: int = 1
+    default_value: float = 0.0
+    normalize: bool = True
+    source: str = "search"  # Valid values: search, subject_metrics
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SubjectScoringPolicy":
+        return cls(
+            weights={k: float(v) for k, v in (data.get("weights") or {}).items()},
+            top_k=max(1, int(data.get("top_k", 1))),
+            default_value=float(data.get("default_value", 0.0)),
+            normalize=bool(data.get("normalize", True)),
+            source=data.get("source", "search")
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "weights": self.weights,
+            "top_k": self.top_k,
+            "default_value": self.default_value,
+            "normalize": self.normalize,
+            "source": self.source
+        }
+
+
+def _as_float(value: Any, default: float) -> float:
+    try:
+        return float(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+def build_feature_matrix(rows: Sequence[Dict[str, Any]], features: List[str], default: float) -> np.ndarray:
+    matrix = np.empty((len(rows), len(features)), dtype=np.float64)
+    for j, feature in enumerate(features):
+        column = [row.get(feature, default) for row in rows]
+        try:
+            matrix[:, j] = column
+        except (TypeError, ValueError):
+            # Non-numeric values in this column; coerce them one by one
+            matrix[:, j] = [_as_float(value, default) for value in column]
+    matrix[~np.isfinite(matrix)] = default
+    return matrix
+
+
+def score_top_k(matrix: np.ndarray, weights: np.ndarray, k: int, normalize: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the indices of the k best rows, best first, and their scores."""
+    if normalize and len(matrix):
+        low = matrix.min(axis=0)
+        span = matrix.max(axis=0) - low
+        span[span == 0] = 1.0
+        matrix = (matrix - low) / span
+
+    scores = matrix @ weights
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return top, scores[top]
+
+
+class SubjectRanker:
+    """Ranks search candidates with a weighted scoring policy taken from the role type."""
+
+    def __init__(self, metrics_client: Optional[SubjectMetricsClient] = None):
+        self.metrics_client = metrics_client or get_subject_metrics_client()
+
+    def _candidate_rows(self, candidates: Sequence[Any], policy: SubjectScoringPolicy) -> Tuple[List[str], List[Dict[str, Any]]]:
+        subject_ids, rows = [], []
+        for candidate in candidates:
+            if isinstance(candidate, dict):
+                subject_ids.append(candidate.get("subject_id"))
+                rows.append(candidate.get("features") or candidate)
+            else:
+                subject_ids.append(candidate)
+                rows.append({})
+
+        # Search results are usually bare subject ids; score those from subject metrics
+        if policy.source == "subject_metrics" or not any(rows):
+            metrics = self.metrics_client.get_subjects_metrics(subject_ids)
+            rows = [metrics.get(subject_id, {}) for subject_id in subject_ids]
+            if not any(rows):
+                logger.warning(f"No features found for {len(subject_ids)} candidates; "
+                               f"scoring policy {list(policy.weights)} cannot rank them")
+        return subject_ids, rows
+
+    def rank(self, candidates: Sequence[Any], policy: SubjectScoringPolicy) -> List[Tuple[str, float]]:
+        if not candidates:
+            return []
+
+        if not policy.weights:
+            # No policy configured: keep the search order
+            ids = [c.get("subject_id") if isinstance(c, dict) else c for c in candidates[:policy.top_k]]
+            return [(subject_id, 0.0) for subject_id in ids]
+
+        subject_ids, rows = self._candidate_rows(candidates, policy)
+        features = list(policy.weights)
+        matrix = build_feature_matrix(rows, features, policy.default_value)
+        weights = np.array([policy.weights[f] for f in features], dtype=np.float64)
+
+        top, scores = score_top_k(matrix, weights, policy.top_k, policy.normalize)
+        ranked = [(subject_ids[i], float(score)) for i, score in zip(top.tolist(), scores.tolist())]
+        logger.info(f"Ranked {len(subject_ids)} candidates, top {len(ranked)}: {ranked[:5]}")
+        return ranked
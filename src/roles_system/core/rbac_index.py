@@ -0,0 +1,326 @@
+import os
+import time
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pymongo import MongoClient, errors
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+SUBJECT_ROLES = "subject_roles_mapping"
+ROLE_GROUP = "role_group_mapping"
+GROUP_CONSTRAINTS = "group_constraints_mapping"
+
+RoleTypeKey = Tuple[str, str]
+
+# Error code of a $changeStream on a stand-alone server
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+
+class RBACGraphState:
+    """Forward and reverse adjacency between subjects, roles, groups and constraints."""
+
+    def __init__(self):
+        # Forward edges
+        self.subject_roles: Dict[str, Set[str]] = {}
+        self.subject_info: Dict[str, Dict[str, str]] = {}
+        self.role_info: Dict[str, Dict[str, Any]] = {}
+        self.group_constraints: Dict[str, Set[str]] = {}
+        self.group_info: Dict[str, Dict[str, str]] = {}
+
+        # Reverse edges
+        self.role_subjects: Dict[str, Set[str]] = defaultdict(set)
+        self.group_roles: Dict[str, Set[str]] = defaultdict(set)
+        # A subject may hold several roles of one type, so membership is reference counted
+        self.role_type_subjects: Dict[RoleTypeKey, Dict[str, int]] = defaultdict(dict)
+
+        # Mongo _id -> natural key, needed to resolve change stream deletes
+        self.doc_keys: Dict[Tuple[str, Any], str] = {}
+
+    def _role_type_key(self, role_id: str) -> Optional[RoleTypeKey]:
+        info = self.role_info.get(role_id)
+        if info is None:
+            return None
+        return info["job_space_id"], info["role_type"]
+
+    def _link(self, subject_id: str, role_id: str):
+        self.role_subjects[role_id].add(subject_id)
+        key = self._role_type_key(role_id)
+        if key:
+            members = self.role_type_subjects[key]
+            members[subject_id] = members.get(subject_id, 0) + 1
+
+    def _unlink(self, subject_id: str, role_id: str):
+        subjects = self.role_subjects.get(role_id)
+        if subjects is not None:
+            subjects.discard(subject_id)
+            if not subjects:
+                del self.role_subjects[role_id]
+        key = self._role_type_key(role_id)
+        if key and subject_id in self.role_type_subjects.get(key, {}):
+            members = self.role_type_subjects[key]
+            members[subject_id] -= 1
+            if members[subject_id] <= 0:
+                del members[subject_id]
+            if not members:
+                del self.role_type_subjects[key]
+
+    def apply_subject(self, doc: Dict[str, Any]):
+        subject_id = doc.get("subject_id", "")
+        if not subject_id:
+            return
+        self.doc_keys[(SUBJECT_ROLES, doc.get("_id"))] = subject_id
+        old_roles = self.subject_roles.get(subject_id, set())
+        new_roles = set(doc.get("role_ids") or [])
+        for role_id in old_roles - new_roles:
+            self._unlink(subject_id, role_id)
+        for role_id in new_roles - old_roles:
+            self._link(subject_id, role_id)
+        self.subject_roles[subject_id] = new_roles
+        self.subject_info[subject_id] = {
+            "subject_type": doc.get("subject_type", ""),
+            "job_space_id": doc.get("job_space_id", "")
+        }
+
+    def remove_subject(self, subject_id: str):
+        for role_id in self.subject_roles.pop(subject_id, set()):
+            self._unlink(subject_id, role_id)
+        self.subject_info.pop(subject_id, None)
+
+    def apply_role(self, doc: Dict[str, Any]):
+        role_id = doc.get("role_id", "")
+        if not role_id:
+            return
+        self.doc_keys[(ROLE_GROUP, doc.get("_id"))] = role_id
+        holders = list(self.role_subjects.get(role_id, ()))
+        # Re-home the holders under the (possibly changed) job space and role type
+        for subject_id in holders:
+            self._unlink(subject_id, role_id)
+        old = self.role_info.get(role_id)
+        if old:
+            for group_id in old["group_ids"]:
+                self.group_roles[group_id].discard(role_id)
+
+        self.role_info[role_id] = {
+            "role_type": doc.get("role_type", ""),
+            "job_space_id": doc.get("job_space_id", ""),
+            "group_ids": list(doc.get("group_ids") or [])
+        }
+        for group_id in self.role_info[role_id]["group_ids"]:
+            self.group_roles[group_id].add(role_id)
+        for subject_id in holders:
+            self._link(subject_id, role_id)
+
+    def remove_role(self, role_id: str):
+        holders = list(self.role_subjects.get(role_id, ()))
+        for subject_id in holders:
+            self._unlink(subject_id, role_id)
+        info = self.role_info.pop(role_id, None)
+        if info:
+            for group_id in info["group_ids"]:
+                self.group_roles[group_id].discard(role_id)
+        # Subjects still list the role id; keep the reverse edge so a later re-insert links back.
+        # Queries ignore it while the role is absent from role_info.
+        for subject_id in holders:
+            self.role_subjects[role_id].add(subject_id)
+
+    def apply_group(self, doc: Dict[str, Any]):
+        group_id = doc.get("group_id", "")
+        if not group_id:
+            return
+        self.doc_keys[(GROUP_CONSTRAINTS, doc.get("_id"))] = group_id
+        self.group_constraints[group_id] = set(doc.get("constraint_ids") or [])
+        self.group_info[group_id] = {
+            "group_type": doc.get("group_type", ""),
+            "job_space_id": doc.get("job_space_id", "")
+        }
+
+    def remove_group(self, group_id: str):
+        self.group_constraints.pop(group_id, None)
+        self.group_info.pop(group_id, None)
+
+    def apply(self, collection: str, doc: Dict[str, Any]):
+        if collection == SUBJECT_ROLES:
+            self.apply_subject(doc)
+        elif collection == ROLE_GROUP:
+            self.apply_role(doc)
+        elif collection == GROUP_CONSTRAINTS:
+            self.apply_group(doc)
+
+    def remove(self, collection: str, doc_id: Any):
+        key = self.doc_keys.pop((collection, doc_id), None)
+        if key is None:
+            return
+        if collection == SUBJECT_ROLES:
+            self.remove_subject(key)
+        elif collection == ROLE_GROUP:
+            self.remove_role(key)
+        elif collection == GROUP_CONSTRAINTS:
+            self.remove_group(key)
+
+
+class RBACGraphIndex:
+    def __init__(self):
+        uri = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+        self.client = MongoClient(uri)
+        self.db = self.client["orgs"]
+        self.poll_interval = float(os.getenv("RBAC_INDEX_POLL_INTERVAL", "10"))
+        self.state = RBACGraphState()
+        self.lock = threading.RLock()
+        self.mode = "initializing"
+        self.last_sync = 0.0
+        self.ready = threading.Event()
+
+        self.sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
+        self.sync_thread.start()
+
+    # ---------------- Synchronization ----------------
+
+    def _load_state(self) -> RBACGraphState:
+        state = RBACGraphState()
+        # Roles first so subject edges land in the role-type index immediately
+        for collection in (ROLE_GROUP, SUBJECT_ROLES, GROUP_CONSTRAINTS):
+            for doc in self.db[collection].find({}):
+                state.apply(collection, doc)
+        return state
+
+    def reload(self):
+        state = self._load_state()
+        with self.lock:
+            self.state = state
+            self.last_sync = time.time()
+        self.ready.set()
+        logger.info(
+            f"RBAC index loaded: {len(state.subject_roles)} subjects, "
+            f"{len(state.role_info)} roles, {len(state.group_constraints)} groups")
+
+    def _handle_change(self, change: Dict[str, Any]):
+        collection = change.get("ns", {}).get("coll")
+        operation = change.get("operationType")
+        with self.lock:
+            if operation in ("insert", "update", "replace") and change.get("fullDocument"):
+                self.state.apply(collection, change["fullDocument"])
+            elif operation == "delete":
+                self.state.remove(collection, change["documentKey"]["_id"])
+            elif operation in ("drop", "dropDatabase", "invalidate"):
+                raise errors.PyMongoError(f"Change stream ended by {operation}")
+            self.last_sync = time.time()
+
+    def _watch(self):
+        pipeline = [{"$match": {"ns.coll": {"$in": [SUBJECT_ROLES, ROLE_GROUP, GROUP_CONSTRAINTS]}}}]
+        with self.db.watch(pipeline, full_document="updateLookup") as stream:
+            # The stream is opened before loading so no change between the two is missed
+            self.reload()
+            self.mode = "change_stream"
+            for change in stream:
+                self._handle_change(change)
+
+    def _poll(self):
+        self.mode = "polling"
+        while True:
+            try:
+                self.reload()
+            except errors.PyMongoError as e:
+                logger.error(f"RBAC index poll failed: {e}")
+            time.sleep(self.poll_interval)
+
+    def _sync_loop(self):
+        while True:
+            try:
+                self._watch()
+            except errors.OperationFailure as e:
+                if e.code != CHANGE_STREAMS_UNSUPPORTED:
+                    # Auth errors, stepdowns and the like are retried on the change stream
+                    logger.error(f"RBAC index change stream failed, restarting: {e}")
+                    time.sleep(1)
+                    continue
+                # Stand-alone servers do not support change streams
+                logger.warning(f"Change streams unavailable, polling RBAC mappings instead: {e}")
+                self._poll()
+            except Exception as e:
+                logger.error(f"RBAC index change stream failed, restarting: {e}")
+                time.sleep(1)
+
+    # ---------------- Queries ----------------
+
+    def subject_roles(self, subject_id: str) -> List[str]:
+        with self.lock:
+            return sorted(self.state.subject_roles.get(subject_id, ()))
+
+    def subject_groups(self, subject_id: str) -> List[str]:
+        with self.lock:
+            groups = set()
+            for role_id in self.state.subject_roles.get(subject_id, ()):
+                info = self.state.role_info.get(role_id)
+                if info:
+                    groups.update(info["group_ids"])
+            return sorted(groups)
+
+    def subject_constraints(self, subject_id: str) -> List[str]:
+        with self.lock:
+            constraints = set()
+            for group_id in self.subject_groups(subject_id):
+                constraints.update(self.state.group_constraints.get(group_id, ()))
+            return sorted(constraints)
+
+    def describe_subject(self, subject_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            if subject_id not in self.state.subject_roles:
+                return None
+            roles = []
+            for role_id in sorted(self.state.subject_roles[subject_id]):
+                info = self.state.role_info.get(role_id, {})
+                roles.append({"role_id": role_id, **info})
+            return {
+                "subject_id": subject_id,
+                **self.state.subject_info.get(subject_id, {}),
+                "roles": roles,
+                "group_ids": self.subject_groups(subject_id),
+                "constraint_ids": self.subject_constraints(subject_id)
+            }
+
+    def has_role(self, subject_id: str, role_id: str) -> bool:
+        with self.lock:
+            return role_id in self.state.subject_roles.get(subject_id, ())
+
+    def has_role_type(self, subject_id: str, role_type: str, job_space_id: str = "") -> bool:
+        with self.lock:
+            return subject_id in self.state.role_type_subjects.get((job_space_id, role_type), {})
+
+    def in_group(self, subject_id: str, group_id: str) -> bool:
+        with self.lock:
+            return any(
+                role_id in self.state.group_roles.get(group_id, ())
+                for role_id in self.state.subject_roles.get(subject_id, ())
+            )
+
+    def role_subjects(self, role_id: str) -> List[str]:
+        with self.lock:
+            # Subjects may still list a role that was deleted (or not yet loaded); it has no holders
+            if role_id not in self.state.role_info:
+                return []
+            return sorted(self.state.role_subjects.get(role_id, ()))
+
+    def role_type_subjects(self, role_type: str, job_space_id: str = "") -> List[str]:
+        with self.lock:
+            return sorted(self.state.role_type_subjects.get((job_space_id, role_type), {}))
+
+    def group_subjects(self, group_id: str) -> List[str]:
+        with self.lock:
+            subjects = set()
+            for role_id in self.state.group_roles.get(group_id, ()):
+                subjects.update(self.state.role_subjects.get(role_id, ()))
+            return sorted(subjects)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "mode": self.mode,
+                "last_sync": self.last_sync,
+                "subjects": len(self.state.subject_roles),
+                "roles": len(self.state.role_info),
+                "groups": len(self.state.group_constraints),
+            }
@@ -4,17 +4,33 @@ from typing import Dict, Any, Optional
 from .db.crud import RoleGroupMappingDatabase
 from .db.crud import RoleTypeAssignmentMappingDatabase
 from .db.crud import SubjectRolesMappingDatabase
+from .db.crud import RoleAssignmentWriter
+from .db.schema import RoleTypeAssignmentMapping
 from dsl_executor import DSLExecutor
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
+def check_removal(role_type_entry: RoleTypeAssignmentMapping, role_data: Dict[str, Any], subject_id: str) -> Optional[str]:
+    """Runs the role removal DSL; returns a failure message or None."""
+    removal_dsl_id = role_type_entry.role_post_removal_dsl_workflow_id
+    if not removal_dsl_id:
+        return "No role_removal_check_dsl_workflow_id found"
+
+    executor = DSLExecutor(workflow_id=removal_dsl_id)
+    dsl_output = executor.run({"subject_id": subject_id, "role_data": role_data})
+    if not executor.get_final_output(dsl_output):
+        return "DSL denied role removal"
+    return None
+
+
 class RoleRemovalHandler:
     def __init__(self):
         self.role_group_db = RoleGroupMappingDatabase()
         self.role_type_db = RoleTypeAssignmentMappingDatabase()
         self.subject_roles_db = SubjectRolesMappingDatabase()
+        self.writer = RoleAssignmentWriter()
 
     def remove_role(self, role_id: str, subject_id: str) -> Dict[str, Any]:
         try:
@@ -36,38 +52,27 @@ class RoleRemovalHandler:
                 logger.warning(f"Cannot remove fixed role: {role_type}")
                 return {"success": False, "message": "Role is fixed and cannot be removed"}
 
-            # Step 3: Run role_removal_check_dsl
-            removal_dsl_id = role_type_entry.role_post_removal_dsl_workflow_id
-            if not removal_dsl_id:
-                return {"success": False, "message": "No role_removal_check_dsl_workflow_id found"}
-
-            executor = DSLExecutor(workflow_id=removal_dsl_id)
-            dsl_input = {"subject_id": subject_id, "role_data": role_data}
-            dsl_output = executor.run(dsl_input)
-
-            if not executor.get_final_output(dsl_output):
-                return {"success": False, "message": "DSL denied role removal"}
-
-            # Step 4a: Remove role entry
-            delete_success, delete_info = self.role_group_db.delete(role_id)
-            if not delete_success:
-                return {"success": False, "message": f"Failed to delete role {role_id}"}
-
-            # Step 4b: Update subject_roles_mapping
+            # Step 3: Confirm the subject holds the role before anything is removed
             success, subject_entry = self.subject_roles_db.get_by_subject_id(
                 subject_id)
             if not success:
                 return {"success": False, "message": f"Subject {subject_id} not found"}
+            if role_id not in subject_entry.role_ids:
+                return {"success": False, "message": f"Subject {subject_id} does not hold role {role_id}"}
 
-            updated_roles = [
-                rid for rid in subject_entry.role_ids if rid != role_id]
+            # Step 4: Run role_removal_check_dsl
+            failure = check_removal(role_type_entry, role_data, subject_id)
+            if failure:
+                return {"success": False, "message": failure}
+
+            # Step 5a: Remove the role entry and unlink it from the subject in one write
+            success, error = self.writer.remove_many([(role_id, subject_id)])
+            if not success:
+                return {"success": False, "message": f"Failed to remove role {role_id} from subject {subject_id}: {error}"}
 
-            if updated_roles:
-                self.subject_roles_db.update(
-                    subject_id, {"role_ids": updated_roles})
-            else:
-                # Optional: delete subject entry if no roles left
-                self.subject_roles_db.delete(subject_id)
+            # Step 5b: Free the position the subject held, now that it no longer holds it
+            if role_type_entry.capacity() > 0:
+                self.role_type_db.release_position(role_type)
 
             logger.info(
                 f"Successfully removed role {role_id} from subject {subject_id}")
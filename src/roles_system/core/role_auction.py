@@ -1,13 +1,15 @@
 import os
+import time
 import logging
 import uuid
 import threading
 import queue
+from concurrent.futures import ThreadPoolExecutor
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set, Tuple
 
 from .clients.dsl import DSLExecutor
-from .clients.auction import AuctionClient
+from .clients.auction import AuctionClient, get_auction_result_listener
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -33,7 +35,7 @@ class RoleAuction:
                 f"Failed to initialize RoleAuction: {e}", exc_info=True)
             raise
 
-    def execute(self, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def execute(self, input_data: Dict[str, Any], timeout: float = 30, correlation_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
         try:
             logger.info(
                 f"Running DSL to produce auction input with input: {input_data}")
@@ -44,7 +46,7 @@ class RoleAuction:
 
             logger.info(f"Submitting auction with input: {auction_input}")
             result = self.auction_client.submit_bid_and_wait(
-                bid_payload=auction_input)
+                bid_payload=auction_input, timeout=timeout, correlation_id=correlation_id)
 
             logger.info(f"Auction result received: {result}")
             return result
@@ -57,49 +59,88 @@ class RoleAuction:
 
 class RoleAuctionExecutor:
     def __init__(self):
-        self.task_queue = queue.Queue()
+        self.max_concurrency = int(os.getenv("ROLE_AUCTION_CONCURRENCY", "8"))
+        self.default_timeout = float(os.getenv("ROLE_AUCTION_TIMEOUT", "30"))
+        self.pool = ThreadPoolExecutor(max_workers=self.max_concurrency)
         self.waiters: Dict[str, queue.Queue] = {}
+        self.deadlines: Dict[str, float] = {}
+        self.cancelled: Set[str] = set()
         self.lock = threading.Lock()
-
-        self.worker_thread = threading.Thread(
-            target=self._worker_loop, daemon=True)
-        self.worker_thread.start()
+        # RoleAuction holds a DSL executor, so each worker thread builds its own
+        self._local = threading.local()
 
         logger.info(
-            "RoleAuctionExecutor initialized and background worker started")
-
-    def submit_task(self, input_data: Dict[str, Any]) -> queue.Queue:
-        """Submits a task and returns a waiter queue to receive the result."""
-        task_id = str(uuid.uuid4())
+            f"RoleAuctionExecutor initialized with {self.max_concurrency} concurrent workers")
+
+    def _auction(self) -> RoleAuction:
+        auction = getattr(self._local, "auction", None)
+        if auction is None:
+            auction = self._local.auction = RoleAuction()
+        return auction
+
+    def submit_task(self, input_data: Dict[str, Any], timeout: Optional[float] = None,
+                    task_id: Optional[str] = None) -> Tuple[str, queue.Queue]:
+        """Submits a task and returns its task id and a waiter queue to receive the result.
+
+        timeout bounds the whole task, including time spent queued; task_id doubles as the
+        auction correlation id and can be passed to cancel().
+        """
+        task_id = task_id or str(uuid.uuid4())
         waiter = queue.Queue(maxsize=1)
 
         with self.lock:
             self.waiters[task_id] = waiter
+            self.deadlines[task_id] = time.monotonic() + (timeout or self.default_timeout)
 
-        self.task_queue.put((task_id, input_data))
+        self.pool.submit(self._run_task, task_id, input_data)
         logger.info(f"Task {task_id} submitted to RoleAuctionExecutor")
-        return waiter
-
-    def _worker_loop(self):
-        auction = RoleAuction()
+        return task_id, waiter
 
-        while True:
-            try:
-                task_id, input_data = self.task_queue.get()
+    def cancel(self, task_id: str) -> bool:
+        with self.lock:
+            if task_id not in self.waiters:
+                return False
+            self.cancelled.add(task_id)
+        # Wakes the worker if it is already waiting on the auction result, or makes
+        # its wait end at once if it has not started waiting yet
+        get_auction_result_listener().cancel(task_id)
+        logger.info(f"Cancellation requested for RoleAuction task {task_id}")
+        return True
+
+    def _run_task(self, task_id: str, input_data: Dict[str, Any]):
+        try:
+            with self.lock:
+                remaining = self.deadlines.get(task_id, 0) - time.monotonic()
+                cancelled = task_id in self.cancelled
+
+            if cancelled:
+                result = {"success": False, "message": "Auction cancelled"}
+            elif remaining <= 0:
+                result = {"success": False, "message": "Deadline passed before the auction started"}
+            else:
                 logger.info(f"Processing RoleAuction task {task_id}...")
+                result = self._auction().execute(input_data, timeout=remaining, correlation_id=task_id)
+                with self.lock:
+                    if task_id in self.cancelled:
+                        result = {"success": False, "message": "Auction cancelled"}
 
-                result = auction.execute(input_data)
+        except Exception as e:
+            logger.error(
+                f"Error processing RoleAuction task {task_id}: {e}", exc_info=True)
+            result = {"success": False, "error": str(e)}
 
-                with self.lock:
-                    waiter = self.waiters.pop(task_id, None)
-
-                if waiter:
-                    waiter.put(result)
-                    logger.info(f"Result for task {task_id} placed in waiter")
-                else:
-                    logger.warning(
-                        f"No waiter found for completed task {task_id}")
-
-            except Exception as e:
-                logger.error(
-                    f"Error in RoleAuctionExecutor worker loop: {e}", exc_info=True)
+        with self.lock:
+            waiter = self.waiters.pop(task_id, None)
+            self.deadlines.pop(task_id, None)
+            self.cancelled.discard(task_id)
+
+        if waiter:
+            waiter.put(result)
+            logger.info(f"Result for task {task_id} placed in waiter")
+        else:
+            logger.warning(
+                f"No waiter found for completed task {task_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"max_concurrency": self.max_concurrency, "in_flight": len(self.waiters)}
@@ -1,16 +1,12 @@
-import uuid
 import logging
 from typing import Dict, Any, Optional
 
 from .db.crud import RoleTypeAssignmentMappingDatabase
-from .db.crud import SubjectRolesMappingDatabase
-from .db.crud import RoleGroupMappingDatabase
+from .db.crud import RoleAssignmentWriter
 from .clients.dsl import DSLExecutor
 from .clients.subjects_search import SubjectsSearch
-from .clients.role_assoc import SubjectAssociationClient
-
-from .db.schema import RoleGroupMapping
-from .db.schema import SubjectRolesMapping
+from .assignment import ASSOCIATION_FAILED, finalize_assignment
+from .ranking import SubjectRanker, SubjectScoringPolicy
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -19,8 +15,8 @@ logging.basicConfig(level=logging.INFO)
 class CriteriaBasedSubjectAssignmentHandler:
     def __init__(self):
         self.role_type_db = RoleTypeAssignmentMappingDatabase()
-        self.subject_roles_db = SubjectRolesMappingDatabase()
-        self.role_group_db = RoleGroupMappingDatabase()
+        self.assignment_writer = RoleAssignmentWriter()
+        self.ranker = SubjectRanker()
 
     def handle(
         self,
@@ -44,7 +40,7 @@ class CriteriaBasedSubjectAssignmentHandler:
             if role_assignment_type not in ["dynamic_single_subject", "dynamic_multi_subject"]:
                 return {"success": False, "message": "Unsupported role assignment type"}
 
-            if role_assignment_type == "dynamic_single_subject" and role_type_data.position_filled:
+            if not role_type_data.has_open_position():
                 return {"success": False, "message": "Role already filled"}
 
             # Step 2: Search for subjects
@@ -60,10 +56,13 @@ class CriteriaBasedSubjectAssignmentHandler:
                 logger.warning("No subjects matched the criteria")
                 return {"success": False, "message": "No eligible subjects found"}
 
-            selected_subject_id = subjects[0]  # Selection policy: pick first
-            subject_data = {"selection": "auto"}  # Placeholder metadata
+            # Step 3: Rank the candidates with the role type's scoring policy
+            policy = SubjectScoringPolicy.from_dict(role_type_data.selection_policy)
+            ranked = self.ranker.rank(subjects, policy)
+            if not ranked:
+                return {"success": False, "message": "No eligible subjects found"}
 
-            # Step 3: Run evaluation DSL
+            # Step 4: Run evaluation DSL
             eval_dsl_id = role_type_data.role_post_removal_dsl_workflow_id
             eval_executor = DSLExecutor(workflow_id=eval_dsl_id)
             eval_input = {"role_type_data": role_type_data.to_dict(), "application_data": application_data}
@@ -72,50 +71,21 @@ class CriteriaBasedSubjectAssignmentHandler:
             if not eval_executor.get_final_output(eval_output):
                 return {"success": False, "message": "Evaluation failed for selected subject"}
 
-            # Step 4: Create association
-            role_id = str(uuid.uuid4())
-            role_data = {
-                "role_id": role_id,
-                "role_type": role_type,
-                "role_application_id": role_application_id
-            }
-
-            assoc_client = SubjectAssociationClient(selected_subject_id, subject_data, role_data)
-            assoc_result = assoc_client.create_association()
-            if not assoc_result:
-                return {"success": False, "message": "Subject association failed"}
-
-            # Step 5: Update SubjectRolesMapping
-            success, subject_entry = self.subject_roles_db.get_by_subject_id(selected_subject_id)
-            if success:
-                updated_roles = list(set(subject_entry.role_ids + [role_id]))
-                self.subject_roles_db.update(selected_subject_id, {"role_ids": updated_roles})
-            else:
-                new_subject_entry = SubjectRolesMapping(
-                    subject_id=selected_subject_id,
-                    role_ids=[role_id],
-                    subject_type=application_data.get("subject_type", ""),
-                    job_space_id=""
-                )
-                self.subject_roles_db.insert(new_subject_entry)
-
-            # Update RoleGroupMapping
-            success, role_group = self.role_group_db.get_by_role_id(role_id)
-            if not success:
-                new_group_entry = RoleGroupMapping(
-                    role_id=role_id,
-                    role_type=role_type,
-                    group_ids=application_data.get("group_ids", []),
-                    job_space_id=""
-                )
-                self.role_group_db.insert(new_group_entry)
-
-            # Step 6: Mark position filled
-            if role_assignment_type == "dynamic_single_subject":
-                self.role_type_db.update(role_type, {"position_filled": True})
-
-            logger.info(f"Auto-selected subject {selected_subject_id} assigned to role {role_id}")
-            return {"success": True, "role_id": role_id, "subject_id": selected_subject_id, "association": assoc_result}
+            # Step 5: Claim the position, associate the best subject and record the mappings;
+            # fall back to the next ranked subject when its association fails
+            for selected_subject_id, score in ranked:
+                subject_data = {"selection": "auto", "score": score}
+                result = finalize_assignment(
+                    self.role_type_db, self.assignment_writer, role_type_data,
+                    role_application_id, application_data, selected_subject_id, subject_data)
+                if result.get("success") or result.get("error_code") != ASSOCIATION_FAILED:
+                    break
+
+            if not result.get("success"):
+                return result
+
+            logger.info(f"Auto-selected subject {selected_subject_id} (score {score}) assigned to role {result['role_id']}")
+            return {**result, "subject_id": selected_subject_id, "ranking": ranked}
 
         except Exception as e:
             logger.error(f"Criteria-based subject assignment failed: {e}", exc_info=True)
@@ -1,7 +1,12 @@
 import os
 import json
+import time
 import logging
 import asyncio
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
 from nats.aio.client import Client as NATS
 from nats.aio.errors import ErrConnectionClosed, ErrTimeout, ErrNoServers
 
@@ -13,49 +18,152 @@ class AgentQueueClient:
     def __init__(self):
         self.nats_url = os.getenv("ORG_NATS_URL", "nats://localhost:4222")
         self.sender_subject_id = os.getenv("ORG_ID", "org-undefined")
-        self._loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self._loop)
+        self.batch_size = int(os.getenv("AGENT_QUEUE_BATCH_SIZE", "256"))
+        self.flush_timeout = float(os.getenv("AGENT_QUEUE_FLUSH_TIMEOUT", "5"))
+        self.use_jetstream = os.getenv("AGENT_QUEUE_JETSTREAM_ACKS", "false").lower() == "true"
+
         self.nc = NATS()
+        self.js = None
 
-        try:
-            self._loop.run_until_complete(self._connect())
-        except Exception as e:
-            logger.exception("Failed to connect to NATS during initialization.")
+        self._stats_lock = threading.Lock()
+        self._published = 0
+        self._failed = 0
+        self._batches = 0
+        self._latencies_ms = deque(maxlen=1024)
+
+        # Publishing happens on a dedicated loop so request threads only enqueue
+        self._loop = asyncio.new_event_loop()
+        self._pending: asyncio.Queue = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._pending = asyncio.Queue()
+        self._publisher_task = self._loop.create_task(self._publisher())
+        self._loop.call_soon(self._ready.set)
+        self._loop.run_forever()
 
     async def _connect(self):
         try:
-            await self.nc.connect(servers=[self.nats_url], io_loop=self._loop)
+            await self.nc.connect(servers=[self.nats_url])
+            if self.use_jetstream:
+                self.js = self.nc.jetstream()
             logger.info(f"Connected to NATS at {self.nats_url}")
         except ErrNoServers as e:
             logger.error(f"Could not connect to NATS server: {e}")
             raise
 
-    def push(self, subject_id: str, task_data: dict):
+    def push(self, subject_id: str, task_data: dict, event_type: str = "task"):
+        self.push_many([(subject_id, task_data)], event_type=event_type)
+
+    def push_many(self, messages: Iterable[Tuple[str, dict]], event_type: str = "task"):
+        enqueued_at = time.perf_counter()
         try:
-            self._loop.run_until_complete(self._push_internal(subject_id, task_data))
+            batch = [
+                (subject_id, self._encode(task_data, event_type), enqueued_at)
+                for subject_id, task_data in messages
+            ]
+            self._loop.call_soon_threadsafe(self._enqueue, batch)
         except Exception as e:
-            logger.exception(f"Error pushing message to {subject_id}")
+            logger.exception("Error queueing messages for agent subject queues")
 
-    async def _push_internal(self, subject_id: str, task_data: dict):
-        if not self.nc.is_connected:
-            await self._connect()
+    def _encode(self, task_data: dict, event_type: str) -> bytes:
+        message = {
+            "event_type": event_type,
+            "sender_subject_id": self.sender_subject_id,
+            "event_data": task_data
+        }
+        return json.dumps(message).encode()
 
+    def _enqueue(self, batch: List[Tuple[str, bytes, float]]):
+        for item in batch:
+            self._pending.put_nowait(item)
+
+    async def _publisher(self):
+        while True:
+            item = await self._pending.get()
+            batch = []
+            # Coalesce everything queued so far into one batch with a single flush
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size or self._pending.empty():
+                    break
+                item = self._pending.get_nowait()
+
+            if batch:
+                await self._publish_batch(batch)
+            if item is None:
+                return
+
+    async def _publish_batch(self, batch: List[Tuple[str, bytes, float]]):
         try:
-            message = {
-                "event_type": "task",
-                "sender_subject_id": self.sender_subject_id,
-                "event_data": task_data
-            }
-            await self.nc.publish(subject_id, json.dumps(message).encode())
-            logger.info(f"Task pushed to agent subject queue: {subject_id}")
+            if not self.nc.is_connected:
+                await self._connect()
+
+            if self.js:
+                acks = await asyncio.gather(
+                    *(self.js.publish(subject_id, payload) for subject_id, payload, _ in batch),
+                    return_exceptions=True
+                )
+                results = [not isinstance(ack, Exception) for ack in acks]
+            else:
+                for subject_id, payload, _ in batch:
+                    await self.nc.publish(subject_id, payload)
+                await self.nc.flush(timeout=self.flush_timeout)
+                results = [True] * len(batch)
+
+            logger.info(f"Pushed {sum(results)}/{len(batch)} tasks to agent subject queues")
         except (ErrConnectionClosed, ErrTimeout) as e:
             logger.error(f"NATS publish failed: {e}")
+            results = [False] * len(batch)
         except Exception as e:
-            logger.exception("Unexpected error in _push_internal")
+            logger.exception("Unexpected error publishing batch to agent subject queues")
+            results = [False] * len(batch)
+
+        self._record(batch, results)
+
+    def _record(self, batch: List[Tuple[str, bytes, float]], results: List[bool]):
+        completed_at = time.perf_counter()
+        with self._stats_lock:
+            self._batches += 1
+            for (subject_id, _, enqueued_at), ok in zip(batch, results):
+                if ok:
+                    self._published += 1
+                    self._latencies_ms.append((completed_at - enqueued_at) * 1000)
+                else:
+                    self._failed += 1
+                    logger.error(f"Failed to push task to agent subject queue: {subject_id}")
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            latencies = sorted(self._latencies_ms)
+            total = self._published + self._failed
+            return {
+                "published": self._published,
+                "failed": self._failed,
+                "batches": self._batches,
+                "pending": self._pending.qsize() if self._pending else 0,
+                "error_rate": (self._failed / total) if total else 0.0,
+                "latency_ms_p50": latencies[len(latencies) // 2] if latencies else 0.0,
+                "latency_ms_p99": latencies[int(len(latencies) * 0.99)] if latencies else 0.0,
+                "latency_ms_max": latencies[-1] if latencies else 0.0,
+            }
+
+    async def _shutdown(self):
+        # The sentinel lets the publisher drain everything queued before it
+        self._pending.put_nowait(None)
+        await self._publisher_task
+        if self.nc.is_connected:
+            await self.nc.drain()
 
     def close(self):
         try:
-            self._loop.run_until_complete(self.nc.close())
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=self.flush_timeout)
             logger.info("Closed NATS connection.")
         except Exception:
             pass
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
@@ -1,15 +1,14 @@
 from flask import Flask, request, jsonify
 import logging
-from .schema import TaskEntry
+from .schema import TaskEntry, SubTaskEntry
 from .head_agent import HeadAgentAssociationModule
-from .config import OrgExecutionConfigProvider
 
 app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ProcessTaskAPI")
 
 head_agent_associator = HeadAgentAssociationModule()
-config_provider = OrgExecutionConfigProvider()
+config_provider = head_agent_associator.config_provider
 
 @app.route("/internal/process-task", methods=["POST"])
 def process_task():
@@ -31,8 +30,17 @@ def process_task():
                 return jsonify({"error": "No agent could be assigned"}), 422
 
         elif task_type == "sub_task":
-            # Future: implement SubTask support
-            return jsonify({"error": "Sub-task processing not implemented yet"}), 501
+            items = data if isinstance(data, list) else [data]
+            sub_tasks = [SubTaskEntry.from_dict(item) for item in items]
+            try:
+                assignments = head_agent_associator.associate_and_dispatch_sub_tasks(sub_tasks)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 422
+
+            if any(assignments.values()):
+                return jsonify({"status": "assigned", "assignments": assignments}), 200
+            else:
+                return jsonify({"error": "No agent could be assigned", "assignments": assignments}), 422
 
         else:
             return jsonify({"error": f"Unknown task type: {task_type}"}), 400
@@ -41,6 +49,37 @@ def process_task():
         logger.exception("Failed to process task.")
         return jsonify({"error": str(e)}), 500
 
+@app.route("/internal/candidate-pool/invalidate", methods=["POST"])
+def invalidate_candidate_pool():
+    try:
+        body = request.json or {}
+        head_agent_associator.pool_resolver.invalidate(body.get("job_space_id"))
+        return jsonify({"success": True})
+    except Exception as e:
+        logger.exception("Error invalidating candidate pool cache")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route("/internal/candidate-pool/stats", methods=["GET"])
+def candidate_pool_stats():
+    return jsonify({"success": True, "data": head_agent_associator.pool_resolver.cache.stats()})
+
+
+@app.route("/internal/plan-selection-cache/stats", methods=["GET"])
+def plan_selection_cache_stats():
+    return jsonify({"success": True, "data": head_agent_associator.plan_selector.selection_cache.stats()})
+
+
+@app.route("/internal/agent-queue/stats", methods=["GET"])
+def agent_queue_stats():
+    return jsonify({"success": True, "data": head_agent_associator.agent_queue.stats()})
+
+
+@app.route("/internal/agent-load", methods=["GET"])
+def agent_load():
+    return jsonify({"success": True, "data": head_agent_associator.least_loaded_selector.load_index.snapshot()})
+
+
 @app.route("/org-config/<org_id>/<key>", methods=["GET"])
 def get_org_config(org_id, key):
     try:
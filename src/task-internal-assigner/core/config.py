@@ -1,37 +1,112 @@
 import os
+import time
 import logging
+import threading
 import redis
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("OrgExecutionConfigProvider")
 
+# Keys read by task resolution; they are fetched together in one MGET per org snapshot
+SNAPSHOT_KEYS = [
+    "agent_resolution_strategy",
+    "auction_input_dsl_id",
+    "plan_retrieve_dsl_id",
+    "static_head_agent_subject_id",
+    "plan_retrieve_cache_ttl",
+]
+
+CONFIG_UPDATES_CHANNEL = "org_config_updates"
+
 
 class OrgExecutionConfigProvider:
     def __init__(self):
         self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
         self.redis_conn = redis.Redis.from_url(self.redis_url, decode_responses=True)
+        self.snapshot_ttl = float(os.getenv("ORG_CONFIG_CACHE_TTL", "60"))
+        self._snapshots: Dict[str, Tuple[float, Dict[str, Optional[str]]]] = {}
+        self._generations: Dict[str, int] = {}
+        self._global_generation = 0
+        self._lock = threading.Lock()
+
+        self._listener_thread = threading.Thread(target=self._listen_for_updates, daemon=True)
+        self._listener_thread.start()
 
     def _key(self, org_id: str, key: str) -> str:
         return f"org_config:{org_id}:{key}"
 
-    def get(self, org_id: str, key: str) -> Optional[str]:
-        try:
-            redis_key = self._key(org_id, key)
-            value = self.redis_conn.get(redis_key)
-            if value is not None:
-                logger.info(f"Fetched config [{key}] for org [{org_id}]: {value}")
+    def _listen_for_updates(self):
+        # Drops cached snapshots on explicit update events and, when the server has
+        # keyspace notifications enabled, on direct writes to org_config keys as well
+        while True:
+            try:
+                pubsub = self.redis_conn.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CONFIG_UPDATES_CHANNEL)
+                pubsub.psubscribe("__keyspace@*__:org_config:*")
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.invalidate(message["data"] or None)
+                    elif message["type"] == "pmessage":
+                        org_id = message["channel"].split("org_config:", 1)[-1].split(":", 1)[0]
+                        self.invalidate(org_id)
+            except Exception as e:
+                logger.error(f"Org config update listener failed, retrying: {e}")
+                time.sleep(5)
+
+    def _generation(self, org_id: str) -> Tuple[int, int]:
+        return self._global_generation, self._generations.get(org_id, 0)
+
+    def invalidate(self, org_id: Optional[str] = None):
+        with self._lock:
+            if org_id:
+                self._snapshots.pop(org_id, None)
+                self._generations[org_id] = self._generations.get(org_id, 0) + 1
             else:
-                logger.warning(f"Config [{key}] not found for org [{org_id}]")
-            return value
+                self._snapshots.clear()
+                self._global_generation += 1
+
+    def _load_snapshot(self, org_id: str, keys: List[str]) -> Dict[str, Optional[str]]:
+        values = self.redis_conn.mget([self._key(org_id, key) for key in keys])
+        snapshot = dict(zip(keys, values))
+        logger.debug(f"Loaded config snapshot for org [{org_id}]: {snapshot}")
+        return snapshot
+
+    def get_snapshot(self, org_id: str, keys: Optional[List[str]] = None) -> Dict[str, Optional[str]]:
+        wanted = list(dict.fromkeys(SNAPSHOT_KEYS + (keys or [])))
+        try:
+            now = time.monotonic()
+            with self._lock:
+                cached = self._snapshots.get(org_id)
+                generation = self._generation(org_id)
+            if cached and cached[0] > now and all(k in cached[1] for k in wanted):
+                return cached[1]
+
+            snapshot = dict(cached[1]) if cached and cached[0] > now else {}
+            missing = [k for k in wanted if k not in snapshot]
+            snapshot.update(self._load_snapshot(org_id, missing))
+
+            with self._lock:
+                # Drop the result if the org's config was invalidated while it was being read
+                if generation == self._generation(org_id):
+                    self._snapshots[org_id] = (now + self.snapshot_ttl, snapshot)
+            return snapshot
         except Exception as e:
-            logger.exception(f"Failed to get config [{key}] for org [{org_id}]")
-            return None
+            logger.exception(f"Failed to load config snapshot for org [{org_id}]")
+            return {}
+
+    def get(self, org_id: str, key: str) -> Optional[str]:
+        value = self.get_snapshot(org_id, [key]).get(key)
+        if value is None:
+            logger.warning(f"Config [{key}] not found for org [{org_id}]")
+        return value
 
     def set(self, org_id: str, key: str, value: str) -> bool:
         try:
             redis_key = self._key(org_id, key)
             self.redis_conn.set(redis_key, value)
+            self.invalidate(org_id)
+            self.redis_conn.publish(CONFIG_UPDATES_CHANNEL, org_id)
             logger.info(f"Set config [{key}] for org [{org_id}] = {value}")
             return True
         except Exception as e:
@@ -39,9 +114,5 @@ class OrgExecutionConfigProvider:
             return False
 
     def get_all(self, org_id: str, keys: List[str]) -> dict:
-        config = {}
-        for key in keys:
-            val = self.get(org_id, key)
-            if val is not None:
-                config[key] = val
-        return config
+        snapshot = self.get_snapshot(org_id, keys)
+        return {key: snapshot[key] for key in keys if snapshot.get(key) is not None}
@@ -1,5 +1,5 @@
 import logging
-from pymongo import MongoClient, errors
+from pymongo import MongoClient, UpdateOne, errors
 import os
 
 from typing import Dict, Any, Tuple, List, Union
@@ -38,6 +38,19 @@ class BaseMongoDB:
         except errors.PyMongoError as e:
             return False, str(e)
 
+    def bulk_update(self, id_field: str, updates: Dict[str, Dict]) -> Tuple[bool, Union[int, str]]:
+        try:
+            if not updates:
+                return True, 0
+            operations = [
+                UpdateOne({id_field: id_value}, {"$set": fields}, upsert=True)
+                for id_value, fields in updates.items()
+            ]
+            result = self.collection.bulk_write(operations, ordered=False)
+            return True, result.modified_count + result.upserted_count
+        except errors.PyMongoError as e:
+            return False, str(e)
+
     def delete(self, id_field: str, id_value: str) -> Tuple[bool, Union[int, str]]:
         try:
             result = self.collection.delete_one({id_field: id_value})
@@ -1,23 +1,30 @@
 import os
 import logging
 import requests
-from typing import List, Optional
-from .schema import TaskEntry
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import Callable, Dict, List, Optional, Sequence
+from .schema import TaskEntry, SubTaskEntry
 
 from .config import OrgExecutionConfigProvider
-from .db import TaskEntryDatabase
+from .pool_cache import CandidatePoolCache
+from .db import TaskEntryDatabase, SubTaskEntryDatabase
 from .agent_input import AgentQueueClient
 from .methods.bidding import AuctionBasedAgentSelector
 from .methods.search import PlanRetrieveAgentSelector
 from .methods.static import StaticAgentSelector
+from .methods.least_loaded import LeastLoadedAgentSelector
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("AgentCandidatePoolResolver")
 
 class AgentCandidatePoolResolver:
-    def __init__(self):
+    def __init__(self, cache: Optional[CandidatePoolCache] = None):
         self.role_group_api = os.getenv("ROLE_GROUP_API", "http://localhost:7000/role-group")
         self.subject_roles_api = os.getenv("SUBJECT_ROLES_API", "http://localhost:7000/subject-roles")
+        self.session = requests.Session()
+        self.cache = cache or CandidatePoolCache()
+        self.invalidation_listeners: List[Callable[[Optional[str]], None]] = []
 
     def resolve(self, obj: TaskEntry) -> Optional[List[str]]:
         try:
@@ -26,15 +33,30 @@ class AgentCandidatePoolResolver:
                 logger.warning("Missing job_space_id in task.")
                 return []
 
+            subject_ids = self.cache.get_or_load(
+                job_space_id, lambda: self._resolve_job_space(job_space_id))
+            return subject_ids or []
+
+        except Exception as e:
+            logger.exception("Error resolving agent candidate pool")
+            return []
+
+    def invalidate(self, job_space_id: Optional[str] = None):
+        self.cache.invalidate(job_space_id)
+        for listener in self.invalidation_listeners:
+            listener(job_space_id)
+
+    def _resolve_job_space(self, job_space_id: str) -> Optional[List[str]]:
+        try:
             # Step 1: Query role-group for SCOUTING roles
-            scout_roles_resp = requests.post(self.role_group_api, json={
+            scout_roles_resp = self.session.post(self.role_group_api, json={
                 "role_type": "SCOUTING",
                 "job_space_id": job_space_id
             })
             scout_roles_data = scout_roles_resp.json()
             if not scout_roles_data.get("success"):
                 logger.error(f"Failed to fetch role groups: {scout_roles_data.get('error')}")
-                return []
+                return None
 
             role_ids = [r["role_id"] for r in scout_roles_data["data"]]
             logger.info(f"Found {len(role_ids)} SCOUTING roles.")
@@ -43,14 +65,14 @@ class AgentCandidatePoolResolver:
                 return []
 
             # Step 2: Query subject-role mappings for those roles
-            subject_roles_resp = requests.post(self.subject_roles_api, json={
+            subject_roles_resp = self.session.post(self.subject_roles_api, json={
                 "role_ids": {"$in": role_ids},
                 "job_space_id": job_space_id
             })
             subject_roles_data = subject_roles_resp.json()
             if not subject_roles_data.get("success"):
                 logger.error(f"Failed to fetch subject-role mappings: {subject_roles_data.get('error')}")
-                return []
+                return None
 
             subject_ids = [s["subject_id"] for s in subject_roles_data["data"]]
             logger.info(f"Found {len(subject_ids)} subject candidates for scouting.")
@@ -58,8 +80,8 @@ class AgentCandidatePoolResolver:
             return subject_ids
 
         except Exception as e:
-            logger.exception("Error resolving agent candidate pool")
-            return []
+            logger.exception(f"Error resolving candidate pool for job space {job_space_id}")
+            return None
 
 
 class HeadAgentAssociationModule:
@@ -67,33 +89,54 @@ class HeadAgentAssociationModule:
         self.pool_resolver = AgentCandidatePoolResolver()
         self.config_provider = OrgExecutionConfigProvider()
         self.task_db = TaskEntryDatabase()
+        self.sub_task_db = SubTaskEntryDatabase()
         self.agent_queue = AgentQueueClient()
-        self.auction_selector = AuctionBasedAgentSelector()
-        self.plan_selector = PlanRetrieveAgentSelector()
-        self.static_selector = StaticAgentSelector()
+        self.auction_selector = AuctionBasedAgentSelector(self.config_provider)
+        self.plan_selector = PlanRetrieveAgentSelector(self.config_provider)
+        self.static_selector = StaticAgentSelector(self.config_provider)
+        self.least_loaded_selector = LeastLoadedAgentSelector()
+        self.pool_resolver.invalidation_listeners.append(self.plan_selector.selection_cache.invalidate)
+        self.sub_task_pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv("SUB_TASK_ASSIGN_CONCURRENCY", "16")))
+
+    def _select_head_agent(self, task: TaskEntry, strategy: str, candidate_subjects: Sequence[str],
+                           config: Dict[str, Optional[str]]) -> Optional[str]:
+        selected_subject_id = None
+
+        if strategy == "auction":
+            selected_subject_id = self.auction_selector.resolve_head_agent(task, config)
+        elif strategy == "plan+retrieve":
+            selected_subject_id = self.plan_selector.resolve_head_agent(task, candidate_subjects, config)
+        elif strategy == "static":
+            selected_subject_id = self.static_selector.resolve_head_agent(task, candidate_subjects, config)
+        elif strategy == "least_loaded":
+            selected_subject_id = self.least_loaded_selector.resolve_head_agent(task, candidate_subjects)
+        else:
+            raise ValueError(f"Unsupported strategy: {strategy}")
+
+        # least_loaded counts the dispatch when it picks the subject
+        if selected_subject_id and strategy != "least_loaded":
+            self.least_loaded_selector.load_index.record_dispatch(selected_subject_id)
+
+        return selected_subject_id
+
+    def _resolve_strategy(self, task: TaskEntry):
+        org_id = task.submitter_subject_id.split(":")[0]
+        config = self.config_provider.get_snapshot(org_id)
+        strategy = config.get("agent_resolution_strategy")
+        if not strategy:
+            raise ValueError(f"No agent resolution strategy configured for org {org_id}")
+        return strategy, config
 
     def associate_and_dispatch(self, task: TaskEntry) -> Optional[str]:
         try:
-            org_id = task.submitter_subject_id.split(":")[0]
-            strategy = self.config_provider.get(org_id, "agent_resolution_strategy")
-            if not strategy:
-                raise ValueError(f"No agent resolution strategy configured for org {org_id}")
+            strategy, config = self._resolve_strategy(task)
 
             candidate_subjects = self.pool_resolver.resolve(task)
             if not candidate_subjects:
                 raise ValueError("No eligible agent candidates found")
 
-            selected_subject_id = None
-
-            if strategy == "auction":
-                selected_subject_id = self.auction_selector.resolve_head_agent(task)
-            elif strategy == "plan+retrieve":
-                selected_subject_id = self.plan_selector.resolve_head_agent(task, candidate_subjects)
-            elif strategy == "static":
-                selected_subject_id = self.static_selector.resolve_head_agent(task, candidate_subjects)
-            else:
-                raise ValueError(f"Unsupported strategy: {strategy}")
-
+            selected_subject_id = self._select_head_agent(task, strategy, candidate_subjects, config)
             if not selected_subject_id:
                 raise ValueError("Head agent resolution failed")
 
@@ -115,3 +158,65 @@ class HeadAgentAssociationModule:
             logger.exception("Head agent association and dispatch failed")
             return None
 
+    def _sub_task_view(self, parent: TaskEntry, sub_task: SubTaskEntry) -> TaskEntry:
+        # Selectors work on TaskEntry, so each sub-task is presented as its parent with its own goal
+        return replace(
+            parent,
+            task_id=sub_task.sub_task_id,
+            task_goal=sub_task.sub_task_goal,
+            task_intent=sub_task.sub_task_intent,
+            task_priority_value=sub_task.sub_task_priority_value,
+            task_behavior_dsl_map={**parent.task_behavior_dsl_map, **sub_task.sub_task_behavior_dsl_map},
+        )
+
+    def associate_and_dispatch_sub_tasks(self, sub_tasks: List[SubTaskEntry]) -> Dict[str, Optional[str]]:
+        if not sub_tasks:
+            return {}
+
+        parent_task_ids = {st.task_id for st in sub_tasks}
+        if len(parent_task_ids) != 1:
+            raise ValueError("All sub-tasks in a batch must belong to the same parent task")
+
+        parent_task_id = parent_task_ids.pop()
+        found, parent = self.task_db.get_by_task_id(parent_task_id)
+        if not found:
+            raise ValueError(f"Parent task {parent_task_id} not found")
+
+        strategy, config = self._resolve_strategy(parent)
+
+        # The candidate pool depends only on the parent's job space, so it is resolved once
+        candidate_subjects = self.pool_resolver.resolve(parent)
+        if not candidate_subjects:
+            raise ValueError("No eligible agent candidates found")
+
+        def assign(sub_task: SubTaskEntry) -> Optional[str]:
+            try:
+                view = self._sub_task_view(parent, sub_task)
+                return self._select_head_agent(view, strategy, candidate_subjects, config)
+            except Exception as e:
+                logger.exception(f"Head agent resolution failed for sub-task {sub_task.sub_task_id}")
+                return None
+
+        selected = list(self.sub_task_pool.map(assign, sub_tasks))
+        assignments = {st.sub_task_id: subject_id for st, subject_id in zip(sub_tasks, selected)}
+
+        assigned = [(st, subject_id) for st, subject_id in zip(sub_tasks, selected) if subject_id]
+        if not assigned:
+            return assignments
+
+        success, result = self.sub_task_db.bulk_update("sub_task_id", {
+            st.sub_task_id: {"status": "assigned", "assigned_subject_ids": [subject_id]}
+            for st, subject_id in assigned
+        })
+        if not success:
+            # Nothing is dispatched that the DB does not show as assigned
+            logger.error(f"Bulk sub-task assignment update failed: {result}")
+            return {st.sub_task_id: None for st in sub_tasks}
+
+        self.agent_queue.push_many([
+            (subject_id, {**replace(st, assigned_subject_ids=[subject_id]).to_dict(), "status": "assigned"})
+            for st, subject_id in assigned
+        ], event_type="sub_task")
+
+        logger.info(f"Assigned {len(assigned)}/{len(sub_tasks)} sub-tasks of task {parent_task_id}")
+        return assignments
@@ -1,6 +1,6 @@
 import os
 import logging
-from typing import Optional
+from typing import Dict, Optional
 from ..schema import TaskEntry
 from ..config import OrgExecutionConfigProvider
 from dsl_executor import new_dsl_workflow_executor, parse_dsl_output
@@ -10,19 +10,21 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("AuctionBasedAgentSelector")
 
 class AuctionBasedAgentSelector:
-    def __init__(self):
+    def __init__(self, config_provider: Optional[OrgExecutionConfigProvider] = None):
         self.auction_api = os.getenv("AUCTION_API", "http://localhost:9000")
         self.is_remote = os.getenv("AUCTION_DSL_REMOTE", "false").lower() == "true"
         self.default_dsl_url = os.getenv("ORG_TASK_AUCTION_INPUT_DSL_URL")
-        self.config_provider = OrgExecutionConfigProvider()
+        self.config_provider = config_provider or OrgExecutionConfigProvider()
+        self.auction_client = AuctionClient(api_url=self.auction_api)
 
-    def resolve_head_agent(self, task: TaskEntry) -> Optional[str]:
+    def resolve_head_agent(self, task: TaskEntry, config: Optional[Dict[str, Optional[str]]] = None) -> Optional[str]:
         try:
             org_id = task.submitter_subject_id.split(":")[0]
             dsl_id = task.task_behavior_dsl_map.get("auction_input_dsl_id")
 
             if not dsl_id:
-                dsl_id = self.config_provider.get(org_id, "auction_input_dsl_id")
+                config = config if config is not None else self.config_provider.get_snapshot(org_id)
+                dsl_id = config.get("auction_input_dsl_id")
 
             if not dsl_id:
                 logger.warning(f"No DSL ID provided or configured for auction_input_dsl_id for org: {org_id}")
@@ -57,8 +59,7 @@ class AuctionBasedAgentSelector:
                 return None
 
             # Step 3: Submit to auction client
-            auction_client = AuctionClient(api_url=self.auction_api)
-            result = auction_client.submit_bid_and_wait(auction_input)
+            result = self.auction_client.submit_bid_and_wait(auction_input)
 
             if not result or not result.get("success"):
                 logger.warning("Auction result not received or failed")
@@ -0,0 +1,143 @@
+import os
+import json
+import heapq
+import asyncio
+import logging
+import itertools
+import threading
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from nats.aio.client import Client as NATS
+from ..schema import TaskEntry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("LeastLoadedAgentSelector")
+
+
+class AgentLoadIndex:
+    """In-flight task counts per subject, with one lazily-pruned min-heap per candidate pool."""
+
+    def __init__(self):
+        self.loads: Dict[str, int] = {}
+        self.pools: Dict[str, Tuple[FrozenSet[str], List[Tuple[int, int, str]]]] = {}
+        self.pool_sources: Dict[str, Sequence[str]] = {}
+        self.subject_pools: Dict[str, Set[str]] = defaultdict(set)
+        self.lock = threading.Lock()
+        self._seq = itertools.count()
+
+    def _push(self, subject_id: str):
+        load = self.loads.get(subject_id, 0)
+        for pool_key in self.subject_pools.get(subject_id, ()):
+            members, heap = self.pools[pool_key]
+            heapq.heappush(heap, (load, next(self._seq), subject_id))
+            # Stale entries are skipped on read; rebuild once they dominate the heap
+            if len(heap) > 2 * len(members) + 16:
+                self._build_pool(pool_key, members)
+
+    def _build_pool(self, pool_key: str, members: FrozenSet[str]) -> List[Tuple[int, int, str]]:
+        heap = [(self.loads.get(s, 0), next(self._seq), s) for s in members]
+        heapq.heapify(heap)
+        self.pools[pool_key] = (members, heap)
+        return heap
+
+    def _ensure_pool(self, pool_key: str, candidate_subject_ids: Sequence[str]) -> List[Tuple[int, int, str]]:
+        pool = self.pools.get(pool_key)
+        # Candidate pools come from a shared cache, so an unchanged pool is the same object
+        if pool and self.pool_sources.get(pool_key) is candidate_subject_ids:
+            return pool[1]
+
+        members = frozenset(candidate_subject_ids)
+        self.pool_sources[pool_key] = candidate_subject_ids
+        if pool and pool[0] == members:
+            return pool[1]
+
+        if pool:
+            for subject_id in pool[0] - members:
+                self.subject_pools[subject_id].discard(pool_key)
+        for subject_id in members:
+            self.subject_pools[subject_id].add(pool_key)
+        return self._build_pool(pool_key, members)
+
+    def acquire_least_loaded(self, pool_key: str, candidate_subject_ids: Sequence[str]) -> Optional[str]:
+        with self.lock:
+            heap = self._ensure_pool(pool_key, candidate_subject_ids)
+            while heap:
+                load, _, subject_id = heap[0]
+                if load != self.loads.get(subject_id, 0):
+                    heapq.heappop(heap)
+                    continue
+                heapq.heappop(heap)
+                self.loads[subject_id] = load + 1
+                self._push(subject_id)
+                return subject_id
+            return None
+
+    def record_dispatch(self, subject_id: str):
+        with self.lock:
+            self.loads[subject_id] = self.loads.get(subject_id, 0) + 1
+            self._push(subject_id)
+
+    def record_completion(self, subject_id: str):
+        with self.lock:
+            load = self.loads.get(subject_id, 0)
+            if load <= 0:
+                return
+            self.loads[subject_id] = load - 1
+            self._push(subject_id)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return {s: load for s, load in self.loads.items() if load}
+
+
+class TaskCompletionListener:
+    """Decrements subject load when agents report task completion on NATS."""
+
+    def __init__(self, load_index: AgentLoadIndex):
+        self.load_index = load_index
+        self.nats_url = os.getenv("ORG_NATS_URL", "nats://localhost:4222")
+        self.topic = os.getenv(
+            "TASK_COMPLETION_TOPIC", f"{os.getenv('ORG_ID', 'org-undefined')}_task_completion_events")
+        self.nc = NATS()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_event_loop, daemon=True)
+        self.thread.start()
+
+    def _run_event_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.create_task(self._subscribe())
+        self.loop.run_forever()
+
+    async def _subscribe(self):
+        try:
+            await self.nc.connect(servers=[self.nats_url], max_reconnect_attempts=-1)
+            await self.nc.subscribe(self.topic, cb=self._message_handler)
+            logger.info(f"Subscribed to task completion events on {self.topic}")
+        except Exception as e:
+            logger.error(f"Error subscribing to task completion events: {e}")
+
+    async def _message_handler(self, msg):
+        try:
+            event = json.loads(msg.data.decode())
+            subject_id = event.get("subject_id") or event.get("assigned_subject_id")
+            if subject_id:
+                self.load_index.record_completion(subject_id)
+        except Exception as e:
+            logger.error(f"Failed to parse task completion event: {e}")
+
+
+class LeastLoadedAgentSelector:
+    def __init__(self, load_index: Optional[AgentLoadIndex] = None):
+        self.load_index = load_index or AgentLoadIndex()
+        self.completion_listener = TaskCompletionListener(self.load_index)
+
+    def resolve_head_agent(self, task: TaskEntry, candidate_subject_ids: Sequence[str]) -> Optional[str]:
+        try:
+            pool_key = task.task_job_submission_data.get("job_space_id", "")
+            selected = self.load_index.acquire_least_loaded(pool_key, candidate_subject_ids)
+            logger.info(f"Least-loaded agent selected: {selected}")
+            return selected
+        except Exception as e:
+            logger.exception("Least-loaded head agent resolution failed")
+            return None
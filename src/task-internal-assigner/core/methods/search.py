@@ -1,6 +1,10 @@
 import os
+import time
+import hashlib
 import logging
-from typing import Optional, List
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, List, Sequence, Tuple
 from ..schema import TaskEntry
 from dsl_executor import new_dsl_workflow_executor, parse_dsl_output
 from ..config import OrgExecutionConfigProvider
@@ -8,23 +12,118 @@ from ..config import OrgExecutionConfigProvider
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("PlanRetrieveAgentSelector")
 
+SelectionKey = Tuple[str, str, str, str, str]
+
+
+def parse_ttl(value, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring invalid cache TTL {value!r}, using {default}")
+        return default
+
+
+class PlanSelectionCache:
+    """Memoizes plan+retrieve selections for tasks with the same DSL, goal, intent and candidate pool.
+
+    Holds at most `max_entries` selections, evicting the least recently used.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[SelectionKey, Tuple[float, str]]" = OrderedDict()
+        self._candidate_hashes: Dict[str, Tuple[Sequence[str], str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join((text or "").lower().split())
+
+    def _candidate_hash(self, job_space_id: str, candidate_subject_ids: Sequence[str]) -> str:
+        # Cached candidate pools are shared objects, so the sort+hash is done once per pool
+        cached = self._candidate_hashes.get(job_space_id)
+        if cached and cached[0] is candidate_subject_ids:
+            return cached[1]
+        digest = hashlib.sha1("\n".join(sorted(candidate_subject_ids)).encode()).hexdigest()
+        self._candidate_hashes[job_space_id] = (candidate_subject_ids, digest)
+        return digest
+
+    def key(self, dsl_id: str, task: TaskEntry, candidate_subject_ids: Sequence[str]) -> SelectionKey:
+        job_space_id = task.task_job_submission_data.get("job_space_id", "")
+        with self._lock:
+            candidate_hash = self._candidate_hash(job_space_id, candidate_subject_ids)
+        return (dsl_id, self._normalize(task.task_goal), self._normalize(task.task_intent),
+                candidate_hash, job_space_id)
+
+    def get(self, key: SelectionKey) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+    def put(self, key: SelectionKey, subject_id: str, ttl_seconds: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, subject_id)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, job_space_id: Optional[str] = None):
+        with self._lock:
+            if not job_space_id:
+                self._entries.clear()
+                self._candidate_hashes.clear()
+                return
+            self._candidate_hashes.pop(job_space_id, None)
+            for key in [k for k in self._entries if k[4] == job_space_id]:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
 class PlanRetrieveAgentSelector:
-    def __init__(self):
-        self.config = OrgExecutionConfigProvider()
+    def __init__(self, config_provider: Optional[OrgExecutionConfigProvider] = None):
+        self.config = config_provider or OrgExecutionConfigProvider()
         self.default_dsl_base = os.getenv("ORG_PLAN_RETRIEVE_DSL_URL")
         self.is_remote = os.getenv("PLAN_DSL_REMOTE", "false").lower() == "true"
+        self.default_cache_ttl = parse_ttl(os.getenv("PLAN_RETRIEVE_CACHE_TTL", "0"), 0.0)
+        self.selection_cache = PlanSelectionCache(
+            max_entries=int(os.getenv("PLAN_RETRIEVE_CACHE_SIZE", "10000")))
 
-    def resolve_head_agent(self, task: TaskEntry, candidate_subject_ids: List[str]) -> Optional[str]:
+    def resolve_head_agent(self, task: TaskEntry, candidate_subject_ids: Sequence[str],
+                           config: Optional[Dict[str, Optional[str]]] = None) -> Optional[str]:
         try:
             org_id = task.submitter_subject_id.split(":")[0]
+            config = config if config is not None else self.config.get_snapshot(org_id)
             dsl_id = task.task_behavior_dsl_map.get("plan_retrieve_dsl_id")
 
             if not dsl_id:
-                dsl_id = self.config.get(org_id, "plan_retrieve_dsl_id")
+                dsl_id = config.get("plan_retrieve_dsl_id")
 
             if not dsl_id or not self.default_dsl_base:
                 raise ValueError("Missing DSL ID or base URL for plan+retrieve")
 
+            # Selection memoization is opt-in per org through plan_retrieve_cache_ttl
+            cache_ttl = parse_ttl(config.get("plan_retrieve_cache_ttl") or self.default_cache_ttl,
+                                  self.default_cache_ttl)
+            cache_key = None
+            if cache_ttl > 0:
+                cache_key = self.selection_cache.key(dsl_id, task, candidate_subject_ids)
+                cached = self.selection_cache.get(cache_key)
+                if cached:
+                    logger.info(f"Plan+Retrieve selection cache hit: {cached}")
+                    return cached
+
             logger.info(f"Executing plan+retrieve DSL: {dsl_id} for org: {org_id}")
 
             executor = new_dsl_workflow_executor(
@@ -39,7 +138,7 @@ class PlanRetrieveAgentSelector:
                     "goal": task.task_goal,
                     "intent": task.task_intent,
                     "submitter_subject_id": task.submitter_subject_id,
-                    "candidate_subject_ids": candidate_subject_ids,
+                    "candidate_subject_ids": list(candidate_subject_ids),
                     "job_space_id": task.task_job_submission_data.get("job_space_id"),
                 }
             }
@@ -52,6 +151,9 @@ class PlanRetrieveAgentSelector:
 
             selected = result["head_agent_subject_id"]
             logger.info(f"Plan+Retrieve selected agent: {selected}")
+
+            if cache_key and selected:
+                self.selection_cache.put(cache_key, selected, cache_ttl)
             return selected
 
         except Exception as e:
@@ -1,5 +1,5 @@
 import logging
-from typing import Optional, List
+from typing import Dict, Optional, List
 from ..schema import TaskEntry
 from ..config import OrgExecutionConfigProvider
 
@@ -7,13 +7,15 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("StaticAgentSelector")
 
 class StaticAgentSelector:
-    def __init__(self):
-        self.config = OrgExecutionConfigProvider()
+    def __init__(self, config_provider: Optional[OrgExecutionConfigProvider] = None):
+        self.config = config_provider or OrgExecutionConfigProvider()
 
-    def resolve_head_agent(self, task: TaskEntry, candidate_subject_ids: List[str]) -> Optional[str]:
+    def resolve_head_agent(self, task: TaskEntry, candidate_subject_ids: List[str],
+                           config: Optional[Dict[str, Optional[str]]] = None) -> Optional[str]:
         try:
             org_id = task.submitter_subject_id.split(":")[0]  
-            head_subject_id = self.config.get(org_id, "static_head_agent_subject_id")
+            config = config if config is not None else self.config.get_snapshot(org_id)
+            head_subject_id = config.get("static_head_agent_subject_id")
 
             if not head_subject_id:
                 raise ValueError(f"Static agent subject ID not configured for org: {org_id}")
@@ -0,0 +1,96 @@
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("CandidatePoolCache")
+
+
+class CandidatePoolCache:
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("CANDIDATE_POOL_CACHE_TTL", "30"))
+        self._entries: Dict[str, Tuple[float, Tuple[str, ...]]] = {}
+        self._generations: Dict[str, int] = {}
+        self._global_generation = 0
+        self._loader_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _loader_lock(self, job_space_id: str) -> threading.Lock:
+        with self._lock:
+            lock = self._loader_locks.get(job_space_id)
+            if lock is None:
+                lock = threading.Lock()
+                self._loader_locks[job_space_id] = lock
+            return lock
+
+    def _generation(self, job_space_id: str) -> Tuple[int, int]:
+        return self._global_generation, self._generations.get(job_space_id, 0)
+
+    def get(self, job_space_id: str) -> Optional[Sequence[str]]:
+        with self._lock:
+            return self._lookup(job_space_id)
+
+    def _lookup(self, job_space_id: str) -> Optional[Sequence[str]]:
+        entry = self._entries.get(job_space_id)
+        if entry is None:
+            return None
+        expires_at, subject_ids = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(job_space_id, None)
+            return None
+        return subject_ids
+
+    def _lookup_counted(self, job_space_id: str) -> Optional[Sequence[str]]:
+        with self._lock:
+            cached = self._lookup(job_space_id)
+            if cached is not None:
+                self.hits += 1
+            return cached
+
+    def get_or_load(self, job_space_id: str, loader: Callable[[], Optional[List[str]]]) -> Optional[Sequence[str]]:
+        # Cached pools are returned as shared tuples so repeat callers can compare them by identity
+        cached = self._lookup_counted(job_space_id)
+        if cached is not None:
+            return cached
+
+        # Serialize loads per job space so a burst of tasks triggers a single resolution
+        with self._loader_lock(job_space_id):
+            cached = self._lookup_counted(job_space_id)
+            if cached is not None:
+                return cached
+
+            with self._lock:
+                self.misses += 1
+                generation = self._generation(job_space_id)
+
+            subject_ids = loader()
+            if subject_ids is None:
+                return None
+            subject_ids = tuple(subject_ids)
+
+            with self._lock:
+                # Drop the result if the pool was invalidated while it was being resolved
+                if generation == self._generation(job_space_id):
+                    self._entries[job_space_id] = (
+                        time.monotonic() + self.ttl_seconds, subject_ids)
+            return subject_ids
+
+    def invalidate(self, job_space_id: Optional[str] = None):
+        with self._lock:
+            if job_space_id:
+                self._entries.pop(job_space_id, None)
+                self._generations[job_space_id] = self._generations.get(job_space_id, 0) + 1
+                logger.info(f"Invalidated candidate pool for job space {job_space_id}")
+            else:
+                self._entries.clear()
+                self._global_generation += 1
+                logger.info("Invalidated all cached candidate pools")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
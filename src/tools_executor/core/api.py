@@ -2,13 +2,20 @@ from flask import Flask, request, jsonify
 import logging
 
 from .crud import OrgTools, OrgFunctions, OrgToolsDatabase, OrgFunctionsDatabase
-from .registry import register_tool_entry, register_function_entry
+from .loaders import register_tool_entry, register_function_entry
+from .executor import tool_executor_cache, function_executor_cache, result_cache
+from .ws import tool_executor, function_executor
+from .registry_index import UnsupportedQuery, get_tools_index, get_functions_index
+from .search_index import get_search_index
 
 app = Flask(__name__)
 logger = logging.getLogger(__name__)
 
 tool_db = OrgToolsDatabase()
 function_db = OrgFunctionsDatabase()
+tools_index = get_tools_index()
+functions_index = get_functions_index()
+search_index = get_search_index()
 
 # -------------------------------
 # Tool APIs
@@ -20,6 +27,7 @@ def create_tool():
         data = request.json
         tool = OrgTools.from_dict(data)
         success, result = tool_db.insert(tool)
+        tools_index.refresh(tool.tool_id)
         if success:
             return jsonify({"success": True, "data": {"message": "Tool created", "id": result}}), 201
         else:
@@ -45,6 +53,9 @@ def update_tool(tool_id):
     try:
         update_data = request.json
         success, result = tool_db.update(tool_id, update_data)
+        tool_executor_cache.invalidate(tool_id)
+        result_cache.invalidate("tool", tool_id)
+        tools_index.refresh(tool_id)
         if success:
             return jsonify({"success": True, "data": {"message": "Tool updated"}}), 200
         else:
@@ -57,6 +68,9 @@ def update_tool(tool_id):
 def delete_tool(tool_id):
     try:
         success, result = tool_db.delete(tool_id)
+        tool_executor_cache.invalidate(tool_id)
+        result_cache.invalidate("tool", tool_id)
+        tools_index.refresh(tool_id)
         if success:
             return jsonify({"success": True, "data": {"message": "Tool deleted"}}), 200
         else:
@@ -68,8 +82,11 @@ def delete_tool(tool_id):
 @app.route('/tools', methods=['POST'])
 def query_tools():
     try:
-        query_filter = request.json
-        success, results = tool_db.query(query_filter)
+        query_filter = request.json or {}
+        try:
+            success, results = True, tools_index.query(query_filter)
+        except UnsupportedQuery:
+            success, results = tool_db.query(query_filter)
         if success:
             return jsonify({"success": True, "data": results}), 200
         else:
@@ -78,10 +95,36 @@ def query_tools():
         logger.error(f"query_tools error: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/tools/search', methods=['GET'])
+def search_tools():
+    try:
+        query = request.args.get("q", "")
+        tags = [tag for tag in request.args.get("tags", "").split(",") if tag.strip()]
+        kind = request.args.get("kind") or None
+        if kind not in (None, "tool", "function"):
+            return jsonify({"success": False, "error": "kind must be tool or function"}), 400
+        if not query.strip() and not tags:
+            return jsonify({"success": False, "error": "Provide q or tags"}), 400
+        limit = min(max(1, int(request.args.get("limit", 20))), 100)
+
+        results = []
+        for (entry_kind, entry_id), score in search_index.search(query, tags=tags, kind=kind, limit=limit):
+            index = tools_index if entry_kind == "tool" else functions_index
+            entry = index.get(entry_id)
+            if entry is not None:
+                results.append({"kind": entry_kind, "id": entry_id, "score": score, "entry": entry})
+        return jsonify({"success": True, "data": results}), 200
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"search_tools error: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @app.route('/tool/register/<string:tool_id>', methods=['POST'])
 def register_tool(tool_id):
     try:
         success, result = register_tool_entry(tool_id)
+        tools_index.refresh(tool_id)
         if success:
             return jsonify({"success": True, "message": result}), 201
         else:
@@ -101,6 +144,7 @@ def create_function():
         data = request.json
         fn = OrgFunctions.from_dict(data)
         success, result = function_db.insert(fn)
+        functions_index.refresh(fn.function_id)
         if success:
             return jsonify({"success": True, "data": {"message": "Function created", "id": result}}), 201
         else:
@@ -126,6 +170,9 @@ def update_function(function_id):
     try:
         update_data = request.json
         success, result = function_db.update(function_id, update_data)
+        function_executor_cache.invalidate(function_id)
+        result_cache.invalidate("function", function_id)
+        functions_index.refresh(function_id)
         if success:
             return jsonify({"success": True, "data": {"message": "Function updated"}}), 200
         else:
@@ -138,6 +185,9 @@ def update_function(function_id):
 def delete_function(function_id):
     try:
         success, result = function_db.delete(function_id)
+        function_executor_cache.invalidate(function_id)
+        result_cache.invalidate("function", function_id)
+        functions_index.refresh(function_id)
         if success:
             return jsonify({"success": True, "data": {"message": "Function deleted"}}), 200
         else:
@@ -149,8 +199,11 @@ def delete_function(function_id):
 @app.route('/functions', methods=['POST'])
 def query_functions():
     try:
-        query_filter = request.json
-        success, results = function_db.query(query_filter)
+        query_filter = request.json or {}
+        try:
+            success, results = True, functions_index.query(query_filter)
+        except UnsupportedQuery:
+            success, results = function_db.query(query_filter)
         if success:
             return jsonify({"success": True, "data": results}), 200
         else:
@@ -163,6 +216,7 @@ def query_functions():
 def register_function(function_id):
     try:
         success, result = register_function_entry(function_id)
+        functions_index.refresh(function_id)
         if success:
             return jsonify({"success": True, "message": result}), 201
         else:
@@ -172,3 +226,31 @@ def register_function(function_id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+# -------------------------------
+# Executor cache APIs
+# -------------------------------
+
+@app.route('/executor-cache/stats', methods=['GET'])
+def executor_cache_stats():
+    return jsonify({"success": True, "data": {
+        "tools": tool_executor_cache.stats(),
+        "functions": function_executor_cache.stats(),
+        "results": result_cache.stats()
+    }}), 200
+
+
+@app.route('/executor/stats', methods=['GET'])
+def executor_stats():
+    return jsonify({"success": True, "data": {
+        "tools": tool_executor.stats(),
+        "functions": function_executor.stats()
+    }}), 200
+
+
+@app.route('/registry-index/stats', methods=['GET'])
+def registry_index_stats():
+    return jsonify({"success": True, "data": {
+        "tools": tools_index.stats(),
+        "functions": functions_index.stats(),
+        "search": search_index.stats()
+    }}), 200
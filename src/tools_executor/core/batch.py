@@ -0,0 +1,238 @@
+import json
+import uuid
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+REF_KEY = "$ref"
+
+
+def find_refs(value: Any) -> Set[str]:
+    """Returns the call ids referenced by {"$ref": "<call_id>[.path]"} placeholders."""
+    if isinstance(value, dict):
+        if set(value) == {REF_KEY} and isinstance(value[REF_KEY], str):
+            return {value[REF_KEY].split(".", 1)[0]}
+        refs = set()
+        for item in value.values():
+            refs |= find_refs(item)
+        return refs
+    if isinstance(value, list):
+        refs = set()
+        for item in value:
+            refs |= find_refs(item)
+        return refs
+    return set()
+
+
+def _lookup(outputs: Dict[str, Any], ref: str) -> Any:
+    parts = ref.split(".")
+    value = outputs[parts[0]]
+    for part in parts[1:]:
+        value = value[int(part)] if isinstance(value, list) else value[part]
+    return value
+
+
+def resolve_refs(value: Any, outputs: Dict[str, Any]) -> Any:
+    if isinstance(value, dict):
+        if set(value) == {REF_KEY} and isinstance(value[REF_KEY], str):
+            return _lookup(outputs, value[REF_KEY])
+        return {key: resolve_refs(item, outputs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_refs(item, outputs) for item in value]
+    return value
+
+
+def validate_batch(calls: Any, exists: Callable[[str, str], bool],
+                   max_calls: int) -> Tuple[List[str], Dict[str, Set[str]]]:
+    """Checks the whole batch before anything runs; returns (errors, dependencies per call id)."""
+    if not isinstance(calls, list) or not calls:
+        return ["calls must be a non-empty list"], {}
+    if len(calls) > max_calls:
+        return [f"Batch has {len(calls)} calls, the limit is {max_calls}"], {}
+
+    errors: List[str] = []
+    ids: Set[str] = set()
+    for i, call in enumerate(calls):
+        if not isinstance(call, dict):
+            errors.append(f"calls[{i}] must be an object")
+            continue
+        call_id = call.get("id")
+        if not call_id or not isinstance(call_id, str):
+            errors.append(f"calls[{i}] is missing an id")
+        elif call_id in ids:
+            errors.append(f"Duplicate call id {call_id}")
+        else:
+            ids.add(call_id)
+        if bool(call.get("tool_id")) == bool(call.get("function_id")):
+            errors.append(f"Call {call_id} must set exactly one of tool_id or function_id")
+        elif call.get("tool_id") and not exists("tool", call["tool_id"]):
+            errors.append(f"Call {call_id}: tool {call['tool_id']} is not registered")
+        elif call.get("function_id") and not exists("function", call["function_id"]):
+            errors.append(f"Call {call_id}: function {call['function_id']} is not registered")
+        if not call.get("input_data"):
+            errors.append(f"Call {call_id} is missing input_data")
+        depends_on = call.get("depends_on", [])
+        if not isinstance(depends_on, list) or not all(isinstance(dep, str) for dep in depends_on):
+            errors.append(f"Call {call_id}: depends_on must be a list of call ids")
+    if errors:
+        return errors, {}
+
+    deps = {call["id"]: set(call.get("depends_on") or []) | find_refs(call["input_data"]) for call in calls}
+    for call_id, call_deps in deps.items():
+        for dep in sorted(call_deps - ids):
+            errors.append(f"Call {call_id} depends on unknown call {dep}")
+        if call_id in call_deps:
+            errors.append(f"Call {call_id} depends on itself")
+    if errors:
+        return errors, {}
+
+    # Kahn's algorithm; whatever cannot be ordered is part of a cycle
+    remaining = {call_id: set(call_deps) for call_id, call_deps in deps.items()}
+    ready = [call_id for call_id, call_deps in remaining.items() if not call_deps]
+    while ready:
+        done = ready.pop()
+        del remaining[done]
+        for call_id, call_deps in remaining.items():
+            if done in call_deps:
+                call_deps.discard(done)
+                if not call_deps:
+                    ready.append(call_id)
+    if remaining:
+        errors.append(f"Dependency cycle between calls {sorted(remaining)}")
+    return errors, deps
+
+
+class BatchRun:
+    """Runs one validated batch over a websocket.
+
+    Calls whose dependencies are satisfied are submitted together, so independent
+    calls run concurrently on the worker pools. Each result is streamed as soon as
+    it completes; calls depending on a failed call fail without running.
+    """
+
+    def __init__(self, websocket, batch_id: str, calls: List[Dict[str, Any]], deps: Dict[str, Set[str]],
+                 submit: Callable[[str, Dict[str, Any]], Tuple[bool, str]], routes: Dict[str, Any],
+                 priority: Optional[str] = None):
+        self.websocket = websocket
+        self.batch_id = batch_id
+        self.calls = {call["id"]: call for call in calls}
+        self.waiting = {call_id: set(call_deps) for call_id, call_deps in deps.items()}
+        self.dependents: Dict[str, List[str]] = {call_id: [] for call_id in self.calls}
+        for call_id, call_deps in deps.items():
+            for dep in call_deps:
+                self.dependents[dep].append(call_id)
+        self.submit = submit
+        self.routes = routes
+        self.priority = priority
+
+        self.loop = asyncio.get_event_loop()
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        self.outputs: Dict[str, Any] = {}
+        self.uuids: Dict[str, str] = {}  # task uuid -> call id
+        self.finished: Set[str] = set()
+        self.failed = 0
+        self.done = asyncio.Event()
+        self.closed = False
+
+    def deliver(self, result: Dict[str, Any]):
+        self.loop.call_soon_threadsafe(self._on_result, result)
+
+    def _on_result(self, result: Dict[str, Any]):
+        call_id = self.uuids.pop(result["uuid"], None)
+        if call_id is None or self.closed:
+            return
+        if result.get("error"):
+            self._finish(call_id, error=result["error"])
+        else:
+            self._finish(call_id, output=result.get("output"))
+
+    def _finish(self, call_id: str, output: Any = None, error: Optional[str] = None):
+        if call_id in self.finished:
+            return
+        self.finished.add(call_id)
+
+        message = {"type": "result", "batch_id": self.batch_id, "id": call_id}
+        if error is not None:
+            self.failed += 1
+            message.update({"success": False, "error": error})
+        else:
+            self.outputs[call_id] = output
+            message.update({"success": True, "output": output})
+        self.outbox.put_nowait(message)
+
+        for dependent in self.dependents[call_id]:
+            if error is not None:
+                self._finish(dependent, error=f"Dependency {call_id} failed")
+                continue
+            self.waiting[dependent].discard(call_id)
+            if not self.waiting[dependent] and dependent not in self.finished:
+                asyncio.ensure_future(self._submit(dependent))
+
+        if len(self.finished) == len(self.calls):
+            self.done.set()
+
+    async def _submit(self, call_id: str):
+        call = self.calls[call_id]
+        try:
+            input_data = resolve_refs(call["input_data"], self.outputs)
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            self._finish(call_id, error=f"Unresolvable reference in call {call_id}: {e}")
+            return
+
+        task_uuid = str(uuid.uuid4())
+        self.uuids[task_uuid] = call_id
+        self.routes[task_uuid] = self
+        message = {**call, "input_data": input_data, "priority": call.get("priority") or self.priority}
+        try:
+            success, msg = await self.loop.run_in_executor(None, self.submit, task_uuid, message)
+        except Exception as e:
+            success, msg = False, str(e)
+        if not success:
+            self.routes.pop(task_uuid, None)
+            self.uuids.pop(task_uuid, None)
+            self._finish(call_id, error=msg)
+
+    async def _write_loop(self):
+        while True:
+            message = await self.outbox.get()
+            if message is None:
+                return
+            try:
+                await self.websocket.send(json.dumps(message))
+            except Exception as e:
+                logger.warning(f"Batch {self.batch_id} send failed: {e}")
+                return
+
+    async def serve(self):
+        writer = asyncio.ensure_future(self._write_loop())
+        self.outbox.put_nowait({"type": "accepted", "batch_id": self.batch_id, "calls": len(self.calls)})
+        for call_id, call_deps in self.waiting.items():
+            if not call_deps:
+                asyncio.ensure_future(self._submit(call_id))
+
+        closed = asyncio.ensure_future(self.websocket.wait_closed())
+        finished = asyncio.ensure_future(self.done.wait())
+        try:
+            await asyncio.wait({closed, finished}, return_when=asyncio.FIRST_COMPLETED)
+            if self.done.is_set():
+                self.outbox.put_nowait({
+                    "type": "done",
+                    "batch_id": self.batch_id,
+                    "succeeded": len(self.calls) - self.failed,
+                    "failed": self.failed
+                })
+                logger.info(f"Batch {self.batch_id} finished: {len(self.calls) - self.failed}/{len(self.calls)} succeeded")
+            else:
+                logger.info(f"Client disconnected before batch {self.batch_id} finished")
+        finally:
+            closed.cancel()
+            finished.cancel()
+            self.closed = True
+            for task_uuid in list(self.uuids):
+                self.routes.pop(task_uuid, None)
+            self.uuids.clear()
+            self.outbox.put_nowait(None)
+            await writer
@@ -0,0 +1,251 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import redis
+except ImportError:  # The shared Redis tier is optional
+    redis = None
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def entry_version(metadata: Dict[str, Any]) -> str:
+    version = (metadata or {}).get("version", "")
+    if isinstance(version, (dict, list)):
+        return json.dumps(version, sort_keys=True)
+    return str(version)
+
+
+class ExecutorCache:
+    """Bounded LRU of initialized executors keyed by (entry id, version).
+
+    Concurrent misses on the same key share one build instead of each fetching
+    the definition from the registry.
+    """
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max(1, max_size)
+        self.entries: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self.building: Dict[Tuple[str, str], Future] = {}
+        self.generations: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, entry_id: str, version: str, build: Callable[[], Any]) -> Any:
+        key = (entry_id, version)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            pending = self.building.get(key)
+            owner = pending is None
+            if owner:
+                pending = self.building[key] = Future()
+
+        if not owner:
+            return pending.result()
+
+        try:
+            executor = build()
+        except Exception as e:
+            with self.lock:
+                self.building.pop(key, None)
+            pending.set_exception(e)
+            raise
+
+        with self.lock:
+            # An invalidation while building drops the pending entry; do not cache a stale executor
+            if self.building.pop(key, None) is pending:
+                self.entries[key] = executor
+                while len(self.entries) > self.max_size:
+                    evicted, _ = self.entries.popitem(last=False)
+                    self.evictions += 1
+                    logger.info(f"Evicted executor {evicted[0]} ({evicted[1] or 'unversioned'})")
+        pending.set_result(executor)
+        return executor
+
+    def generation(self, entry_id: str) -> int:
+        """Counts invalidations of entry_id; lets other processes' caches notice them."""
+        with self.lock:
+            return self.generations.get(entry_id, 0)
+
+    def invalidate(self, entry_id: str) -> int:
+        """Drops every cached version of entry_id."""
+        with self.lock:
+            self.generations[entry_id] = self.generations.get(entry_id, 0) + 1
+            stale = [key for key in self.entries if key[0] == entry_id]
+            for key in stale:
+                del self.entries[key]
+            for key in [key for key in self.building if key[0] == entry_id]:
+                del self.building[key]
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached executor(s) for {entry_id}")
+        return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": [{"id": key[0], "version": key[1]} for key in self.entries]
+            }
+
+
+def _digest(value: str) -> str:
+    # Ids may contain ':' or glob characters; hash them so keys stay unambiguous
+    return hashlib.sha1(value.encode()).hexdigest()[:16]
+
+
+def input_hash(input_data: Any) -> str:
+    canonical = json.dumps(input_data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def result_cache_ttl(default_params: Dict[str, Any], default_ttl: float) -> Optional[float]:
+    """Returns the TTL for an entry that opted in with cacheable: true, otherwise None."""
+    params = default_params or {}
+    if not params.get("cacheable"):
+        return None
+    try:
+        ttl = float(params.get("ttl") or default_ttl)
+    except (TypeError, ValueError):
+        ttl = default_ttl
+    return ttl if ttl > 0 else None
+
+
+class ResultCache:
+    """Outputs of deterministic tools and functions keyed by (kind, id, version, input hash).
+
+    A bounded in-process LRU, optionally backed by Redis so replicas share entries.
+    Invalidation clears this process and Redis; other replicas may serve their local
+    copies until those expire.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_item_bytes: int = 1 << 20,
+                 redis_url: str = "", prefix: str = "tools_executor:result"):
+        self.max_entries = max(1, max_entries)
+        self.max_item_bytes = max_item_bytes
+        self.prefix = prefix
+        self.entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.generations: Dict[Tuple[str, str], int] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+        self.redis = None
+        if redis_url:
+            if redis is None:
+                logger.warning("redis is not installed; result cache runs without the shared tier")
+            else:
+                self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+                logger.info("Result cache shared tier enabled")
+
+    def key(self, kind: str, entry_id: str, version: str, input_data: Any) -> str:
+        return f"{self.prefix}:{kind}:{_digest(entry_id)}:{_digest(version)}:{input_hash(input_data)}"
+
+    def _store_local(self, key: str, expires_at: float, value: Any):
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        now = time.time()
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached is not None:
+                if cached[0] > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return True, cached[1]
+                del self.entries[key]
+
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(key)
+                if raw is not None:
+                    ttl = self.redis.ttl(key)
+                    value = json.loads(raw)
+                    self._store_local(key, now + (ttl if ttl and ttl > 0 else 1), value)
+                    with self.lock:
+                        self.redis_hits += 1
+                    return True, value
+            except Exception as e:
+                logger.warning(f"Result cache Redis read failed: {e}")
+
+        with self.lock:
+            self.misses += 1
+        return False, None
+
+    def generation(self, kind: str, entry_id: str) -> int:
+        """Counts invalidations of one entry; put() drops results computed before the latest one."""
+        with self.lock:
+            return self.generations.get((kind, entry_id), 0)
+
+    def put(self, key: str, value: Any, ttl: float, generation: Optional[Tuple[str, str, int]] = None):
+        """generation is (kind, entry_id, generation) as read before the task ran."""
+        try:
+            # Only JSON outputs are cached, so a hit returns exactly what a run would
+            raw = json.dumps(value)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Result for {key} is not serializable, not caching: {e}")
+            return
+        if len(raw) > self.max_item_bytes:
+            return
+
+        with self.lock:
+            if generation is not None and self.generations.get(generation[:2], 0) != generation[2]:
+                # The entry was updated while this task ran; its output may be stale
+                return
+            self.stores += 1
+        self._store_local(key, time.time() + ttl, value)
+        if self.redis is not None:
+            try:
+                self.redis.set(key, raw, ex=max(1, int(ttl)))
+            except Exception as e:
+                logger.warning(f"Result cache Redis write failed: {e}")
+
+    def invalidate(self, kind: str, entry_id: str) -> int:
+        prefix = f"{self.prefix}:{kind}:{_digest(entry_id)}:"
+        with self.lock:
+            self.generations[(kind, entry_id)] = self.generations.get((kind, entry_id), 0) + 1
+            stale = [key for key in self.entries if key.startswith(prefix)]
+            for key in stale:
+                del self.entries[key]
+        if self.redis is not None:
+            try:
+                keys = list(self.redis.scan_iter(match=f"{prefix}*", count=500))
+                if keys:
+                    self.redis.delete(*keys)
+            except Exception as e:
+                logger.warning(f"Result cache Redis invalidation failed: {e}")
+        return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "shared_tier": self.redis is not None,
+            }
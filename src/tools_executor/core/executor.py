@@ -1,20 +1,57 @@
 import os
 import time
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from queue import Queue
-from typing import Tuple, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
 from agent_functions.sdk import FunctionExecutor
 from agent_functions.db_client import FunctionsRegistryDB
 from agents_tools_executor import ToolExecutor
 from .crud import OrgFunctionsDatabase
 from .crud import OrgToolsDatabase
+from .registry_index import get_functions_index, get_tools_index
+from .schema import OrgFunctions, OrgTools
+from .cache import ExecutorCache, ResultCache, entry_version, result_cache_ttl
+from .scheduler import EntryLimits, TaskScheduler
 
-from .tools_registry import ToolsRegistryClient
+from .tools_registry import ToolsRegistrySDK as ToolsRegistryClient
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+tool_executor_cache = ExecutorCache(int(os.getenv("TOOL_EXECUTOR_CACHE_SIZE", "128")))
+function_executor_cache = ExecutorCache(int(os.getenv("FUNCTION_EXECUTOR_CACHE_SIZE", "128")))
+
+RESULT_CACHE_DEFAULT_TTL = float(os.getenv("RESULT_CACHE_DEFAULT_TTL", "300"))
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_SIZE", "1024")),
+    max_item_bytes=int(os.getenv("RESULT_CACHE_MAX_ITEM_BYTES", str(1 << 20))),
+    redis_url=os.getenv("RESULT_CACHE_REDIS_URL", "")
+)
+
+
+def prewarm_rank(default_params: Dict[str, Any]) -> float:
+    # prewarm: true or a number; higher ranks are warmed first
+    try:
+        return float((default_params or {}).get("prewarm") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def prewarm_entries(db, kind: str, top_n: int) -> List[Tuple[str, str]]:
+    """Returns (id, version) of the top_n entries flagged for prewarming; kind is tool or function."""
+    params_field = f"{kind}_default_params"
+    success, docs = db.query({f"{params_field}.prewarm": {"$exists": True}})
+    if not success:
+        logger.error(f"Failed to load {kind}s to prewarm: {docs}")
+        return []
+    ranked = sorted(
+        (doc for doc in docs if prewarm_rank(doc.get(params_field)) > 0),
+        key=lambda doc: prewarm_rank(doc.get(params_field)), reverse=True)
+    return [(doc[f"{kind}_id"], entry_version(doc.get(f"{kind}_metadata"))) for doc in ranked[:top_n]]
+
 
 class FunctionExecutorWrapper:
     def __init__(self, function_id: str, base_url: str):
@@ -62,87 +99,176 @@ class ToolExecutorWrapper:
             raise
 
 
+def lookup_cached_result(producer_queue: Queue, uuid: str, kind: str, entry_id: str, version: str,
+                         input_data: dict, default_params: Dict[str, Any]) -> Tuple[bool, Optional[Any]]:
+    """Serves opted-in entries from the result cache without touching the worker pool.
+
+    Returns (served, on_success); on a miss, on_success stores the eventual output.
+    """
+    ttl = result_cache_ttl(default_params, RESULT_CACHE_DEFAULT_TTL)
+    if ttl is None:
+        return False, None
+    key = result_cache.key(kind, entry_id, version, input_data)
+    generation = (kind, entry_id, result_cache.generation(kind, entry_id))
+    hit, output = result_cache.get(key)
+    if hit:
+        producer_queue.put({"uuid": uuid, "output": output})
+        logger.info(f"Task {uuid} for {entry_id} served from the result cache")
+        return True, None
+    return False, lambda output: result_cache.put(key, output, ttl, generation)
+
+
+def function_cache_version(version: str, generation: int) -> str:
+    # Worker processes keep their own executor caches; the generation bumped by an
+    # invalidation in this process gives them a new key, so stale executors age out
+    return f"{version}#{generation}"
+
+
+def run_tool_task(tool_id: str, version: str, base_url: str, input_data: dict) -> Tuple[Any, float]:
+    executor = tool_executor_cache.get(tool_id, version, lambda: ToolExecutorWrapper(tool_id, base_url))
+    started = time.time()
+    return executor.execute(input_data), time.time() - started
+
+
+def run_function_task(function_id: str, version: str, base_url: str, input_data: dict) -> Tuple[Any, float]:
+    executor = function_executor_cache.get(
+        function_id, version, lambda: FunctionExecutorWrapper(function_id, base_url))
+    started = time.time()
+    return executor.execute(input_data), time.time() - started
+
+
+def prewarm_function_worker(base_url: str, top_n: int):
+    if top_n <= 0:
+        return
+    for function_id, version in prewarm_entries(OrgFunctionsDatabase(), "function", top_n):
+        try:
+            function_executor_cache.get(
+                function_id, function_cache_version(version, 0),
+                lambda: FunctionExecutorWrapper(function_id, base_url))
+        except Exception as e:
+            logger.warning(f"Failed to prewarm function {function_id}: {e}")
+
+
 class FunctionTaskExecutor:
     def __init__(self, producer_queue: Queue, base_url: str):
-        self.consumer_queue: Queue = Queue()
         self.producer_queue = producer_queue
         self.base_url = base_url
         self.db = OrgFunctionsDatabase()
+        self.index = get_functions_index()
+
+        # Functions are CPU-bound by default and run in worker processes to escape the GIL
+        self.pool_type = os.getenv("FUNCTION_EXECUTOR_POOL", "process")
+        self.workers = int(os.getenv("FUNCTION_EXECUTOR_WORKERS", str(os.cpu_count() or 4)))
+        if self.pool_type == "process":
+            # A crashed worker process breaks the whole pool; the scheduler then builds a new one
+            self.scheduler = TaskScheduler("FunctionTaskExecutor", self._new_process_pool(), self.workers,
+                                           run_function_task, producer_queue, pool_factory=self._new_process_pool)
+        else:
+            self.scheduler = TaskScheduler("FunctionTaskExecutor", ThreadPoolExecutor(max_workers=self.workers),
+                                           self.workers, run_function_task, producer_queue)
 
-    def push_task_to_queue(self, uuid: str, function_id: str, input_data: dict) -> Tuple[bool, str]:
-        found, _ = self.db.get_by_functsion_id(function_id)
-        if not found:
+    def _new_process_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=prewarm_function_worker,
+            initargs=(self.base_url, int(os.getenv("EXECUTOR_PREWARM_TOP_N", "10")))
+        )
+
+    def push_task_to_queue(self, uuid: str, function_id: str, input_data: dict,
+                           priority: Optional[str] = None) -> Tuple[bool, str]:
+        doc = self.index.get(function_id)
+        if doc is None:
             logger.warning(
                 f"Function ID {function_id} not found. Task {uuid} not queued.")
             return False, "Function not registered"
+        entry = OrgFunctions.from_dict(doc)
 
-        self.consumer_queue.put({
-            "uuid": uuid,
-            "function_id": function_id,
-            "input_data": input_data
-        })
-        logger.info(
-            f"Task {uuid} pushed to queue for function_id: {function_id}")
-        return True, "Task queued"
+        served, on_success = lookup_cached_result(
+            self.producer_queue, uuid, "function", function_id,
+            entry_version(entry.function_metadata), input_data, entry.function_default_params)
+        if served:
+            return True, "Task served from cache"
 
-    def run(self):
-        logger.info("FunctionTaskExecutor run loop started.")
-        while True:
+        version = function_cache_version(
+            entry_version(entry.function_metadata), function_executor_cache.generation(function_id))
+        return self.scheduler.submit(
+            uuid, function_id, (function_id, version, self.base_url, input_data),
+            EntryLimits.from_params(entry.function_default_params), priority, on_success)
+
+    def get_executor(self, function_id: str, version: str) -> FunctionExecutorWrapper:
+        return function_executor_cache.get(
+            function_id, version, lambda: FunctionExecutorWrapper(function_id, self.base_url))
+
+    def prewarm(self, top_n: int) -> int:
+        if self.pool_type == "process":
+            # Each worker process warms its own cache on start (see prewarm_function_worker)
+            return 0
+        warmed = 0
+        for function_id, version in prewarm_entries(self.db, "function", top_n):
             try:
-                task = self.consumer_queue.get(block=True)
-                uuid = task["uuid"]
-                function_id = task["function_id"]
-                input_data = task["input_data"]
-
-                logger.debug(
-                    f"Processing function task {uuid} for {function_id}")
-                executor = FunctionExecutorWrapper(function_id, self.base_url)
-                result = executor.execute(input_data)
-                self.producer_queue.put({"uuid": uuid, "output": result})
-                logger.info(f"Function task {uuid} completed")
+                self.get_executor(function_id, function_cache_version(version, 0))
+                warmed += 1
             except Exception as e:
-                logger.error(f"Error processing function task {uuid}: {e}")
-            finally:
-                time.sleep(0.1)
+                logger.warning(f"Failed to prewarm function {function_id}: {e}")
+        logger.info(f"Prewarmed {warmed} function executor(s)")
+        return warmed
+
+    def run(self):
+        self.scheduler.run()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.scheduler.stats()
 
 
 class ToolTaskExecutor:
     def __init__(self, producer_queue: Queue, base_url: str):
-        self.consumer_queue: Queue = Queue()
         self.producer_queue = producer_queue
         self.base_url = base_url
         self.db = OrgToolsDatabase()
+        self.index = get_tools_index()
+
+        # Tools are mostly I/O-bound (APIs, subprocesses), so threads are enough
+        workers = int(os.getenv("TOOL_EXECUTOR_WORKERS", "16"))
+        self.scheduler = TaskScheduler(
+            "ToolTaskExecutor", ThreadPoolExecutor(max_workers=workers), workers, run_tool_task, producer_queue)
 
-    def push_task_to_queue(self, uuid: str, tool_id: str, input_data: dict) -> Tuple[bool, str]:
-        found, _ = self.db.get_by_tool_id(tool_id)
-        if not found:
+    def push_task_to_queue(self, uuid: str, tool_id: str, input_data: dict,
+                           priority: Optional[str] = None) -> Tuple[bool, str]:
+        doc = self.index.get(tool_id)
+        if doc is None:
             logger.warning(
                 f"Tool ID {tool_id} not found. Task {uuid} not queued.")
             return False, "Tool not registered"
+        entry = OrgTools.from_dict(doc)
 
-        self.consumer_queue.put({
-            "uuid": uuid,
-            "tool_id": tool_id,
-            "input_data": input_data
-        })
-        logger.info(f"Task {uuid} pushed to queue for tool_id: {tool_id}")
-        return True, "Task queued"
+        version = entry_version(entry.tool_metadata)
+        served, on_success = lookup_cached_result(
+            self.producer_queue, uuid, "tool", tool_id, version, input_data, entry.tool_default_params)
+        if served:
+            return True, "Task served from cache"
 
-    def run(self):
-        logger.info("ToolTaskExecutor run loop started.")
-        while True:
+        return self.scheduler.submit(
+            uuid, tool_id, (tool_id, version, self.base_url, input_data),
+            EntryLimits.from_params(entry.tool_default_params), priority, on_success)
+
+    def get_executor(self, tool_id: str, version: str) -> ToolExecutorWrapper:
+        return tool_executor_cache.get(
+            tool_id, version, lambda: ToolExecutorWrapper(tool_id, self.base_url))
+
+    def prewarm(self, top_n: int) -> int:
+        warmed = 0
+        for tool_id, version in prewarm_entries(self.db, "tool", top_n):
             try:
-                task = self.consumer_queue.get(block=True)
-                uuid = task["uuid"]
-                tool_id = task["tool_id"]
-                input_data = task["input_data"]
-
-                logger.debug(f"Processing tool task {uuid} for {tool_id}")
-                executor = ToolExecutorWrapper(tool_id, self.base_url)
-                result = executor.execute(input_data)
-                self.producer_queue.put({"uuid": uuid, "output": result})
-                logger.info(f"Tool task {uuid} completed")
+                self.get_executor(tool_id, version)
+                warmed += 1
             except Exception as e:
-                logger.error(f"Error processing tool task {uuid}: {e}")
-            finally:
-                time.sleep(0.1)
+                logger.warning(f"Failed to prewarm tool {tool_id}: {e}")
+        logger.info(f"Prewarmed {warmed} tool executor(s)")
+        return warmed
+
+    def run(self):
+        self.scheduler.run()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.scheduler.stats()
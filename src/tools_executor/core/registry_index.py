@@ -0,0 +1,299 @@
+import os
+import re
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from pymongo import errors
+
+from .crud import OrgFunctionsDatabase, OrgToolsDatabase
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class UnsupportedQuery(Exception):
+    pass
+
+
+def _resolve(value: Any, parts: List[str]) -> List[Any]:
+    if not parts:
+        return [value]
+    if isinstance(value, dict):
+        return _resolve(value[parts[0]], parts[1:]) if parts[0] in value else []
+    if isinstance(value, list):
+        resolved = []
+        for item in value:
+            resolved.extend(_resolve(item, parts))
+        return resolved
+    return []
+
+
+def _candidates(resolved: List[Any]) -> List[Any]:
+    # Like Mongo, an array field matches on the array itself or on any element
+    candidates = []
+    for value in resolved:
+        candidates.append(value)
+        if isinstance(value, list):
+            candidates.extend(value)
+    return candidates
+
+
+def _compare(candidates: List[Any], operand: Any, op) -> bool:
+    for candidate in candidates:
+        try:
+            if op(candidate, operand):
+                return True
+        except TypeError:
+            continue
+    return False
+
+
+def _match_operator(resolved: List[Any], operator: str, operand: Any, condition: Dict[str, Any]) -> bool:
+    candidates = _candidates(resolved)
+    if operator == "$eq":
+        return operand in candidates
+    if operator == "$ne":
+        return operand not in candidates
+    if operator == "$in":
+        return any(value in candidates for value in operand)
+    if operator == "$nin":
+        return not any(value in candidates for value in operand)
+    if operator == "$all":
+        return all(value in candidates for value in operand)
+    if operator == "$exists":
+        return bool(resolved) == bool(operand)
+    if operator == "$size":
+        return any(isinstance(value, list) and len(value) == operand for value in resolved)
+    if operator == "$gt":
+        return _compare(candidates, operand, lambda a, b: a > b)
+    if operator == "$gte":
+        return _compare(candidates, operand, lambda a, b: a >= b)
+    if operator == "$lt":
+        return _compare(candidates, operand, lambda a, b: a < b)
+    if operator == "$lte":
+        return _compare(candidates, operand, lambda a, b: a <= b)
+    if operator == "$regex":
+        flags = 0
+        for option in condition.get("$options", ""):
+            flags |= {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}.get(option, 0)
+        pattern = re.compile(operand, flags)
+        return any(isinstance(value, str) and pattern.search(value) for value in candidates)
+    if operator == "$options":
+        return True
+    raise UnsupportedQuery(operator)
+
+
+def matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    """Evaluates the common subset of Mongo query operators against one document."""
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(matches(doc, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, clause) for clause in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, clause) for clause in condition):
+                return False
+        elif key.startswith("$"):
+            raise UnsupportedQuery(key)
+        else:
+            resolved = _resolve(doc, key.split("."))
+            if isinstance(condition, dict) and condition and all(op.startswith("$") for op in condition):
+                if not all(_match_operator(resolved, op, operand, condition) for op, operand in condition.items()):
+                    return False
+            elif condition not in _candidates(resolved):
+                return False
+    return True
+
+
+class RegistryIndex:
+    """In-memory copy of one registry collection, keyed by its id field.
+
+    Kept in sync from a change stream, or by periodic reloads where change
+    streams are unavailable. Lookups that miss read through to Mongo so an
+    entry registered by another replica is usable before its change arrives.
+    Listeners are told about every change with entry_updated(key, doc),
+    entry_removed(key) and entries_reloaded(entries).
+    """
+
+    def __init__(self, collection, key_field: str, name: str):
+        self.collection = collection
+        self.key_field = key_field
+        self.name = name
+        self.poll_interval = float(os.getenv("REGISTRY_INDEX_POLL_INTERVAL", "10"))
+
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.doc_keys: Dict[Any, str] = {}  # Mongo _id -> key, needed to resolve change stream deletes
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.mode = "starting"
+        self.last_sync = 0.0
+        self.listeners: List[Any] = []
+
+        self.thread = threading.Thread(target=self._sync_loop, daemon=True)
+        self.thread.start()
+
+    # ---------------- Sync ----------------
+
+    def add_listener(self, listener):
+        with self.lock:
+            self.listeners.append(listener)
+            entries = dict(self.entries)
+        if entries:
+            listener.entries_reloaded(entries)
+
+    def _notify(self, event: str, *args):
+        for listener in self.listeners:
+            try:
+                getattr(listener, event)(*args)
+            except Exception as e:
+                logger.error(f"Registry index {self.name} listener failed on {event}: {e}")
+
+    def _apply(self, doc: Dict[str, Any]):
+        key = doc.get(self.key_field)
+        if not key:
+            return
+        doc = dict(doc)
+        doc_id = doc.pop("_id", None)
+        with self.lock:
+            if doc_id is not None:
+                self.doc_keys[doc_id] = key
+            self.entries[key] = doc
+            self._notify("entry_updated", key, doc)
+
+    def _remove_doc(self, doc_id: Any):
+        with self.lock:
+            key = self.doc_keys.pop(doc_id, None)
+            if key is not None:
+                self.entries.pop(key, None)
+                self._notify("entry_removed", key)
+
+    def reload(self):
+        entries, doc_keys = {}, {}
+        for doc in self.collection.find({}):
+            key = doc.get(self.key_field)
+            if not key:
+                continue
+            doc_keys[doc.pop("_id")] = key
+            entries[key] = doc
+        with self.lock:
+            self.entries = entries
+            self.doc_keys = doc_keys
+            self.last_sync = time.time()
+            snapshot = dict(entries) if self.listeners else {}
+        if self.listeners:
+            self._notify("entries_reloaded", snapshot)
+        self.ready.set()
+        logger.info(f"Registry index {self.name} loaded: {len(entries)} entries")
+
+    def refresh(self, key: str):
+        """Re-reads one entry after a local write so it is visible immediately."""
+        try:
+            doc = self.collection.find_one({self.key_field: key})
+        except errors.PyMongoError as e:
+            logger.error(f"Failed to refresh {self.name} entry {key}: {e}")
+            return
+        if doc:
+            self._apply(doc)
+        else:
+            with self.lock:
+                self.entries.pop(key, None)
+                for doc_id in [doc_id for doc_id, k in self.doc_keys.items() if k == key]:
+                    del self.doc_keys[doc_id]
+                self._notify("entry_removed", key)
+
+    def _handle_change(self, change: Dict[str, Any]):
+        operation = change.get("operationType")
+        if operation in ("insert", "update", "replace") and change.get("fullDocument"):
+            self._apply(change["fullDocument"])
+        elif operation == "delete":
+            self._remove_doc(change["documentKey"]["_id"])
+        elif operation in ("drop", "rename", "dropDatabase", "invalidate"):
+            raise errors.PyMongoError(f"Change stream ended by {operation}")
+        self.last_sync = time.time()
+
+    def _watch(self):
+        with self.collection.watch(full_document="updateLookup") as stream:
+            # The stream is opened before loading so no change between the two is missed
+            self.reload()
+            self.mode = "change_stream"
+            for change in stream:
+                self._handle_change(change)
+
+    def _poll(self):
+        self.mode = "polling"
+        while True:
+            try:
+                self.reload()
+            except errors.PyMongoError as e:
+                logger.error(f"Registry index {self.name} poll failed: {e}")
+            time.sleep(self.poll_interval)
+
+    def _sync_loop(self):
+        while True:
+            try:
+                self._watch()
+            except errors.OperationFailure as e:
+                # Stand-alone servers do not support change streams
+                logger.warning(f"Change streams unavailable, polling {self.name} instead: {e}")
+                self._poll()
+            except Exception as e:
+                logger.error(f"Registry index {self.name} change stream failed, restarting: {e}")
+                time.sleep(1)
+
+    # ---------------- Queries ----------------
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None:
+            return entry
+        self.refresh(key)
+        with self.lock:
+            return self.entries.get(key)
+
+    def query(self, query_filter: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Raises UnsupportedQuery for operators the in-memory matcher does not implement."""
+        if not self.ready.is_set():
+            raise UnsupportedQuery("index not loaded")
+        with self.lock:
+            entries = list(self.entries.values())
+        if not query_filter:
+            return entries
+        return [entry for entry in entries if matches(entry, query_filter)]
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "name": self.name,
+                "mode": self.mode,
+                "ready": self.ready.is_set(),
+                "entries": len(self.entries),
+                "last_sync": self.last_sync,
+            }
+
+
+_tools_index: Optional[RegistryIndex] = None
+_functions_index: Optional[RegistryIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_tools_index() -> RegistryIndex:
+    global _tools_index
+    if _tools_index is None:
+        with _index_lock:
+            if _tools_index is None:
+                _tools_index = RegistryIndex(OrgToolsDatabase().collection, "tool_id", "org_tools")
+    return _tools_index
+
+
+def get_functions_index() -> RegistryIndex:
+    global _functions_index
+    if _functions_index is None:
+        with _index_lock:
+            if _functions_index is None:
+                _functions_index = RegistryIndex(OrgFunctionsDatabase().collection, "function_id", "org_functions")
+    return _functions_index
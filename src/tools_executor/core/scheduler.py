@@ -0,0 +1,238 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import BrokenExecutor, Executor, Future
+from dataclasses import dataclass
+from queue import Queue
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# Lanes are drained in this order; batch work only runs when no interactive work can
+LANES = ("interactive", "batch")
+
+
+def _int_param(params: Dict[str, Any], key: str, env: str, default: int) -> int:
+    # Malformed values fall back to the defaults rather than rejecting every submission
+    for value in (params.get(key), os.getenv(env)):
+        if value is None:
+            continue
+        try:
+            return max(0, int(value))
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring invalid {key} value {value!r}")
+    return default
+
+
+@dataclass
+class EntryLimits:
+    max_concurrency: int = 0  # 0: bounded only by the pool size
+    max_queue: int = 0  # 0: unbounded
+    priority: str = "interactive"
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> "EntryLimits":
+        params = params or {}
+        priority = params.get("priority", "interactive")
+        return cls(
+            max_concurrency=_int_param(params, "max_concurrency", "EXECUTOR_DEFAULT_MAX_CONCURRENCY", 0),
+            max_queue=_int_param(params, "max_queue", "EXECUTOR_DEFAULT_MAX_QUEUE", 1000),
+            priority=priority if priority in LANES else "interactive"
+        )
+
+
+class EntryStats:
+    def __init__(self):
+        self.queued = 0
+        self.running = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_exec = 0.0
+        self.max_exec = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "queued": self.queued,
+            "running": self.running,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_queue_wait_ms": (self.total_wait / finished * 1000) if finished else 0.0,
+            "max_queue_wait_ms": self.max_wait * 1000,
+            "avg_exec_ms": (self.total_exec / self.completed * 1000) if self.completed else 0.0,
+            "max_exec_ms": self.max_exec * 1000,
+        }
+
+
+class TaskScheduler:
+    """Feeds a worker pool from per-entry queues.
+
+    At most `workers` tasks are handed to the pool at a time, so queued work can
+    still be reordered: interactive tasks go before batch tasks, entries at their
+    max_concurrency are skipped, and entries within a lane are served round robin.
+    `run_task(*args)` must return `(output, exec_seconds)`. When `pool_factory` is
+    given, a broken pool (e.g. a crashed worker process) is replaced with a new one.
+    """
+
+    def __init__(self, name: str, pool: Executor, workers: int,
+                 run_task: Callable[..., Tuple[Any, float]], producer_queue: Queue,
+                 pool_factory: Optional[Callable[[], Executor]] = None):
+        self.name = name
+        self.pool = pool
+        self.pool_factory = pool_factory
+        self.pool_lock = threading.Lock()
+        self.pool_restarts = 0
+        self.workers = max(1, workers)
+        self.run_task = run_task
+        self.producer_queue = producer_queue
+
+        self.lanes: Dict[str, "OrderedDict[str, Deque[Dict[str, Any]]]"] = {lane: OrderedDict() for lane in LANES}
+        self.limits: Dict[str, EntryLimits] = {}
+        self.entries: Dict[str, EntryStats] = {}
+        self.inflight = 0
+        self.cond = threading.Condition()
+
+    def submit(self, uuid: str, entry_id: str, args: Tuple, limits: EntryLimits,
+               priority: Optional[str] = None,
+               on_success: Optional[Callable[[Any], None]] = None) -> Tuple[bool, str]:
+        lane = priority if priority in LANES else limits.priority
+        with self.cond:
+            stats = self.entries.setdefault(entry_id, EntryStats())
+            self.limits[entry_id] = limits
+            if limits.max_queue and stats.queued >= limits.max_queue:
+                stats.rejected += 1
+                logger.warning(f"{self.name} queue for {entry_id} is full. Task {uuid} not queued.")
+                return False, "Queue limit reached"
+
+            self.lanes[lane].setdefault(entry_id, deque()).append(
+                {"uuid": uuid, "entry_id": entry_id, "args": args, "on_success": on_success,
+                 "enqueued_at": time.time()})
+            stats.queued += 1
+            stats.submitted += 1
+            self.cond.notify()
+        logger.info(f"Task {uuid} queued for {entry_id} on the {lane} lane")
+        return True, "Task queued"
+
+    def _next_task(self) -> Optional[Dict[str, Any]]:
+        if self.inflight >= self.workers:
+            return None
+        for lane in LANES:
+            queues = self.lanes[lane]
+            for entry_id in list(queues):
+                cap = self.limits[entry_id].max_concurrency
+                if cap and self.entries[entry_id].running >= cap:
+                    continue
+                tasks = queues[entry_id]
+                task = tasks.popleft()
+                if tasks:
+                    queues.move_to_end(entry_id)
+                else:
+                    del queues[entry_id]
+                return task
+        return None
+
+    def run(self):
+        logger.info(f"{self.name} scheduler started with {self.workers} workers")
+        while True:
+            with self.cond:
+                task = self._next_task()
+                while task is None:
+                    self.cond.wait()
+                    task = self._next_task()
+                stats = self.entries[task["entry_id"]]
+                stats.queued -= 1
+                stats.running += 1
+                self.inflight += 1
+                task["started_at"] = time.time()
+
+            task["pool"] = pool = self.pool
+            try:
+                future = pool.submit(self.run_task, *task["args"])
+            except BrokenExecutor as e:
+                future = self._resubmit(pool, task, e)
+            except Exception as e:
+                future = Future()
+                future.set_exception(e)
+            future.add_done_callback(lambda f, task=task: self._complete(task, f))
+
+    def _replace_pool(self, broken: Executor) -> bool:
+        if self.pool_factory is None:
+            return False
+        with self.pool_lock:
+            if self.pool is not broken:
+                return True  # already replaced by another caller
+            logger.error(f"{self.name} worker pool is broken, starting a new one")
+            self.pool = self.pool_factory()
+            self.pool_restarts += 1
+        broken.shutdown(wait=False)
+        return True
+
+    def _resubmit(self, broken: Executor, task: Dict[str, Any], error: Exception) -> Future:
+        if self._replace_pool(broken):
+            task["pool"] = pool = self.pool
+            try:
+                return pool.submit(self.run_task, *task["args"])
+            except Exception as e:
+                error = e
+        future = Future()
+        future.set_exception(error)
+        return future
+
+    def _complete(self, task: Dict[str, Any], future: Future):
+        output, exec_seconds, error = None, 0.0, None
+        try:
+            output, exec_seconds = future.result()
+        except BrokenExecutor as e:
+            # Tasks running when a worker died fail; later ones go to a fresh pool
+            error = str(e) or "Worker pool broken"
+            logger.error(f"Task {task['uuid']} for {task['entry_id']} lost with its worker: {error}")
+            if task.get("pool") is not None:
+                self._replace_pool(task["pool"])
+        except Exception as e:
+            error = str(e)
+            logger.error(f"Error processing task {task['uuid']} for {task['entry_id']}: {e}")
+
+        wait = task["started_at"] - task["enqueued_at"]
+        with self.cond:
+            stats = self.entries[task["entry_id"]]
+            stats.running -= 1
+            self.inflight -= 1
+            stats.total_wait += wait
+            stats.max_wait = max(stats.max_wait, wait)
+            if error is None:
+                stats.completed += 1
+                stats.total_exec += exec_seconds
+                stats.max_exec = max(stats.max_exec, exec_seconds)
+            else:
+                stats.failed += 1
+            self.cond.notify()
+
+        if error is None:
+            self.producer_queue.put({"uuid": task["uuid"], "output": output})
+            logger.info(f"Task {task['uuid']} for {task['entry_id']} completed")
+            if task["on_success"] is not None:
+                try:
+                    task["on_success"](output)
+                except Exception as e:
+                    logger.warning(f"Success hook for task {task['uuid']} failed: {e}")
+        else:
+            self.producer_queue.put({"uuid": task["uuid"], "output": None, "error": error})
+
+    def stats(self) -> Dict[str, Any]:
+        with self.cond:
+            return {
+                "workers": self.workers,
+                "inflight": self.inflight,
+                "pool_restarts": self.pool_restarts,
+                "queued": {lane: sum(len(tasks) for tasks in queues.values()) for lane, queues in self.lanes.items()},
+                "entries": {entry_id: stats.to_dict() for entry_id, stats in self.entries.items()},
+            }
@@ -0,0 +1,363 @@
+import os
+import re
+import math
+import heapq
+import logging
+import threading
+from queue import Queue
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .registry_index import get_tools_index, get_functions_index
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+# BM25 parameters; the usual defaults
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "with"
+))
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Terms in at least this many entries are scored from impact-ordered lists
+IMPACT_MIN_DF = 1024
+# An impact list is rebuilt in the background once this many of its entries changed
+# since it was built, or once the average entry length drifted by this factor
+IMPACT_MAX_PENDING = 256
+IMPACT_MAX_DRIFT = 1.2
+
+Key = Tuple[str, str]  # (kind, entry id)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def normalize_tag(tag: Any) -> str:
+    return str(tag).strip().lower()
+
+
+class ImpactList:
+    """Postings of one common term ordered by score contribution, computed at `avgdl`.
+
+    Entries written after the list was built are listed in `pending` and scored directly.
+    """
+
+    def __init__(self, ordered: List[Tuple[float, Key]], avgdl: float):
+        self.ordered = ordered
+        self.avgdl = avgdl
+        self.pending: Set[Key] = set()
+
+
+class SearchIndex:
+    """BM25 inverted index over the search tags and descriptions of tools and functions.
+
+    Tag tokens count `tag_weight` times as much as description tokens. Whole tags
+    are also indexed as-is for exact tag filters. Updates are applied per entry,
+    so a search never waits on more than one entry being re-indexed.
+
+    Rare terms are scored by walking their postings. Common terms keep their
+    postings sorted by score contribution, so the top results can be found without
+    scoring every entry that contains them. Writes only mark the touched entries as
+    pending on those lists; a background thread rebuilds a list once it drifts too
+    far, holding the lock just to snapshot and swap it.
+    """
+
+    def __init__(self, tag_weight: float = 2.0):
+        self.tag_weight = tag_weight
+        self.postings: Dict[str, Dict[Key, float]] = {}  # term -> {key: weighted term frequency}
+        self.tag_postings: Dict[str, Set[Key]] = {}
+        self.kind_keys: Dict[str, Set[Key]] = {}
+        self.docs: Dict[Key, Tuple[Tuple[str, ...], str]] = {}  # key -> indexed (tags, text)
+        self.terms: Dict[Key, Dict[str, float]] = {}
+        self.lengths: Dict[Key, float] = {}
+        self.total_length = 0.0
+        self.impacts: Dict[str, ImpactList] = {}
+        self.building: Dict[str, Set[Key]] = {}  # term -> entries written while its list is rebuilt
+        self.build_queue: Queue = Queue()
+        self.lock = threading.Lock()
+        threading.Thread(target=self._build_loop, daemon=True).start()
+
+    # ---------------- Updates ----------------
+
+    def _analyze(self, tags: Tuple[str, ...], text: str) -> Dict[str, float]:
+        terms: Dict[str, float] = {}
+        for tag in tags:
+            for token in tokenize(tag):
+                terms[token] = terms.get(token, 0.0) + self.tag_weight
+        for token in tokenize(text):
+            terms[token] = terms.get(token, 0.0) + 1.0
+        return terms
+
+    def _stale(self, impact: ImpactList) -> bool:
+        drift = self.total_length / len(self.docs) / impact.avgdl if self.docs else 1.0
+        return len(impact.pending) > IMPACT_MAX_PENDING or not 1 / IMPACT_MAX_DRIFT < drift < IMPACT_MAX_DRIFT
+
+    def _touch(self, key: Key, terms: Iterable[str]):
+        for term in terms:
+            impact = self.impacts.get(term)
+            if impact is not None:
+                impact.pending.add(key)
+                if self._stale(impact):
+                    self._schedule(term)
+            building = self.building.get(term)
+            if building is not None:
+                building.add(key)
+
+    def _schedule(self, term: str):
+        if term not in self.building:
+            self.building[term] = set()
+            self.build_queue.put(term)
+
+    def _unindex(self, key: Key):
+        self._touch(key, self.terms[key])
+        tags, _ = self.docs.pop(key)
+        for term in self.terms.pop(key):
+            postings = self.postings[term]
+            del postings[key]
+            if not postings:
+                del self.postings[term]
+        for tag in set(tags):
+            keys = self.tag_postings[tag]
+            keys.discard(key)
+            if not keys:
+                del self.tag_postings[tag]
+        self.kind_keys[key[0]].discard(key)
+        self.total_length -= self.lengths.pop(key)
+
+    def upsert(self, kind: str, entry_id: str, tags: Iterable[Any], text: str):
+        key = (kind, entry_id)
+        tags = tuple(normalize_tag(tag) for tag in tags or [] if normalize_tag(tag))
+        text = text or ""
+        if self.docs.get(key) == (tags, text):
+            # Unchanged, as for most entries on a periodic reload
+            return
+        terms = self._analyze(tags, text)
+        with self.lock:
+            if self.docs.get(key) == (tags, text):
+                return
+            if key in self.docs:
+                self._unindex(key)
+            self.docs[key] = (tags, text)
+            self.terms[key] = terms
+            for term, frequency in terms.items():
+                self.postings.setdefault(term, {})[key] = frequency
+            for tag in tags:
+                self.tag_postings.setdefault(tag, set()).add(key)
+            self.kind_keys.setdefault(kind, set()).add(key)
+            self.lengths[key] = sum(terms.values())
+            self.total_length += self.lengths[key]
+            self._touch(key, terms)
+            for term in terms:
+                if term not in self.impacts and len(self.postings[term]) >= IMPACT_MIN_DF:
+                    self._schedule(term)
+
+    def remove(self, kind: str, entry_id: str):
+        with self.lock:
+            if (kind, entry_id) in self.docs:
+                self._unindex((kind, entry_id))
+
+    def sync(self, kind: str, docs: Dict[str, Tuple[Iterable[Any], str]]):
+        """Brings one kind in line with a full snapshot, re-indexing only what changed."""
+        with self.lock:
+            stale = [key for key in self.kind_keys.get(kind, ()) if key[1] not in docs]
+        for key in stale:
+            self.remove(*key)
+        for entry_id, (tags, text) in docs.items():
+            self.upsert(kind, entry_id, tags, text)
+
+    # ---------------- Queries ----------------
+
+    def search(self, query: str, tags: Optional[Iterable[Any]] = None, kind: Optional[str] = None,
+               limit: int = 20) -> List[Tuple[Key, float]]:
+        """Returns up to `limit` (key, score) pairs. Entries must carry every tag in `tags`."""
+        terms = set(tokenize(query or ""))
+        with self.lock:
+            filters = [self.tag_postings.get(normalize_tag(tag), set()) for tag in tags or []]
+            if kind:
+                filters.append(self.kind_keys.get(kind, set()))
+            candidates = None
+            if filters:
+                filters.sort(key=len)
+                candidates = filters[0].intersection(*filters[1:]) if len(filters) > 1 else filters[0]
+                if not candidates:
+                    return []
+
+            if not terms:
+                # Filter-only search: no ranking signal, keep the order stable
+                return [(key, 0.0) for key in heapq.nsmallest(limit, candidates or self.docs)]
+
+            count = len(self.docs)
+            if not count:
+                return []
+            avgdl = self.total_length / count
+            lengths = self.lengths
+            norm = K1 * (1 - B)
+            slope = K1 * B / avgdl if avgdl else 0.0
+
+            scores: Dict[Key, float] = {}
+            common = []
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                weight = math.log(1 + (count - df + 0.5) / (df + 0.5)) * (K1 + 1)
+                if df >= IMPACT_MIN_DF and (candidates is None or len(candidates) >= IMPACT_MIN_DF):
+                    impact = self.impacts.get(term)
+                    if impact is not None:
+                        if self._stale(impact):
+                            self._schedule(term)
+                        common.append((postings, weight, impact))
+                        continue
+                    # Scored like a rare term until its list is ready
+                    self._schedule(term)
+                if candidates is not None and len(candidates) < df:
+                    matched = ((key, postings[key]) for key in candidates if key in postings)
+                elif candidates is not None:
+                    matched = ((key, tf) for key, tf in postings.items() if key in candidates)
+                else:
+                    matched = postings.items()
+                for key, tf in matched:
+                    scores[key] = scores.get(key, 0.0) + weight * tf / (tf + norm + slope * lengths[key])
+
+            if common:
+                def common_score(key: Key) -> float:
+                    score = 0.0
+                    for postings, weight, _ in common:
+                        tf = postings.get(key)
+                        if tf:
+                            score += weight * tf / (tf + norm + slope * lengths[key])
+                    return score
+
+                # Entries written since a list was built are scored directly
+                for postings, _, impact in common:
+                    for key in impact.pending:
+                        if key in postings and key not in scores and (candidates is None or key in candidates):
+                            scores[key] = 0.0
+                for key in scores:
+                    scores[key] += common_score(key)
+                top = heapq.nlargest(limit, scores.values())
+                heapq.heapify(top)
+
+                # Threshold algorithm: walk the impact lists in parallel and stop once
+                # no entry further down can beat the current top `limit`. An unchanged
+                # entry's contribution grows at most by avgdl / impact.avgdl since its
+                # list was built, so the bound is scaled by that.
+                lists = [(impact.ordered, weight * max(1.0, avgdl / impact.avgdl)) for _, weight, impact in common]
+                seen = set(scores)
+                depth = 0
+                while True:
+                    threshold = sum(weight * ordered[depth][0] for ordered, weight in lists if depth < len(ordered))
+                    if not threshold or (len(top) >= limit and top[0] >= threshold):
+                        break
+                    for ordered, _ in lists:
+                        if depth >= len(ordered):
+                            continue
+                        key = ordered[depth][1]
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        if candidates is not None and key not in candidates:
+                            continue
+                        score = common_score(key)
+                        if not score:
+                            continue  # no longer contains any of the terms
+                        scores[key] = score
+                        if len(top) < limit:
+                            heapq.heappush(top, score)
+                        elif score > top[0]:
+                            heapq.heapreplace(top, score)
+                    depth += 1
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def _build_loop(self):
+        while True:
+            term = self.build_queue.get()
+            try:
+                self._build(term)
+            except Exception as e:
+                logger.error(f"Failed to build impact list for {term}: {e}")
+                with self.lock:
+                    self.building.pop(term, None)
+
+    def _build(self, term: str):
+        with self.lock:
+            postings = self.postings.get(term)
+            if not postings or len(postings) < IMPACT_MIN_DF:
+                self.impacts.pop(term, None)
+                self.building.pop(term, None)
+                return
+            items = list(postings.items())
+            avgdl = self.total_length / len(self.docs)
+
+        # Sorted off the lock; entries written meanwhile are collected in self.building[term]
+        lengths = self.lengths
+        norm = K1 * (1 - B)
+        slope = K1 * B / avgdl
+        ordered = sorted(((tf / (tf + norm + slope * lengths.get(key, avgdl)), key) for key, tf in items),
+                         reverse=True)
+
+        with self.lock:
+            impact = ImpactList(ordered, avgdl)
+            impact.pending = self.building.pop(term, set())
+            self.impacts[term] = impact
+            # Writes that landed during the build may already call for another pass
+            if self._stale(impact):
+                self._schedule(term)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "entries": len(self.docs),
+                "kinds": {kind: len(keys) for kind, keys in self.kind_keys.items()},
+                "terms": len(self.postings),
+                "tags": len(self.tag_postings),
+                "avg_length": self.total_length / len(self.docs) if self.docs else 0.0,
+                "impact_lists": len(self.impacts),
+                "impact_lists_building": len(self.building),
+            }
+
+
+class RegistryFeed:
+    """Mirrors one registry index into the search index as it changes."""
+
+    def __init__(self, search_index: SearchIndex, kind: str, tag_field: str, text_field: str):
+        self.search_index = search_index
+        self.kind = kind
+        self.tag_field = tag_field
+        self.text_field = text_field
+
+    def entry_updated(self, key: str, doc: Dict[str, Any]):
+        self.search_index.upsert(self.kind, key, doc.get(self.tag_field) or [], doc.get(self.text_field) or "")
+
+    def entry_removed(self, key: str):
+        self.search_index.remove(self.kind, key)
+
+    def entries_reloaded(self, entries: Dict[str, Dict[str, Any]]):
+        self.search_index.sync(self.kind, {
+            key: (doc.get(self.tag_field) or [], doc.get(self.text_field) or "") for key, doc in entries.items()
+        })
+
+
+_search_index: Optional[SearchIndex] = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    global _search_index
+    if _search_index is None:
+        with _search_index_lock:
+            if _search_index is None:
+                index = SearchIndex(tag_weight=float(os.getenv("SEARCH_INDEX_TAG_WEIGHT", "2")))
+                get_tools_index().add_listener(
+                    RegistryFeed(index, "tool", "tool_search_tags", "tool_description"))
+                get_functions_index().add_listener(
+                    RegistryFeed(index, "function", "function_search_tags", "function_description"))
+                _search_index = index
+    return _search_index
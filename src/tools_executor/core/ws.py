@@ -9,6 +9,8 @@ from queue import Queue
 from typing import Dict, Any
 
 from .executor import ToolTaskExecutor, FunctionTaskExecutor
+from .session import Session
+from .batch import BatchRun, validate_batch
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,8 +18,11 @@ logger = logging.getLogger(__name__)
 # Shared producer queue for output
 producer_queue = Queue()
 
-# Connection map: UUID → websocket
-uuid_connection_map: Dict[str, websockets.WebSocketServerProtocol] = {}
+# Connection map: UUID → future resolved with the task's result on the server loop
+uuid_connection_map: Dict[str, asyncio.Future] = {}
+
+# Session map: UUID → session or batch that submitted the task (anything with deliver())
+uuid_session_map: Dict[str, Any] = {}
 
 # Tool and Function executors
 tool_executor = ToolTaskExecutor(
@@ -35,36 +40,128 @@ def start_task_executors():
     threading.Thread(target=tool_executor.run, daemon=True).start()
     threading.Thread(target=function_executor.run, daemon=True).start()
 
-# Dispatcher to return results over websocket
+    # Build executors for the hottest entries ahead of their first call
+    top_n = int(os.getenv("EXECUTOR_PREWARM_TOP_N", "10"))
+    if top_n > 0:
+        threading.Thread(target=tool_executor.prewarm, args=(top_n,), daemon=True).start()
+        threading.Thread(target=function_executor.prewarm, args=(top_n,), daemon=True).start()
+
+# Dispatcher to return results over websocket. Results are handed to the event
+# loop that owns the connection; sends happen there, concurrently per connection.
+def resolve_result(waiter: asyncio.Future, result: Dict[str, Any]):
+    if not waiter.done():
+        waiter.set_result(result)
+
 def start_result_dispatcher():
     def dispatch_loop():
         while True:
             result = producer_queue.get()
             task_uuid = result["uuid"]
-            output = result["output"]
 
-            if task_uuid in uuid_connection_map:
-                ws = uuid_connection_map.pop(task_uuid)
-                asyncio.run(send_result_and_close(ws, output))
+            session = uuid_session_map.pop(task_uuid, None)
+            if session is not None:
+                session.deliver(result)
+                continue
+
+            waiter = uuid_connection_map.pop(task_uuid, None)
+            if waiter is None:
+                logger.info(f"Dropping result of task {task_uuid}; its connection is gone")
+                continue
+            waiter.get_loop().call_soon_threadsafe(resolve_result, waiter, result)
 
     threading.Thread(target=dispatch_loop, daemon=True).start()
 
-async def send_result_and_close(ws, output):
+async def wait_for_result(websocket, waiter: asyncio.Future):
+    # Returns None if the client disconnects before the result arrives
+    closed = asyncio.ensure_future(websocket.wait_closed())
     try:
-        await ws.send(json.dumps({"success": True, "output": output}))
+        done, _ = await asyncio.wait({waiter, closed}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        closed.cancel()
+    return waiter.result() if waiter in done else None
+
+def result_message(result: Dict[str, Any]) -> Dict[str, Any]:
+    if result.get("error"):
+        return {"success": False, "error": result["error"]}
+    return {"success": True, "output": result["output"]}
+
+# Session tasks carry either a tool_id or a function_id
+def submit_session_task(task_uuid: str, task: Dict[str, Any]):
+    input_data = task.get("input_data")
+    if task.get("tool_id") and input_data:
+        return tool_executor.push_task_to_queue(
+            uuid=task_uuid,
+            tool_id=task["tool_id"],
+            input_data=input_data,
+            priority=task.get("priority")
+        )
+    if task.get("function_id") and input_data:
+        return function_executor.push_task_to_queue(
+            uuid=task_uuid,
+            function_id=task["function_id"],
+            input_data=input_data,
+            priority=task.get("priority")
+        )
+    return False, "Missing tool_id or function_id, or input_data"
+
+def entry_exists(kind: str, entry_id: str) -> bool:
+    executor = tool_executor if kind == "tool" else function_executor
+    return executor.index.get(entry_id) is not None
+
+async def handle_batch(websocket):
+    batch = None
+    batch_id = str(uuid.uuid4())
+    try:
+        try:
+            batch = json.loads(await websocket.recv())
+            if not isinstance(batch, dict):
+                raise ValueError("Batch must be a JSON object")
+            batch_id = str(batch.get("batch_id") or batch_id)
+            calls = batch.get("calls")
+            errors, deps = await asyncio.get_event_loop().run_in_executor(
+                None, validate_batch, calls, entry_exists, int(os.getenv("WS_BATCH_MAX_CALLS", "100")))
+        except (json.JSONDecodeError, ValueError) as e:
+            errors, deps = [str(e)], {}
+
+        if errors:
+            await websocket.send(json.dumps({"type": "error", "batch_id": batch_id, "success": False, "errors": errors}))
+            return
+        await BatchRun(
+            websocket, batch_id, calls, deps,
+            submit=submit_session_task,
+            routes=uuid_session_map,
+            priority=batch.get("priority")
+        ).serve()
+    except websockets.ConnectionClosed:
+        logger.info(f"WebSocket closed by client during batch {batch_id}")
     except Exception as e:
-        logger.error(f"Error sending result: {e}")
+        logger.error(f"Batch {batch_id} failed: {e}")
     finally:
-        await ws.close()
-        logger.info("WebSocket connection closed")
+        await websocket.close()
 
 # WebSocket handler (dispatches based on route)
 async def handler(websocket, path):
+    if path == "/batch":
+        await handle_batch(websocket)
+        return
+
+    if path == "/session":
+        session = Session(
+            websocket,
+            submit=submit_session_task,
+            routes=uuid_session_map,
+            max_inflight=int(os.getenv("WS_SESSION_MAX_INFLIGHT", "64"))
+        )
+        await session.serve()
+        return
+
+    task_uuid = None
     try:
         message = await websocket.recv()
         task = json.loads(message)
         task_uuid = str(uuid.uuid4())
-        uuid_connection_map[task_uuid] = websocket
+        waiter = asyncio.get_event_loop().create_future()
+        uuid_connection_map[task_uuid] = waiter
 
         success = False
         msg = "Invalid path"
@@ -80,7 +177,8 @@ async def handler(websocket, path):
                 success, msg = tool_executor.push_task_to_queue(
                     uuid=task_uuid,
                     tool_id=tool_id,
-                    input_data=input_data
+                    input_data=input_data,
+                    priority=task.get("priority")
                 )
                 task_type = "Tool"
 
@@ -94,22 +192,37 @@ async def handler(websocket, path):
                 success, msg = function_executor.push_task_to_queue(
                     uuid=task_uuid,
                     function_id=function_id,
-                    input_data=input_data
+                    input_data=input_data,
+                    priority=task.get("priority")
                 )
                 task_type = "Function"
 
         if not success:
             await websocket.send(json.dumps({"success": False, "error": msg}))
-            await websocket.close()
-            uuid_connection_map.pop(task_uuid, None)
             return
 
         await websocket.send(json.dumps({"success": True, "uuid": task_uuid}))
         logger.info(f"{task_type} task {task_uuid} accepted")
 
+        # The acknowledgement is sent before the result on the same coroutine,
+        # so a fast task cannot overtake it
+        result = await wait_for_result(websocket, waiter)
+        if result is None:
+            logger.info(f"Client disconnected before task {task_uuid} finished")
+            return
+        await websocket.send(json.dumps(result_message(result)))
+
+    except websockets.ConnectionClosed:
+        logger.info(f"WebSocket closed by client for task {task_uuid}")
     except Exception as e:
         logger.error(f"WebSocket handler error: {e}")
-        await websocket.send(json.dumps({"success": False, "error": str(e)}))
+        try:
+            await websocket.send(json.dumps({"success": False, "error": str(e)}))
+        except websockets.ConnectionClosed:
+            pass
+    finally:
+        if task_uuid:
+            uuid_connection_map.pop(task_uuid, None)
         await websocket.close()
 
 # Start the unified WebSocket server
@@ -119,7 +232,11 @@ def start_websocket_server(host="0.0.0.0", port=8765):
 
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
-    ws_server = websockets.serve(handler, host, port)
+    ws_server = websockets.serve(
+        handler, host, port,
+        ping_interval=float(os.getenv("WS_PING_INTERVAL", "20")),
+        ping_timeout=float(os.getenv("WS_PING_TIMEOUT", "20"))
+    )
     loop.run_until_complete(ws_server)
     logger.info(f"WebSocket server running on ws://{host}:{port}")
     loop.run_forever()